@@ -1,22 +1,41 @@
 from flask import Flask, jsonify, request, send_file
 from flask_cors import CORS
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 import os
 import json
 import traceback
 from datetime import timedelta
 
-from database.mysql_data_handler import get_student_data, get_filtered_student_data, get_students_by_reg_nos, check_database
+from database.mysql_data_handler import get_students_by_reg_nos, get_pool_stats, upsert_grades, get_students_page, load_schema_cache
+from database.dashboard_aggregates import get_dashboard_aggregates
+from database.grade_snapshot import get_grade_snapshot_stats
+from database.class_averages import get_class_averages_stats
+from database.rankings import get_ranking_stats
 from reports.generate_pdf_with_styles import generate_pdf_report, generate_pdf_reporting
 from reports.generate_excel import generate_excel_report
+from reports.browser_pool import get_browser_pool_stats
+from reports.render_cache import get_render_cache_stats
+from reports.assets import get_asset_cache, get_asset_cache_stats
+from reports.pdf_postprocess import COMPRESSION_STAGES, get_postprocess_stats
+from reports.batch_render import parse_worker_count
 from reports.academic_reports import register_academic_report_routes
+from reports.academic_profile import get_academic_profile_stats
 from reports.progress_tracking import register_progress_tracking_routes
+from reports.analytics import register_analytics_routes
+from reports.report_jobs import register_report_job_routes, submit_report_job, get_job_stats
+from utils.response_cache import cached_response, get_response_cache_stats, DASHBOARD_TTL
+from utils.conditional_get import conditional_get
+from utils.json_provider import AppJSONProvider
+from utils.compression import register_compression, get_compression_stats
+from utils.health import register_health_routes, database_ready
 
 # Import blueprints
 from auth import auth_bp
+from auth.decorators import role_required
 from users import users_bp
 
 app = Flask(__name__)
+app.json = AppJSONProvider(app)
 CORS(app)  # Enable CORS for all routes
 
 # Configure JWT
@@ -25,6 +44,9 @@ app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=1)
 app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(days=30)
 jwt = JWTManager(app)
 
+# Read the schema once at startup (also under `flask run`) so no request pays for it
+load_schema_cache()
+
 # Register blueprints
 app.register_blueprint(auth_bp)
 app.register_blueprint(users_bp)
@@ -35,10 +57,22 @@ register_academic_report_routes(app)
 # Register progress tracking routes
 register_progress_tracking_routes(app)
 
+# Register class-level analytics routes
+register_analytics_routes(app)
+
+# Register asynchronous report job routes
+register_report_job_routes(app)
+
+# Register liveness/readiness probes
+register_health_routes(app)
+
+# Negotiated gzip/brotli for JSON and text responses
+register_compression(app)
+
 @app.route('/')
 def index():
-    """Root endpoint to check if the API is running."""
-    if check_database():
+    """Root endpoint to check if the API is running. Use /healthz and /readyz for probes."""
+    if database_ready()["ok"]:
         return jsonify({
             "status": "ok", 
             "message": "API is running and database connection is successful",
@@ -50,30 +84,75 @@ def index():
             "message": "API is running but database connection failed"
         }), 500
 
+@app.route('/api/system/metrics', methods=['GET'])
+def get_system_metrics():
+    """Runtime metrics for the shared resource pools."""
+    return jsonify({
+        "databasePool": get_pool_stats(),
+        "browserPool": get_browser_pool_stats(),
+        "reportJobs": get_job_stats(),
+        "renderCache": get_render_cache_stats(),
+        "assets": get_asset_cache_stats(),
+        "pdfPostprocess": get_postprocess_stats(),
+        "responseCache": get_response_cache_stats(),
+        "compression": get_compression_stats(),
+        "gradeSnapshot": get_grade_snapshot_stats(),
+        "academicProfiles": get_academic_profile_stats(),
+        "classAverages": get_class_averages_stats(),
+        "rankings": get_ranking_stats()
+    })
+
+# Tables behind the grade-derived reports and dashboard, for conditional GETs
+REPORT_TABLES = ("students", "grades", "courses")
+
+def photo_signatures(reg_nos):
+    """Photo files used in the given students' PDFs, so a replaced photo changes their ETag."""
+    assets = get_asset_cache()
+    return [assets.photo_signature(reg_no) for reg_no in reg_nos]
+
 @app.route('/api/students', methods=['GET'])
+@conditional_get("students")
 def get_students():
+    """
+    Student list straight from the students table.
+
+    Query params: limit and cursor for keyset pagination, sort (registered_no, name,
+    branch, curr_semester) and order, q to find names and registration numbers starting with it,
+    branch and semester filters, and fields to choose the returned columns.
+    Without limit every matching student is returned.
+    """
+    fields_param = request.args.get('fields', '')
     try:
-        branch = request.args.get('branch', '')
-        semester = request.args.get('semester', '')
-        
-        if branch or semester:
-            students, _ = get_filtered_student_data(None, semester, branch)
-        else:
-            students, _, _ = get_student_data()
-            
-        return jsonify({"data": students})
+        students, next_cursor = get_students_page(
+            limit=request.args.get('limit') or None,
+            cursor=request.args.get('cursor') or None,
+            sort=request.args.get('sort', 'registered_no'),
+            order=request.args.get('order', 'asc'),
+            q=request.args.get('q', '').strip() or None,
+            branch=request.args.get('branch', ''),
+            semester=request.args.get('semester', ''),
+            fields=[f for f in fields_param.split(',') if f] or None
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e), "data": []}), 400
     except Exception as e:
         print(f"Error in get_students: {e}")
         traceback.print_exc()
         return jsonify({"error": str(e), "data": []}), 500
 
+    return jsonify({"data": students, "nextCursor": next_cursor})
+
 @app.route('/api/reports/individual/<reg_no>', methods=['GET'])
+@conditional_get(*REPORT_TABLES, extra=lambda reg_no: photo_signatures([reg_no]))
 def get_individual_report(reg_no):
     try:
         include_charts = request.args.get('includeCharts', 'false').lower() == 'true'
         template_style = request.args.get('templateStyle', 'classic')
+        compression = request.args.get('compression')
+        if compression and compression.lower() not in COMPRESSION_STAGES:
+            return jsonify({"error": f"compression must be one of: {', '.join(COMPRESSION_STAGES)}"}), 400
         
-        pdf_path = generate_pdf_report([reg_no], includeCharts=include_charts, template_style=template_style)
+        pdf_path = generate_pdf_report([reg_no], includeCharts=include_charts, template_style=template_style, compression=compression)
         
         if pdf_path:
             return send_file(pdf_path, as_attachment=True, download_name=f"{reg_no}_report.pdf")
@@ -85,12 +164,16 @@ def get_individual_report(reg_no):
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/reports/preview/<reg_no>', methods=['GET'])
+@conditional_get(*REPORT_TABLES, extra=lambda reg_no: photo_signatures([reg_no]))
 def preview_individual_report(reg_no):
     try:
         include_charts = request.args.get('includeCharts', 'false').lower() == 'true'
         template_style = request.args.get('templateStyle', 'classic')
+        compression = request.args.get('compression')
+        if compression and compression.lower() not in COMPRESSION_STAGES:
+            return jsonify({"error": f"compression must be one of: {', '.join(COMPRESSION_STAGES)}"}), 400
         
-        pdf_path = generate_pdf_report([reg_no], includeCharts=include_charts, template_style=template_style)
+        pdf_path = generate_pdf_report([reg_no], includeCharts=include_charts, template_style=template_style, compression=compression)
         
         if pdf_path:
             # Set Content-Disposition to inline to display in browser
@@ -105,25 +188,46 @@ def preview_individual_report(reg_no):
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/reports/pdf/<pdf_type>', methods=['GET'])
+@conditional_get(*REPORT_TABLES, extra=lambda pdf_type: photo_signatures(request.args.get('students', '').split(',')))
 def get_pdf_reports(pdf_type):
     try:
         students_param = request.args.get('students', '')
         include_charts = request.args.get('includeCharts', 'false').lower() == 'true'
         template_style = request.args.get('templateStyle', 'classic')
+        try:
+            workers = parse_worker_count(request.args.get('workers'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        compression = request.args.get('compression')
+        if compression and compression.lower() not in COMPRESSION_STAGES:
+            return jsonify({"error": f"compression must be one of: {', '.join(COMPRESSION_STAGES)}"}), 400
         
         if not students_param:
             return jsonify({"error": "No students specified"}), 400
             
         students = students_param.split(',')
         
+        # Large batches can be queued as a background job and polled instead
+        if request.args.get('async', 'false').lower() == 'true':
+            if pdf_type not in ('individual', 'combined'):
+                return jsonify({"error": "Invalid PDF type"}), 400
+            return submit_report_job('pdf', {
+                "students": students,
+                "generation_type": pdf_type,
+                "include_charts": include_charts,
+                "template_style": template_style,
+                "workers": workers,
+                "compression": compression
+            })
+        
         if pdf_type == 'individual':
-            pdf_path = generate_pdf_reporting(students, 'individual', includeCharts=include_charts, template_style=template_style)
+            pdf_path = generate_pdf_reporting(students, 'individual', includeCharts=include_charts, template_style=template_style, workers=workers, compression=compression)
             if pdf_path:
                 # For individual reports, return the PDF directly
                 return send_file(pdf_path, as_attachment=True, 
                                 download_name=f"{students[0]}_report.pdf" if len(students) == 1 else "Student_Reports.pdf")
         elif pdf_type == 'combined':
-            pdf_path = generate_pdf_reporting(students, 'combined', includeCharts=include_charts, template_style=template_style)
+            pdf_path = generate_pdf_reporting(students, 'combined', includeCharts=include_charts, template_style=template_style, workers=workers, compression=compression)
             if pdf_path:
                 return send_file(pdf_path, as_attachment=True, download_name="Combined_Student_Report.pdf")
         
@@ -134,6 +238,7 @@ def get_pdf_reports(pdf_type):
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/reports/excel', methods=['GET'])
+@conditional_get(*REPORT_TABLES)
 def get_excel_report():
     try:
         students_param = request.args.get('students', '')
@@ -145,6 +250,9 @@ def get_excel_report():
         students = students_param.split(',')
         columns = columns_param.split(',') if columns_param else None
         
+        if request.args.get('async', 'false').lower() == 'true':
+            return submit_report_job('excel', {"students": students, "columns": columns})
+        
         excel_path = generate_excel_report(students, columns)
         
         if excel_path:
@@ -156,211 +264,156 @@ def get_excel_report():
         traceback.print_exc()
         return jsonify({"error": str(e)}), 500
 
+BRANCH_COLORS = [
+    '#4568dc', '#b06ab3', '#4caf50', '#ff9800', '#2196f3', '#f44336',
+    '#9c27b0', '#673ab7', '#3f51b5', '#009688', '#ffeb3b', '#795548'
+]
+
+def build_dashboard_stats(aggregates):
+    """Dashboard summary cards from the branch aggregates."""
+    branches = [row['branch'] for row in aggregates['branches'] if row['student_count'] > 0]
+    graded_students = sum(row['graded_students'] for row in aggregates['branches'])
+    cgpa_sum = sum(row['cgpa_sum'] for row in aggregates['branches'])
+    
+    return {
+        "totalStudents": sum(row['student_count'] for row in aggregates['branches']),
+        "avgCGPA": round(cgpa_sum / graded_students, 2) if graded_students else 0,
+        # Mock reports generated count
+        "reportsGenerated": 342,
+        "atRiskStudents": sum(row['at_risk_count'] for row in aggregates['branches']),
+        "branchCount": len(branches),
+        "branches": branches
+    }
+
+def build_performance_data(aggregates):
+    """Average SGPA and pass percentage per semester from the semester aggregates."""
+    labels = []
+    sgpa_data = []
+    pass_percentage_data = []
+    
+    for row in aggregates['semesters']:
+        labels.append(f"Semester {row['semester']}")
+        sgpa_data.append(round(row['sgpa_sum'] / row['summary_count'], 2) if row['summary_count'] > 0 else 0)
+        
+        total_subjects = row['total_subjects']
+        passed_subjects = total_subjects - row['failed_subjects']
+        pass_percentage_data.append(round((passed_subjects / total_subjects) * 100, 1) if total_subjects > 0 else 0)
+    
+    return {
+        "labels": labels,
+        "datasets": [
+            {
+                "label": "Average SGPA",
+                "data": sgpa_data,
+                "borderColor": "#4568dc",
+                "backgroundColor": "rgba(69, 104, 220, 0.2)",
+                "fill": True
+            },
+            {
+                "label": "Pass Percentage",
+                "data": pass_percentage_data,
+                "borderColor": "#b06ab3",
+                "backgroundColor": "rgba(176, 106, 179, 0.2)",
+                "fill": True
+            }
+        ]
+    }
+
+def build_branch_distribution(aggregates):
+    """Student count per branch from the branch aggregates."""
+    rows = [row for row in aggregates['branches'] if row['student_count'] > 0]
+    labels = [row['branch'] for row in rows]
+    
+    return {
+        "labels": labels,
+        "datasets": [{
+            "data": [row['student_count'] for row in rows],
+            "backgroundColor": BRANCH_COLORS[:len(labels)]
+        }]
+    }
+
+EMPTY_AGGREGATES = {"branches": [], "semesters": []}
+
 @app.route('/api/dashboard/stats', methods=['GET'])
+@conditional_get(*REPORT_TABLES)
+@cached_response(DASHBOARD_TTL, tags=["dashboard"])
 def get_dashboard_stats():
     try:
-        students, records, summaries = get_student_data()
-        
-        # Calculate statistics
-        total_students = len(students)
-        
-        # Default values in case of empty data
-        avg_cgpa = 0
-        at_risk_students = 0
-        branches = set()
-        
-        # Calculate average CGPA if we have data
-        if students and summaries:
-            student_cgpas = {}
-            for summary in summaries:
-                reg_no = summary['registered_no']
-                if reg_no not in student_cgpas:
-                    student_cgpas[reg_no] = {'total_sgpa': 0, 'count': 0}
-                
-                student_cgpas[reg_no]['total_sgpa'] += summary['sgpa']
-                student_cgpas[reg_no]['count'] += 1
-            
-            if student_cgpas:
-                total_cgpa = sum(data['total_sgpa'] / data['count'] for data in student_cgpas.values() if data['count'] > 0)
-                avg_cgpa = round(total_cgpa / len(student_cgpas), 2) if student_cgpas else 0
-                
-                # Count at-risk students (CGPA < 5.0)
-                at_risk_students = sum(1 for reg_no, data in student_cgpas.items() 
-                                    if data['count'] > 0 and data['total_sgpa'] / data['count'] < 5.0)
-        
-        # Count branches
-        if students:
-            branches = set(student['branch'] for student in students)
-        
-        # Mock reports generated count
-        reports_generated = 342
-        
-        return jsonify({
-            "totalStudents": total_students,
-            "avgCGPA": avg_cgpa,
-            "reportsGenerated": reports_generated,
-            "atRiskStudents": at_risk_students,
-            "branchCount": len(branches),
-            "branches": list(branches)
-        })
+        return jsonify(build_dashboard_stats(get_dashboard_aggregates()))
     except Exception as e:
         print(f"Error in dashboard stats: {e}")
         traceback.print_exc()
-        return jsonify({
-            "totalStudents": 0,
-            "avgCGPA": 0,
-            "reportsGenerated": 0,
-            "atRiskStudents": 0,
-            "branchCount": 0,
-            "branches": []
-        }), 500
+        return jsonify(build_dashboard_stats(EMPTY_AGGREGATES)), 500
 
 @app.route('/api/dashboard/performance', methods=['GET'])
+@conditional_get(*REPORT_TABLES)
+@cached_response(DASHBOARD_TTL, tags=["dashboard"])
 def get_performance_data():
     try:
-        students, records, summaries = get_student_data()
-        
-        # Default empty response
-        empty_response = {
-            "labels": [],
-            "datasets": [
-                {
-                    "label": "Average SGPA",
-                    "data": [],
-                    "borderColor": "#4568dc",
-                    "backgroundColor": "rgba(69, 104, 220, 0.2)",
-                    "fill": True
-                },
-                {
-                    "label": "Pass Percentage",
-                    "data": [],
-                    "borderColor": "#b06ab3",
-                    "backgroundColor": "rgba(176, 106, 179, 0.2)",
-                    "fill": True
-                }
-            ]
-        }
-        
-        # If no data, return empty response
-        if not summaries:
-            return jsonify(empty_response)
-        
-        # Group summaries by semester
-        semester_data = {}
-        for summary in summaries:
-            sem_no = summary['semester_no']
-            if sem_no not in semester_data:
-                semester_data[sem_no] = {
-                    'total_sgpa': 0,
-                    'count': 0,
-                    'pass_count': 0,
-                    'total_subjects': 0,
-                    'failed_subjects': 0
-                }
-            
-            semester_data[sem_no]['total_sgpa'] += summary['sgpa']
-            semester_data[sem_no]['count'] += 1
-            semester_data[sem_no]['total_subjects'] += summary['total_no_of_subjects']
-            semester_data[sem_no]['failed_subjects'] += summary['no_of_failed_subjects']
-        
-        # If no semester data, return empty response
-        if not semester_data:
-            return jsonify(empty_response)
-        
-        # Calculate average SGPA and pass percentage for each semester
-        labels = []
-        sgpa_data = []
-        pass_percentage_data = []
-        
-        for sem_no in sorted(semester_data.keys()):
-            data = semester_data[sem_no]
-            labels.append(f'Semester {sem_no}')
-            
-            avg_sgpa = round(data['total_sgpa'] / data['count'], 2) if data['count'] > 0 else 0
-            sgpa_data.append(avg_sgpa)
-            
-            total_subjects = data['total_subjects']
-            passed_subjects = total_subjects - data['failed_subjects']
-            pass_percentage = round((passed_subjects / total_subjects) * 100, 1) if total_subjects > 0 else 0
-            pass_percentage_data.append(pass_percentage)
-        
-        return jsonify({
-            "labels": labels,
-            "datasets": [
-                {
-                    "label": "Average SGPA",
-                    "data": sgpa_data,
-                    "borderColor": "#4568dc",
-                    "backgroundColor": "rgba(69, 104, 220, 0.2)",
-                    "fill": True
-                },
-                {
-                    "label": "Pass Percentage",
-                    "data": pass_percentage_data,
-                    "borderColor": "#b06ab3",
-                    "backgroundColor": "rgba(176, 106, 179, 0.2)",
-                    "fill": True
-                }
-            ]
-        })
+        return jsonify(build_performance_data(get_dashboard_aggregates()))
     except Exception as e:
         print(f"Error in performance data: {e}")
         traceback.print_exc()
-        return jsonify(empty_response), 500
+        return jsonify(build_performance_data(EMPTY_AGGREGATES)), 500
 
 @app.route('/api/dashboard/branch-distribution', methods=['GET'])
+@conditional_get(*REPORT_TABLES)
+@cached_response(DASHBOARD_TTL, tags=["dashboard"])
 def get_branch_distribution():
     try:
-        students, _, _ = get_student_data()
-        
-        # Default empty response
-        empty_response = {
-            "labels": [],
-            "datasets": [{
-                "data": [],
-                "backgroundColor": []
-            }]
-        }
-        
-        # If no students, return empty response
-        if not students:
-            return jsonify(empty_response)
-        
-        # Count students by branch
-        branch_counts = {}
-        for student in students:
-            branch = student['branch']
-            if branch not in branch_counts:
-                branch_counts[branch] = 0
-            branch_counts[branch] += 1
-        
-        # If no branch counts, return empty response
-        if not branch_counts:
-            return jsonify(empty_response)
-        
-        # Prepare data for chart
-        labels = list(branch_counts.keys())
-        data = list(branch_counts.values())
-        
-        # Define colors for branches
-        colors = [
-            '#4568dc', '#b06ab3', '#4caf50', '#ff9800', '#2196f3', '#f44336',
-            '#9c27b0', '#673ab7', '#3f51b5', '#009688', '#ffeb3b', '#795548'
-        ]
-        
-        return jsonify({
-            "labels": labels,
-            "datasets": [{
-                "data": data,
-                "backgroundColor": colors[:len(labels)]
-            }]
-        })
+        return jsonify(build_branch_distribution(get_dashboard_aggregates()))
     except Exception as e:
         print(f"Error in branch distribution: {e}")
         traceback.print_exc()
-        return jsonify(empty_response), 500
+        return jsonify(build_branch_distribution(EMPTY_AGGREGATES)), 500
+
+DASHBOARD_BUNDLE_FIELDS = {
+    "stats": build_dashboard_stats,
+    "performance": build_performance_data,
+    "branchDistribution": build_branch_distribution
+}
+
+@app.route('/api/dashboard/bundle', methods=['GET'])
+@conditional_get(*REPORT_TABLES)
+@cached_response(DASHBOARD_TTL, tags=["dashboard"])
+def get_dashboard_bundle():
+    """All dashboard panels from one aggregate read; ?fields= limits it to the panels shown."""
+    fields_param = request.args.get('fields', '')
+    fields = [f for f in fields_param.split(',') if f] if fields_param else list(DASHBOARD_BUNDLE_FIELDS)
+    unknown = [f for f in fields if f not in DASHBOARD_BUNDLE_FIELDS]
+    if unknown:
+        return jsonify({"error": f"Unknown fields: {', '.join(unknown)}. Expected: {', '.join(DASHBOARD_BUNDLE_FIELDS)}"}), 400
+    
+    try:
+        aggregates = get_dashboard_aggregates()
+        return jsonify({field: DASHBOARD_BUNDLE_FIELDS[field](aggregates) for field in fields})
+    except Exception as e:
+        print(f"Error in dashboard bundle: {e}")
+        traceback.print_exc()
+        return jsonify({field: DASHBOARD_BUNDLE_FIELDS[field](EMPTY_AGGREGATES) for field in fields}), 500
+
+@app.route('/api/grades', methods=['POST'])
+@jwt_required()
+@role_required(['hod', 'principal'])
+def post_grades():
+    """Insert or update grade rows; dependent aggregates and caches refresh on commit."""
+    try:
+        data = request.get_json() or {}
+        grades = data.get('grades', [])
+        if not isinstance(grades, list) or not grades:
+            return jsonify({"error": "No grades specified"}), 400
+        
+        result = upsert_grades(grades)
+        return jsonify(result)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        print(f"Error in post_grades: {e}")
+        traceback.print_exc()
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/api/dashboard/recent-reports', methods=['GET'])
+@conditional_get()
 def get_recent_reports():
     # Mock data - in a real implementation, this would come from a database
     return jsonify([
@@ -372,6 +425,7 @@ def get_recent_reports():
     ])
 
 @app.route('/api/dashboard/notifications', methods=['GET'])
+@conditional_get()
 def get_notifications():
     # Mock data - in a real implementation, this would come from a database
     return jsonify([
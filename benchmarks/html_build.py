@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Benchmark for per-student report HTML building in generate_html.
+
+Compares the old approach (read the template file for every student, build the
+semester tables with += concatenation and fill ten placeholders with full-string
+str.replace passes) with the current compiled Jinja2 template and list-joined
+rows. Both run against the same synthetic students and the output is checked
+for equality. The header and photo fragments come from the warm asset cache
+in both cases, so the numbers isolate template filling.
+
+Usage:
+    python -m benchmarks.html_build [--students 50 200] [--style classic modern minimal]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+from benchmarks.semester_summaries import make_dataset
+from reports.assets import get_asset_cache
+from reports.generate_pdf_with_styles import generate_html, get_template_path
+
+REPO_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+
+def legacy_fill_template(student, records, template_style, header_image, student_photo):
+    """The template read, table concatenation and str.replace passes generate_html used before."""
+    with open(os.path.join(REPO_ROOT, get_template_path(template_style)), "r", encoding="utf-8") as file:
+        html_content = file.read()
+
+    formatted_address = f"""
+        <li>{student.get("father_name", "Parent/Guardian")}</li>
+        <li>{student.get("door_no", "")}</li>
+        <li>{student.get("city", student.get("address", ""))}</li>
+        <li>{student.get("mandal", "")}</li>
+        <li>{student.get("district", "")}</li>
+        <li>{student.get("state", "")}</li>
+        <li>{student.get("country", "India")}</li>
+        <li>{student.get("pincode", "")}</li>
+    """
+
+    semester_groups = {}
+    for record in records:
+        if record["registered_no"] == student["registered_no"]:
+            semester_groups.setdefault(record["semester_no"], []).append(record)
+
+    semester_html = ""
+    semester_summary_rows = ""
+    for sem_no, courses in sorted(semester_groups.items()):
+        total_subjects = len(courses)
+        failed_subjects = sum(1 for course in courses if course["result"] == "FAIL")
+        sgpa = round(sum(course["grade_points"] for course in courses) / total_subjects, 2) if total_subjects > 0 else 0
+        sem_table = f"""
+        <br>
+        <table class="semester-table" border="1">
+            <thead>
+                <tr class="semester-header">
+                    <td colspan="7">{sem_no} Semester</td>
+                </tr>
+            </thead>
+                <tr>
+                    <th>Course Name</th>
+                    <th>Month-Year</th>
+                    <th>Credits</th>
+                    <th>Grade</th>
+                    <th>Grade Points</th>
+                    <th>Credits Obtained</th>
+                    <th>Result</th>
+                </tr>
+            <tbody>
+        """
+        for course in courses:
+            sem_table += f"""
+            <tr>
+                <td id = "course_name">{course['course_name']}</td>
+                <td>{course['month_year']}</td>
+                <td>{course['credits']}</td>
+                <td>{course['grade']}</td>
+                <td>{course['grade_points']}</td>
+                <td>{course['credits_obtained']}</td>
+                <td>{course['result']}</td>
+            </tr>
+            """
+        sem_table += "</tbody></table>"
+        semester_html += sem_table
+        semester_summary_rows += f"""
+            <tr>
+                <td>{sem_no} Semester</td>
+                <td>{total_subjects}</td>
+                <td>{failed_subjects}</td>
+                <td>{sgpa}</td>
+            </tr>
+        """
+
+    semester_summary_html = f"""
+    <br>
+    <table class="semester-summary-table" border="1">
+        <thead>
+            <tr class="semester-header">
+                <td colspan="4">Semester Wise Summary</td>
+            </tr>
+            <tr>
+                <th>Semester</th>
+                <th>Total Subjects</th>
+                <th>Failed Subjects</th>
+                <th>SGPA</th>
+            </tr>
+        </thead>
+        <tbody>
+            {semester_summary_rows}
+        </tbody>
+    </table>
+    """ if semester_summary_rows else ""
+
+    html_content = html_content.replace("{{REG_NO}}", student["registered_no"])
+    html_content = html_content.replace("{{STUDENT_NAME}}", student["name"])
+    html_content = html_content.replace("{{BRANCH}}", student["branch"])
+    html_content = html_content.replace("{{SEMESTER}}", f"{student['curr_semester']} Semester")
+    html_content = html_content.replace("{{ADDRESS}}", formatted_address)
+    html_content = html_content.replace("{{STUDENT_PHOTO}}", student_photo)
+    html_content = html_content.replace("{{HEADER_IMAGE}}", header_image)
+    html_content = html_content.replace("{{SEMESTER_RECORDS}}", semester_html)
+    html_content = html_content.replace("{{SEMESTER_SUMMARY}}", semester_summary_html)
+    html_content = html_content.replace("{{Dashboards}}", "")
+    return html_content
+
+
+def run(num_students, template_style):
+    students, records = make_dataset(num_students)
+    assets = get_asset_cache()
+    header_image = assets.header_image_html()
+    photos = {s["registered_no"]: assets.student_photo_html(s["registered_no"]) for s in students}
+
+    start = time.perf_counter()
+    old = [legacy_fill_template(s, records, template_style, header_image, photos[s["registered_no"]]) for s in students]
+    legacy_time = time.perf_counter() - start
+
+    # generate_html logs per student; keep that out of the timing
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        new = [generate_html(s, records, None, False, template_style) for s in students]
+        new_time = time.perf_counter() - start
+
+    return legacy_time / num_students, new_time / num_students, old == new
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--style", nargs="+", default=["classic", "modern", "minimal"])
+    args = parser.parse_args()
+
+    # Templates are resolved relative to the working directory
+    os.chdir(REPO_ROOT)
+
+    results = []
+    for style in args.style:
+        for n in args.students:
+            results.append((style, n) + run(n, style))
+
+    print(f"{'style':>8} {'students':>8} {'old ms/student':>15} {'new ms/student':>15} {'speedup':>8} {'same':>5}")
+    for style, n, old_time, new_time, identical in results:
+        speedup = old_time / new_time if new_time else float("inf")
+        print(f"{style:>8} {n:>8} {old_time * 1000:>15.3f} {new_time * 1000:>15.3f} {speedup:>7.1f}x {str(identical):>5}")
+
+    return 0 if all(r[-1] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark for JSON serialization and response compression of large API payloads.
+
+Builds the /api/students listing and a cumulative-performance response (with
+its visualData) for a synthetic student set, with the Decimal and date values
+mysql.connector returns. Each payload is serialized with Flask's stock provider
+(the previous behaviour) and with AppJSONProvider for every available encoder,
+then compressed with each available encoding, so the output shows
+serialization time and bytes on the wire before and after.
+
+Usage:
+    python -m benchmarks.json_payloads [--students 1000 10000 50000] [--repeat 5]
+"""
+
+import argparse
+import decimal
+import random
+import sys
+import time
+from datetime import date, datetime
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from utils.compression import ENCODINGS
+from utils.json_provider import AppJSONProvider, JSON_ENCODERS
+
+BRANCHES = [
+    "Artificial Intelligence & Machine Learning",
+    "Computer Science & Engineering",
+    "Electronics & Communication Engineering",
+    "Mechanical Engineering",
+]
+
+
+def make_students(num_students, seed=42):
+    """Student rows as /api/students returns them, plus DB-typed columns."""
+    rng = random.Random(seed)
+    return [{
+        "id": i + 1,
+        "name": f"STUDENT NAME {i}",
+        "registered_no": f"22A91A{i:05d}",
+        "branch": rng.choice(BRANCHES),
+        "curr_semester": rng.randint(1, 8),
+        "address": "PITHAPURAM",
+        "cgpa": decimal.Decimal(f"{rng.uniform(5, 10):.2f}"),
+        "date_of_birth": date(2004, rng.randint(1, 12), rng.randint(1, 28)),
+        "created_at": datetime(2024, 6, 1, 9, 30, rng.randint(0, 59)),
+    } for i in range(num_students)]
+
+
+def make_cumulative_performance(semesters=8, courses=8, seed=7):
+    """A cumulative-performance response for one student, including visualData."""
+    rng = random.Random(seed)
+    semester_data = []
+    for sem in range(1, semesters + 1):
+        subjects = [{
+            "course_code": f"R20{sem}{c:02d}",
+            "course_name": f"Course {sem}-{c}",
+            "credits": decimal.Decimal("3.0"),
+            "grade": rng.choice("ABCDEF"),
+            "grade_points": decimal.Decimal(rng.choice([0, 5, 6, 7, 8, 9, 10])),
+            "result": "PASS",
+            "month_year": "MAR-2025",
+        } for c in range(courses)]
+        semester_data.append({"semester": sem, "sgpa": round(rng.uniform(6, 10), 2), "subjects": subjects})
+    return {
+        "student": {"registration_number": "22A91A00001", "name": "STUDENT NAME 1", "branch": BRANCHES[0]},
+        "semesterData": semester_data,
+        "visualData": {
+            "labels": [f"Semester {s['semester']}" for s in semester_data],
+            "sgpa": [s["sgpa"] for s in semester_data],
+            "cgpa": [round(rng.uniform(6, 10), 2) for _ in semester_data],
+        },
+    }
+
+
+def time_dumps(provider, payload, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = provider.dumps(payload, separators=(",", ":")).encode()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return body, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    providers = [("flask-default", DefaultJSONProvider(app))]
+    providers += [(f"app-{name}", AppJSONProvider(app, encoder=name)) for name in JSON_ENCODERS]
+
+    payloads = [(f"students x{n}", {"data": make_students(n)}) for n in args.students]
+    payloads.append(("cumulative-performance", make_cumulative_performance()))
+
+    header = f"{'payload':>24} {'provider':>14} {'ms':>9} {'raw bytes':>11}"
+    header += "".join(f" {encoding + ' bytes':>11} {encoding + ' ms':>8}" for encoding in ENCODINGS)
+    print(header)
+    for label, payload in payloads:
+        for name, provider in providers:
+            body, seconds = time_dumps(provider, payload, args.repeat)
+            line = f"{label:>24} {name:>14} {seconds * 1000:>9.2f} {len(body):>11}"
+            for compress in ENCODINGS.values():
+                started = time.perf_counter()
+                compressed = compress(body)
+                line += f" {len(compressed):>11} {(time.perf_counter() - started) * 1000:>8.2f}"
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark for grouping grade rows per student in batch report builds.
+
+Compares the old representation (one dict per grade row in a flat list, scanned
+once per student by group_semester_records) with GradeRecord rows pre-grouped
+into a GradeIndex at fetch time. Reports the time to group every student's
+semesters, the time to build the rows from cursor tuples, and the memory the
+rows take. The grouped output is checked for equality.
+
+Usage:
+    python -m benchmarks.record_index [--students 100 500 2000]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+
+from benchmarks.semester_summaries import make_dataset
+from database.records import GRADE_RECORD_FIELDS, GradeIndex
+from reports.html_templates import group_semester_records
+
+
+def measure(build):
+    """Run build() and return (result, seconds, bytes allocated by what it returns)."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, size
+
+
+def group_all(students, records):
+    started = time.perf_counter()
+    groups = {student["registered_no"]: group_semester_records(student, records) for student in students}
+    return groups, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--students", type=int, nargs="+", default=[100, 500, 2000])
+    args = parser.parse_args()
+
+    print(f"{'students':>8} {'rows':>7} {'dict MB':>8} {'index MB':>9} "
+          f"{'dict build ms':>14} {'index build ms':>15} {'scan ms':>9} {'index ms':>9} {'same':>5}")
+    for n in args.students:
+        students, dict_records = make_dataset(n)
+        rows = [tuple(record[field] for field in GRADE_RECORD_FIELDS) for record in dict_records]
+        del dict_records
+
+        dicts, dict_build, dict_bytes = measure(lambda: [dict(zip(GRADE_RECORD_FIELDS, row)) for row in rows])
+        index, index_build, index_bytes = measure(lambda: GradeIndex.from_rows(rows))
+
+        old_groups, scan_time = group_all(students, dicts)
+        new_groups, index_time = group_all(students, index)
+        identical = all(
+            {sem: [dict(record) for record in records] for sem, records in new_groups[reg_no].items()} == groups
+            for reg_no, groups in old_groups.items()
+        )
+
+        print(f"{n:>8} {len(rows):>7} {dict_bytes / 2**20:>8.1f} {index_bytes / 2**20:>9.1f} "
+              f"{dict_build * 1000:>14.1f} {index_build * 1000:>15.1f} "
+              f"{scan_time * 1000:>9.1f} {index_time * 1000:>9.2f} {str(identical):>5}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Benchmark for semester summary generation in get_student_data.
+
+Compares the old per-student N+1 query loop (one DISTINCT query plus COUNT,
+COUNT FAIL and AVG per student-semester) with the single-pass summary built
+from the grade rows that are already fetched. The database is replaced by an
+in-memory fake that charges a fixed latency per round trip, so the numbers show
+how round trips and wall time scale with the number of students.
+
+Usage:
+    python -m benchmarks.semester_summaries [--latency-ms 0.5] [--students 50 200 1000]
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from database import mysql_data_handler, schema_cache
+
+COURSES_PER_SEMESTER = 8
+SEMESTERS = 6
+
+
+def make_dataset(num_students, seed=42):
+    """Create synthetic students and joined grade rows."""
+    rng = random.Random(seed)
+    students = []
+    records = []
+    for i in range(num_students):
+        reg_no = f"22A91A{i:04d}"
+        students.append({
+            "id": i + 1,
+            "name": f"STUDENT {i}",
+            "registered_no": reg_no,
+            "branch": "Artificial Intelligence & Machine Learning",
+            "curr_semester": SEMESTERS,
+        })
+        for sem in range(1, SEMESTERS + 1):
+            for c in range(COURSES_PER_SEMESTER):
+                grade_points = rng.choice([0, 5, 6, 7, 8, 9, 10])
+                records.append({
+                    "registered_no": reg_no,
+                    "semester_no": sem,
+                    "month_year": "MAR-2025",
+                    "course_name": f"Course {sem}-{c}",
+                    "grade": "F" if grade_points == 0 else "A",
+                    "credits": 3,
+                    "grade_points": float(grade_points),
+                    "credits_obtained": 0 if grade_points == 0 else 3,
+                    "result": "FAIL" if grade_points == 0 else "PASS",
+                })
+    return students, records
+
+
+class FakeCursor:
+    """Answers the handful of queries get_student_data issues, charging latency per execute."""
+
+    def __init__(self, db, dictionary=False):
+        self.db = db
+        self.dictionary = dictionary
+        self.result = []
+
+    def execute(self, sql, params=None):
+        self.db.round_trips += 1
+        time.sleep(self.db.latency)
+        students, records = self.db.students, self.db.records
+
+        if "information_schema" in sql:
+            # No optional columns: the student SELECT list uses its static fallbacks
+            self.result = []
+        elif "SHOW TABLES" in sql:
+            self.result = [("students",), ("grades",), ("courses",)]
+        elif "SELECT DISTINCT" in sql:
+            pairs = dict.fromkeys((r["registered_no"], r["semester_no"]) for r in records)
+            self.result = [{"registration_number": reg, "semester": sem} for reg, sem in pairs]
+        elif "COUNT(*) AS total" in sql or "AS failed" in sql or "AVG(g.grade_points)" in sql:
+            reg_no, sem_no = params
+            rows = self.db.index.get((reg_no, sem_no), [])
+            if "AS total" in sql:
+                self.result = [{"total": len(rows)}]
+            elif "AS failed" in sql:
+                self.result = [{"failed": sum(1 for r in rows if r["result"].upper() == "FAIL")}]
+            else:
+                avg = sum(r["grade_points"] for r in rows) / len(rows) if rows else None
+                self.result = [{"sgpa": avg}]
+        elif "FROM students" in sql:
+            self.result = list(students)
+        else:
+            self.result = list(records)
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, students, records, latency):
+        self.students = students
+        self.records = records
+        self.latency = latency
+        self.round_trips = 0
+        self.index = {}
+        for r in records:
+            self.index.setdefault((r["registered_no"], r["semester_no"]), []).append(r)
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self, dictionary)
+
+    def close(self):
+        pass
+
+
+def legacy_summaries(conn):
+    """The per-student-semester query loop get_student_data used before."""
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT DISTINCT g.registration_number, c.semester
+        FROM grades g JOIN courses c ON g.course_code = c.code
+    """)
+    summaries = []
+    for item in cursor.fetchall():
+        reg_no, sem_no = item["registration_number"], item["semester"]
+        cursor.execute("SELECT COUNT(*) AS total ...", (reg_no, sem_no))
+        total_subjects = cursor.fetchone()["total"]
+        cursor.execute("SELECT COUNT(*) AS failed ...", (reg_no, sem_no))
+        failed_subjects = cursor.fetchone()["failed"]
+        cursor.execute("SELECT AVG(g.grade_points) AS sgpa ...", (reg_no, sem_no))
+        sgpa_result = cursor.fetchone()
+        sgpa = round(sgpa_result["sgpa"], 2) if sgpa_result["sgpa"] else 0
+        summaries.append({
+            "registered_no": reg_no,
+            "semester_no": sem_no,
+            "total_no_of_subjects": total_subjects,
+            "no_of_failed_subjects": failed_subjects,
+            "sgpa": sgpa,
+        })
+    return summaries
+
+
+def run(num_students, latency):
+    students, records = make_dataset(num_students)
+
+    # Legacy: grade fetch plus the N+1 summary loop
+    conn = FakeConnection(students, records, latency)
+    start = time.perf_counter()
+    conn.cursor().execute("SELECT ... FROM students")
+    conn.cursor().execute("SELECT ... FROM grades")
+    old = legacy_summaries(conn)
+    legacy_time = time.perf_counter() - start
+    legacy_trips = conn.round_trips
+
+    # Current get_student_data against the same fake database; the schema is
+    # loaded beforehand, as the app does at startup
+    conn = FakeConnection(students, records, latency)
+    schema_cache.get_schema(conn, refresh=True)
+    conn.round_trips = 0
+    original = mysql_data_handler.get_connection
+    mysql_data_handler.get_connection = lambda: conn
+    try:
+        start = time.perf_counter()
+        _, _, new = mysql_data_handler.get_student_data()
+        new_time = time.perf_counter() - start
+    finally:
+        mysql_data_handler.get_connection = original
+    new_trips = conn.round_trips
+
+    key = lambda s: (s["registered_no"], s["semester_no"])
+    identical = sorted(old, key=key) == sorted(new, key=key)
+    return len(records), legacy_trips, legacy_time, new_trips, new_time, identical
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency-ms", type=float, default=0.5, help="Simulated round-trip latency per query")
+    parser.add_argument("--students", type=int, nargs="+", default=[10, 50, 200, 1000])
+    args = parser.parse_args()
+
+    results = []
+    for n in args.students:
+        results.append((n,) + run(n, args.latency_ms / 1000.0))
+
+    print(f"\nSimulated round-trip latency: {args.latency_ms} ms")
+    print(f"{'students':>8} {'grade rows':>10} {'old trips':>10} {'old ms':>10} {'new trips':>10} {'new ms':>10} {'same':>5}")
+    for n, rows, old_trips, old_time, new_trips, new_time, identical in results:
+        print(f"{n:>8} {rows:>10} {old_trips:>10} {old_time * 1000:>10.1f} {new_trips:>10} {new_time * 1000:>10.1f} {str(identical):>5}")
+
+    return 0 if all(r[-1] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -213,6 +213,29 @@ CREATE TABLE IF NOT EXISTS grades (
     
     return sql_statements
 
+def generate_data_version_sql(db_type='mysql'):
+    """Generate SQL that bumps the data_versions counters of the loaded tables.
+
+    The application validates cached responses and in-memory snapshots against
+    these counters, so loading the file makes it rebuild them. SQLite databases
+    are not served by the application and get no statements.
+    """
+    if db_type.lower() != 'mysql':
+        return []
+    
+    values = ", ".join(f"('{table}', 1, UTC_TIMESTAMP())" for table in ('students', 'courses', 'grades'))
+    return [
+        """
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+) ENGINE=InnoDB;
+        """.strip(),
+        f"INSERT INTO data_versions (name, version, updated_at) VALUES {values} "
+        f"ON DUPLICATE KEY UPDATE version = version + 1, updated_at = VALUES(updated_at);",
+    ]
+
 def main():
     import argparse
     
@@ -243,6 +266,7 @@ def main():
     student_sql = generate_student_sql(students, args.db_type)
     course_sql = generate_course_sql(courses, args.db_type)
     grade_sql = generate_grade_sql(grades, args.db_type)
+    version_sql = generate_data_version_sql(args.db_type)
     
     # Save SQL to file
     with open(args.output, 'w') as f:
@@ -261,6 +285,11 @@ def main():
         f.write("\n-- Insert Grade Data\n")
         for sql in grade_sql:
             f.write(sql + "\n")
+        
+        if version_sql:
+            f.write("\n-- Bump Data Versions\n")
+            for sql in version_sql:
+                f.write(sql + "\n")
     
     print(f"\nSQL statements have been saved to '{args.output}'")
     print(f"Processed {len(students)} students, {len(courses)} courses, and {len(grades)} grades.")
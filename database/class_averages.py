@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Class averages per (branch, semester, course_code, academic_year), computed from grades.
+
+The semester performance report compares a student's grade points with the
+class_averages table. Rows are derived here from the grades of all students of
+the branch: average_grade_points is the mean grade points of the course in that
+academic year and pass_percentage the share of grades that are not FAIL.
+academic_year comes from the exam's month_year: June to December belong to the
+year starting then (NOV-2024 -> 2024-25), January to May to the year before
+(MAR-2025 -> 2024-25).
+
+Grade writes through the API queue their course codes; after
+CLASS_AVERAGES_REFRESH_DELAY seconds (default 5) the queued courses are
+recomputed together, so a result upload sent as many requests costs one
+refresh that scans only those courses' grades. After grade imports made outside
+the application, recompute with:
+    python -m database.class_averages --rebuild
+    python -m database.class_averages --courses 201HS1T01 201BS1T01
+"""
+
+import os
+import sys
+import threading
+import time
+import traceback
+from database.mysql_data_handler import get_connection
+from database.grade_events import on_grades_changed
+from database.schema_cache import ensure_index
+
+# Seconds to collect grade changes before recomputing; 0 recomputes inside the write
+REFRESH_DELAY = float(os.getenv("CLASS_AVERAGES_REFRESH_DELAY", "5"))
+# Course codes per IN (...) list
+COURSE_CHUNK_SIZE = 500
+
+_TABLE = """
+    CREATE TABLE IF NOT EXISTS class_averages (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        branch VARCHAR(100) NOT NULL,
+        semester INT NOT NULL,
+        course_code VARCHAR(20) NOT NULL,
+        academic_year VARCHAR(10) NOT NULL,
+        average_grade_points FLOAT NOT NULL,
+        pass_percentage FLOAT NOT NULL,
+        FOREIGN KEY (course_code) REFERENCES courses(code)
+    )
+"""
+
+# Serves the per-request lookup of a branch's semester averages. Added separately
+# from the table, so class_averages tables created before it get it too.
+_LOOKUP_INDEX = ("idx_class_averages_lookup", ("branch", "semester", "academic_year"))
+
+_MONTHS = {name: number for number, name in enumerate(
+    ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"), start=1)}
+
+# Serializes recomputations in this process so two refreshes never interleave
+# their delete and insert of the same courses
+_refresh_lock = threading.Lock()
+_tables_ready = False
+
+_pending = set()
+_pending_lock = threading.Lock()
+_timer = None
+
+_stats = {"refreshes": 0, "rebuilds": 0, "last_refresh_at": None, "last_refresh_seconds": None, "last_error": None}
+
+
+def academic_year(month_year):
+    """Academic year ("2024-25") of an exam session like "NOV-2024", or None if it cannot be parsed."""
+    month, _, year = str(month_year or "").strip().upper().partition("-")
+    month = _MONTHS.get(month[:3])
+    if month is None or not year.isdigit():
+        return None
+    start = int(year) if month >= 6 else int(year) - 1
+    return f"{start}-{(start + 1) % 100:02d}"
+
+
+def _ensure_table(cursor):
+    global _tables_ready
+    if _tables_ready:
+        return
+    cursor.execute(_TABLE)
+    name, columns = _LOOKUP_INDEX
+    if ensure_index(cursor, "class_averages", name, columns):
+        print(f"✅ Added index '{name}' to class_averages table")
+    _tables_ready = True
+
+
+def _aggregate(cursor, course_codes=None):
+    """
+    Rows (branch, semester, course_code, academic_year, average_grade_points, pass_percentage).
+
+    Grades are grouped per exam session in SQL and folded into academic years here.
+    """
+    sql = """
+        SELECT
+            s.branch,
+            c.semester,
+            g.course_code,
+            g.month_year,
+            COUNT(*) AS graded,
+            SUM(g.grade_points) AS grade_points,
+            SUM(UPPER(g.result) = 'FAIL') AS failed
+        FROM grades g
+        JOIN courses c ON g.course_code = c.code
+        JOIN students s ON s.registration_number = g.registration_number
+    """
+    params = ()
+    if course_codes is not None:
+        sql += f" WHERE g.course_code IN ({', '.join(['%s'] * len(course_codes))})"
+        params = tuple(course_codes)
+    sql += " GROUP BY s.branch, c.semester, g.course_code, g.month_year"
+    cursor.execute(sql, params)
+
+    totals = {}
+    skipped = 0
+    for row in cursor.fetchall():
+        year = academic_year(row["month_year"])
+        if year is None:
+            skipped += int(row["graded"])
+            continue
+        entry = totals.setdefault((row["branch"], row["semester"], row["course_code"], year), [0, 0.0, 0])
+        entry[0] += int(row["graded"])
+        entry[1] += float(row["grade_points"] or 0)
+        entry[2] += int(row["failed"] or 0)
+    if skipped:
+        print(f"⚠️ Skipped {skipped} grades with an unrecognized month_year")
+
+    return [
+        (branch, semester, course_code, year, round(grade_points / graded, 2), round((graded - failed) * 100 / graded, 1))
+        for (branch, semester, course_code, year), (graded, grade_points, failed) in totals.items()
+    ]
+
+
+def _insert(cursor, rows):
+    cursor.executemany("""
+        INSERT INTO class_averages
+            (branch, semester, course_code, academic_year, average_grade_points, pass_percentage)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, rows)
+
+
+def _refreshed(started, rebuild):
+    """Record the refresh and drop what was derived from the old averages."""
+    _stats["rebuilds" if rebuild else "refreshes"] += 1
+    _stats["last_refresh_at"] = time.time()
+    _stats["last_refresh_seconds"] = round(time.perf_counter() - started, 3)
+    _stats["last_error"] = None
+
+    from database.data_versions import bump_data_version
+    from utils.response_cache import invalidate_responses
+    invalidate_responses("class_averages")
+    bump_data_version("class_averages")
+
+
+def rebuild_class_averages():
+    """Replace every class average with values computed from all grades."""
+    started = time.perf_counter()
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    with _refresh_lock:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            _ensure_table(cursor)
+            rows = _aggregate(cursor)
+            cursor.execute("DELETE FROM class_averages")
+            _insert(cursor, rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    print(f"✅ Rebuilt {len(rows)} class averages")
+    _refreshed(started, rebuild=True)
+    return len(rows)
+
+
+def refresh_class_averages(course_codes):
+    """
+    Recompute the class averages of some courses, in every branch and year.
+
+    Scans only those courses' grades; other rows are left as they are.
+    """
+    course_codes = sorted(set(course_codes))
+    if not course_codes:
+        return 0
+
+    started = time.perf_counter()
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    count = 0
+    with _refresh_lock:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            _ensure_table(cursor)
+            for start in range(0, len(course_codes), COURSE_CHUNK_SIZE):
+                chunk = course_codes[start:start + COURSE_CHUNK_SIZE]
+                rows = _aggregate(cursor, chunk)
+                cursor.execute(
+                    f"DELETE FROM class_averages WHERE course_code IN ({', '.join(['%s'] * len(chunk))})",
+                    tuple(chunk),
+                )
+                _insert(cursor, rows)
+                count += len(rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    _refreshed(started, rebuild=False)
+    return count
+
+
+def _run_pending():
+    global _timer
+    with _pending_lock:
+        course_codes = sorted(_pending)
+        _pending.clear()
+        _timer = None
+    try:
+        refresh_class_averages(course_codes)
+    except Exception as e:
+        _stats["last_error"] = str(e)
+        print(f"❌ Class average refresh failed for {len(course_codes)} courses: {e}")
+        traceback.print_exc()
+
+
+def schedule_class_average_refresh(course_codes):
+    """Queue courses for recomputation after REFRESH_DELAY, batching writes that arrive meanwhile."""
+    global _timer
+    if REFRESH_DELAY <= 0:
+        refresh_class_averages(course_codes)
+        return
+    with _pending_lock:
+        _pending.update(course_codes)
+        if _timer is None and _pending:
+            _timer = threading.Timer(REFRESH_DELAY, _run_pending)
+            _timer.daemon = True
+            _timer.start()
+
+
+def get_class_averages_stats():
+    with _pending_lock:
+        pending = len(_pending)
+    return {**_stats, "pending_courses": pending, "refresh_delay": REFRESH_DELAY}
+
+
+@on_grades_changed
+def _refresh_on_grade_change(reg_nos, course_codes):
+    schedule_class_average_refresh(course_codes)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--rebuild"]:
+        rebuild_class_averages()
+        sys.exit(0)
+    if args[:1] == ["--courses"] and len(args) > 1:
+        print(f"✅ Recomputed {refresh_class_averages(args[1:])} class averages")
+        sys.exit(0)
+    print(__doc__)
+    sys.exit(1)
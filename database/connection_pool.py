@@ -0,0 +1,198 @@
+import os
+import threading
+import time
+import mysql.connector
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be checked out before the timeout expired."""
+
+
+class PooledConnection:
+    """Wrapper around a MySQL connection that returns it to its pool on close()."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get("_conn")
+        if conn is None:
+            raise AttributeError(f"Connection already returned to the pool ({name})")
+        return getattr(conn, name)
+
+    def close(self):
+        """Return the underlying connection to the pool instead of closing it."""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __del__(self):
+        # Safety net for code paths that return early without closing.
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of MySQL connections.
+
+    Connections are opened lazily up to ``size``. Idle connections that have not
+    been used for ``health_check_interval`` seconds are pinged before being handed
+    out and replaced if they are dead. Callers that find the pool exhausted wait up
+    to ``timeout`` seconds for a connection to be returned.
+    """
+
+    def __init__(self, connect_kwargs, size=10, timeout=10.0, health_check_interval=30.0):
+        self.connect_kwargs = dict(connect_kwargs)
+        self.size = max(1, int(size))
+        self.timeout = float(timeout)
+        self.health_check_interval = float(health_check_interval)
+
+        self._lock = threading.Condition()
+        self._idle = []  # list of (connection, last_used_timestamp)
+        self._created = 0
+        self._in_use = 0
+        self._pid = os.getpid()
+
+        # Metrics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait_time = 0.0
+        self._timeouts = 0
+        self._health_check_failures = 0
+
+    def _reset_after_fork(self):
+        """Drop connections inherited from a parent process; sockets cannot be shared."""
+        if self._pid != os.getpid():
+            self._lock = threading.Condition()
+            self._idle = []
+            self._created = 0
+            self._in_use = 0
+            self._pid = os.getpid()
+
+    def _open(self):
+        return mysql.connector.connect(**self.connect_kwargs)
+
+    def _is_healthy(self, conn, last_used):
+        if time.monotonic() - last_used < self.health_check_interval:
+            return True
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def acquire(self, timeout=None):
+        """Check out a connection, waiting up to ``timeout`` seconds if the pool is exhausted."""
+        self._reset_after_fork()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        wait_started = time.monotonic()
+
+        with self._lock:
+            while not self._idle and self._created >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Timed out after {timeout:.1f}s waiting for a database connection "
+                        f"(pool size {self.size})"
+                    )
+                waited = True
+                self._lock.wait(remaining)
+
+            if waited:
+                wait_time = time.monotonic() - wait_started
+                self._waits += 1
+                self._wait_time += wait_time
+                self._max_wait_time = max(self._max_wait_time, wait_time)
+
+            if self._idle:
+                conn, last_used = self._idle.pop()
+            else:
+                conn, last_used = None, None
+                self._created += 1
+            self._in_use += 1
+            self._checkouts += 1
+
+        # Open or health-check outside the lock so slow handshakes don't block other threads
+        try:
+            if conn is not None and not self._is_healthy(conn, last_used):
+                with self._lock:
+                    self._health_check_failures += 1
+                self._discard(conn)
+                conn = None
+            if conn is None:
+                conn = self._open()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+        return PooledConnection(self, conn)
+
+    def release(self, conn):
+        """Return a connection to the pool, rolling back any open transaction."""
+        if self._pid != os.getpid():
+            return
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except Exception:
+            healthy = False
+
+        with self._lock:
+            self._in_use -= 1
+            if healthy:
+                self._idle.append((conn, time.monotonic()))
+            else:
+                self._created -= 1
+            self._lock.notify()
+
+        if not healthy:
+            self._discard(conn)
+
+    def close_all(self):
+        """Close every idle connection. Checked-out connections are closed when returned."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+        for conn, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Return a snapshot of pool usage metrics."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "open": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "total_wait_time": round(self._wait_time, 4),
+                "avg_wait_time": round(self._wait_time / self._waits, 4) if self._waits else 0,
+                "max_wait_time": round(self._max_wait_time, 4),
+                "timeouts": self._timeouts,
+                "health_check_failures": self._health_check_failures,
+            }
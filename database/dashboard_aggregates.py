@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Materialized aggregates behind the /api/dashboard/* endpoints.
+
+Instead of loading every student and grade row per request, the dashboard reads
+two small tables:
+
+    dashboard_branch_aggregates    one row per branch: student count, number of
+                                   graded students, CGPA sum and at-risk count
+    dashboard_semester_aggregates  one row per semester: number of student
+                                   summaries, SGPA sum, subject and failure counts
+
+They are derived from two per-student state tables (one row per student and one
+per student-semester) so that a grade write only recomputes the affected
+students and applies the difference to the aggregates. SGPA and CGPA follow
+get_student_data: SGPA is the rounded mean grade points of a semester and CGPA
+the mean of a student's SGPAs.
+
+The data_versions of students, grades and courses the aggregates reflect are
+stored with them. When a read finds that one of those tables was bumped by
+something other than this process's grade writes (a CSV import, a setup script,
+another worker), it rebuilds them first. To rebuild by hand:
+    python -m database.dashboard_aggregates --rebuild
+"""
+
+import sys
+import threading
+from database.mysql_data_handler import get_connection, REG_NO_CHUNK_SIZE
+from database.data_versions import get_data_versions, changed_externally
+from database.grade_events import on_grades_changed
+
+AT_RISK_CGPA = 5.0
+# Tables the aggregates are derived from
+SOURCE_TABLES = ("students", "grades", "courses")
+
+_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_semester_state (
+        registration_number VARCHAR(20) NOT NULL,
+        semester INT NOT NULL,
+        sgpa DOUBLE NOT NULL,
+        total_subjects INT NOT NULL,
+        failed_subjects INT NOT NULL,
+        PRIMARY KEY (registration_number, semester)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_student_state (
+        registration_number VARCHAR(20) NOT NULL PRIMARY KEY,
+        branch VARCHAR(100) NOT NULL,
+        semester_count INT NOT NULL,
+        sgpa_sum DOUBLE NOT NULL,
+        at_risk TINYINT NOT NULL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_branch_aggregates (
+        branch VARCHAR(100) NOT NULL PRIMARY KEY,
+        first_student_id INT NOT NULL,
+        student_count INT NOT NULL DEFAULT 0,
+        graded_students INT NOT NULL DEFAULT 0,
+        cgpa_sum DOUBLE NOT NULL DEFAULT 0,
+        at_risk_count INT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_semester_aggregates (
+        semester INT NOT NULL PRIMARY KEY,
+        summary_count INT NOT NULL DEFAULT 0,
+        sgpa_sum DOUBLE NOT NULL DEFAULT 0,
+        total_subjects INT NOT NULL DEFAULT 0,
+        failed_subjects INT NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS dashboard_aggregate_versions (
+        name VARCHAR(64) NOT NULL PRIMARY KEY,
+        version BIGINT NOT NULL
+    )
+    """,
+]
+
+# Serializes incremental refreshes in this process so two writers never apply
+# deltas computed from the same old state
+_refresh_lock = threading.Lock()
+_tables_ready = False
+
+
+def _ensure_tables(cursor):
+    global _tables_ready
+    if _tables_ready:
+        return
+    for statement in _TABLES:
+        cursor.execute(statement)
+    _tables_ready = True
+
+
+def _semester_summaries(cursor, reg_nos=None):
+    """Per student-semester subject counts and SGPA, optionally limited to some students."""
+    sql = """
+        SELECT
+            g.registration_number,
+            c.semester,
+            COUNT(*) AS total_subjects,
+            SUM(UPPER(g.result) = 'FAIL') AS failed_subjects,
+            AVG(g.grade_points) AS avg_grade_points
+        FROM grades g
+        JOIN courses c ON g.course_code = c.code
+    """
+    params = ()
+    if reg_nos is not None:
+        sql += f" WHERE g.registration_number IN ({', '.join(['%s'] * len(reg_nos))})"
+        params = tuple(reg_nos)
+    sql += " GROUP BY g.registration_number, c.semester"
+    cursor.execute(sql, params)
+
+    summaries = {}
+    for row in cursor.fetchall():
+        avg = float(row["avg_grade_points"] or 0)
+        summaries[(row["registration_number"], row["semester"])] = (
+            round(avg, 2) if avg else 0,
+            int(row["total_subjects"]),
+            int(row["failed_subjects"] or 0),
+        )
+    return summaries
+
+
+def _student_state(branch, sgpas):
+    """(branch, semester_count, sgpa_sum, at_risk) for a student's list of SGPAs."""
+    count = len(sgpas)
+    sgpa_sum = sum(sgpas)
+    at_risk = 1 if count and sgpa_sum / count < AT_RISK_CGPA else 0
+    return branch, count, sgpa_sum, at_risk
+
+
+def _store_versions(cursor, versions):
+    cursor.executemany(
+        """INSERT INTO dashboard_aggregate_versions (name, version) VALUES (%s, %s)
+           ON DUPLICATE KEY UPDATE version = VALUES(version)""",
+        [(name, version) for name, (version, _) in versions.items()],
+    )
+
+
+def rebuild_dashboard_aggregates():
+    """Recompute every dashboard table from students and grades."""
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    with _refresh_lock:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            _ensure_tables(cursor)
+            # Read before the source rows: a bump in between makes the next read rebuild again
+            versions = get_data_versions(SOURCE_TABLES)
+
+            cursor.execute("SELECT id, registration_number, branch FROM students")
+            students = cursor.fetchall()
+            summaries = _semester_summaries(cursor)
+
+            sgpas = {}
+            semesters = {}
+            for (reg_no, sem_no), (sgpa, total, failed) in summaries.items():
+                sgpas.setdefault(reg_no, []).append(sgpa)
+                entry = semesters.setdefault(sem_no, [0, 0.0, 0, 0])
+                entry[0] += 1
+                entry[1] += sgpa
+                entry[2] += total
+                entry[3] += failed
+
+            branches = {}
+            student_rows = []
+            for student in students:
+                branch, count, sgpa_sum, at_risk = _student_state(student["branch"], sgpas.get(student["registration_number"], []))
+                student_rows.append((student["registration_number"], branch, count, sgpa_sum, at_risk))
+                entry = branches.setdefault(branch, [student["id"], 0, 0, 0.0, 0])
+                entry[0] = min(entry[0], student["id"])
+                entry[1] += 1
+                if count:
+                    entry[2] += 1
+                    entry[3] += sgpa_sum / count
+                    entry[4] += at_risk
+
+            for table in ("dashboard_semester_state", "dashboard_student_state",
+                          "dashboard_branch_aggregates", "dashboard_semester_aggregates"):
+                cursor.execute(f"DELETE FROM {table}")
+
+            cursor.executemany(
+                "INSERT INTO dashboard_semester_state VALUES (%s, %s, %s, %s, %s)",
+                [(reg_no, sem_no, sgpa, total, failed) for (reg_no, sem_no), (sgpa, total, failed) in summaries.items()],
+            )
+            cursor.executemany("INSERT INTO dashboard_student_state VALUES (%s, %s, %s, %s, %s)", student_rows)
+            cursor.executemany(
+                "INSERT INTO dashboard_branch_aggregates VALUES (%s, %s, %s, %s, %s, %s)",
+                [(branch, *values) for branch, values in branches.items()],
+            )
+            cursor.executemany(
+                "INSERT INTO dashboard_semester_aggregates VALUES (%s, %s, %s, %s, %s)",
+                [(sem_no, *values) for sem_no, values in semesters.items()],
+            )
+            _store_versions(cursor, versions)
+            conn.commit()
+            print(f"✅ Rebuilt dashboard aggregates for {len(students)} students")
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+
+def refresh_students(reg_nos):
+    """
+    Recompute the dashboard state of the given students and apply the change to the aggregates.
+
+    Costs a grouped query over those students' grades plus a handful of small
+    writes, independent of the total number of students.
+    """
+    reg_nos = sorted(set(reg_nos))
+    if not reg_nos:
+        return
+
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    with _refresh_lock:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            _ensure_tables(cursor)
+
+            for start in range(0, len(reg_nos), REG_NO_CHUNK_SIZE):
+                chunk = reg_nos[start:start + REG_NO_CHUNK_SIZE]
+                placeholders = ", ".join(["%s"] * len(chunk))
+
+                cursor.execute(
+                    f"SELECT id, registration_number, branch FROM students WHERE registration_number IN ({placeholders})",
+                    tuple(chunk),
+                )
+                students = {row["registration_number"]: row for row in cursor.fetchall()}
+
+                cursor.execute(
+                    f"""SELECT registration_number, semester, sgpa, total_subjects, failed_subjects
+                        FROM dashboard_semester_state WHERE registration_number IN ({placeholders}) FOR UPDATE""",
+                    tuple(chunk),
+                )
+                old_semesters = {
+                    (row["registration_number"], row["semester"]): (row["sgpa"], row["total_subjects"], row["failed_subjects"])
+                    for row in cursor.fetchall()
+                }
+                cursor.execute(
+                    f"""SELECT registration_number, branch, semester_count, sgpa_sum, at_risk
+                        FROM dashboard_student_state WHERE registration_number IN ({placeholders}) FOR UPDATE""",
+                    tuple(chunk),
+                )
+                old_students = {row["registration_number"]: row for row in cursor.fetchall()}
+
+                new_semesters = _semester_summaries(cursor, chunk)
+                new_sgpas = {}
+                for (reg_no, _), values in new_semesters.items():
+                    new_sgpas.setdefault(reg_no, []).append(values[0])
+
+                # Semester deltas: (summary_count, sgpa_sum, total_subjects, failed_subjects)
+                semester_deltas = {}
+                for key in set(old_semesters) | set(new_semesters):
+                    old = old_semesters.get(key)
+                    new = new_semesters.get(key)
+                    delta = semester_deltas.setdefault(key[1], [0, 0.0, 0, 0])
+                    for sign, values in ((-1, old), (1, new)):
+                        if values is not None:
+                            delta[0] += sign
+                            delta[1] += sign * values[0]
+                            delta[2] += sign * values[1]
+                            delta[3] += sign * values[2]
+
+                # Branch deltas: (student_count, graded_students, cgpa_sum, at_risk_count)
+                branch_deltas = {}
+                first_ids = {}
+                student_rows = []
+                for reg_no in chunk:
+                    old = old_students.get(reg_no)
+                    student = students.get(reg_no)
+                    if old is not None:
+                        delta = branch_deltas.setdefault(old["branch"], [0, 0, 0.0, 0])
+                        delta[0] -= 1
+                        if old["semester_count"]:
+                            delta[1] -= 1
+                            delta[2] -= old["sgpa_sum"] / old["semester_count"]
+                            delta[3] -= old["at_risk"]
+                    if student is None:
+                        continue
+
+                    branch, count, sgpa_sum, at_risk = _student_state(student["branch"], new_sgpas.get(reg_no, []))
+                    student_rows.append((reg_no, branch, count, sgpa_sum, at_risk))
+                    first_ids[branch] = min(first_ids.get(branch, student["id"]), student["id"])
+                    delta = branch_deltas.setdefault(branch, [0, 0, 0.0, 0])
+                    delta[0] += 1
+                    if count:
+                        delta[1] += 1
+                        delta[2] += sgpa_sum / count
+                        delta[3] += at_risk
+
+                cursor.execute(f"DELETE FROM dashboard_semester_state WHERE registration_number IN ({placeholders})", tuple(chunk))
+                cursor.execute(f"DELETE FROM dashboard_student_state WHERE registration_number IN ({placeholders})", tuple(chunk))
+                cursor.executemany(
+                    "INSERT INTO dashboard_semester_state VALUES (%s, %s, %s, %s, %s)",
+                    [(reg_no, sem_no, sgpa, total, failed) for (reg_no, sem_no), (sgpa, total, failed) in new_semesters.items()],
+                )
+                cursor.executemany("INSERT INTO dashboard_student_state VALUES (%s, %s, %s, %s, %s)", student_rows)
+
+                cursor.executemany(
+                    """INSERT INTO dashboard_semester_aggregates VALUES (%s, %s, %s, %s, %s)
+                       ON DUPLICATE KEY UPDATE
+                           summary_count = summary_count + VALUES(summary_count),
+                           sgpa_sum = sgpa_sum + VALUES(sgpa_sum),
+                           total_subjects = total_subjects + VALUES(total_subjects),
+                           failed_subjects = failed_subjects + VALUES(failed_subjects)""",
+                    [(sem_no, *delta) for sem_no, delta in semester_deltas.items()],
+                )
+                cursor.executemany(
+                    """INSERT INTO dashboard_branch_aggregates VALUES (%s, %s, %s, %s, %s, %s)
+                       ON DUPLICATE KEY UPDATE
+                           first_student_id = LEAST(first_student_id, VALUES(first_student_id)),
+                           student_count = student_count + VALUES(student_count),
+                           graded_students = graded_students + VALUES(graded_students),
+                           cgpa_sum = cgpa_sum + VALUES(cgpa_sum),
+                           at_risk_count = at_risk_count + VALUES(at_risk_count)""",
+                    [(branch, first_ids.get(branch, 2 ** 31 - 1), *delta) for branch, delta in branch_deltas.items()],
+                )
+                cursor.execute("DELETE FROM dashboard_semester_aggregates WHERE summary_count <= 0")
+                cursor.execute("DELETE FROM dashboard_branch_aggregates WHERE student_count <= 0")
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+
+def _read_aggregates():
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        _ensure_tables(cursor)
+        cursor.execute("""
+            SELECT branch, student_count, graded_students, cgpa_sum, at_risk_count
+            FROM dashboard_branch_aggregates
+            ORDER BY first_student_id
+        """)
+        branches = cursor.fetchall()
+        cursor.execute("""
+            SELECT semester, summary_count, sgpa_sum, total_subjects, failed_subjects
+            FROM dashboard_semester_aggregates
+            ORDER BY semester
+        """)
+        semesters = cursor.fetchall()
+        cursor.execute("SELECT name, version FROM dashboard_aggregate_versions")
+        built_from = {row["name"]: int(row["version"]) for row in cursor.fetchall()}
+        cursor.close()
+    finally:
+        conn.close()
+    return {"branches": branches, "semesters": semesters}, built_from
+
+
+def _record_versions(versions):
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        cursor = conn.cursor()
+        _store_versions(cursor, versions)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+
+def get_dashboard_aggregates():
+    """
+    Read the branch and semester aggregate rows, (re)building them when needed.
+
+    They are built on first use and rebuilt when a source table changed outside
+    this process's grade writes; changes made by those writes were already applied
+    incrementally, so only the stored versions move forward.
+
+    Returns:
+        dict: {"branches": [...], "semesters": [...]}, branches in order of their
+        first student (as the students table lists them) and semesters ascending.
+    """
+    versions = get_data_versions(SOURCE_TABLES)
+    aggregates, built_from = _read_aggregates()
+    if not aggregates["branches"] or changed_externally(built_from, versions):
+        # Never built (or no students yet), or the source tables were reloaded
+        rebuild_dashboard_aggregates()
+        aggregates, _ = _read_aggregates()
+    elif any(built_from.get(name, 0) != version for name, (version, _) in versions.items()):
+        _record_versions(versions)
+    return aggregates
+
+
+@on_grades_changed
+def _refresh_on_grade_change(reg_nos, course_codes):
+    refresh_students(reg_nos)
+
+
+if __name__ == "__main__":
+    if "--rebuild" in sys.argv[1:]:
+        rebuild_dashboard_aggregates()
+        sys.exit(0)
+    print(__doc__)
+    sys.exit(1)
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Per-table change counters used to validate cached API responses.
+
+The data_versions table holds one row per source table (grades, students, ...)
+with a counter and the time of the last change. Responses derived from those
+tables are tagged with their versions, so a client holding an unchanged copy
+can be answered without recomputing anything.
+
+Grade writes through the API bump "grades" automatically, the setup scripts
+bump the tables they change, and the SQL files written by the CSV converters end
+with the same bump, so loading them is enough. Structures kept in memory ask
+changed_externally() whether a bump came from somewhere other than this process,
+i.e. from changes their incremental refresh never saw. By hand:
+    python -m database.data_versions --bump grades students
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from database.mysql_data_handler import get_connection
+
+_TABLE = """
+    CREATE TABLE IF NOT EXISTS data_versions (
+        name VARCHAR(64) NOT NULL PRIMARY KEY,
+        version BIGINT NOT NULL DEFAULT 0,
+        updated_at DATETIME NOT NULL
+    )
+"""
+
+# How long a read of the counters is reused. Bumps made by this process are seen
+# at once; bumps from other processes within this many seconds.
+VERSIONS_TTL = float(os.getenv("DATA_VERSIONS_TTL", "1"))
+
+# Versions produced by bumps in this process, per table; older ones are
+# forgotten past this many, which at worst makes a caller rebuild
+LOCAL_VERSIONS_KEPT = 1000
+
+_lock = threading.Lock()
+_tables_ready = False
+_snapshot = None
+_snapshot_at = 0.0
+# Incremented by every bump here, so a read that overlapped one is not kept
+_generation = 0
+_local_versions = {}
+
+
+def _ensure_table(cursor):
+    global _tables_ready
+    if _tables_ready:
+        return
+    cursor.execute(_TABLE)
+    _tables_ready = True
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+def bump_data_version(*names):
+    """Record a change to each named table and return their new versions."""
+    global _snapshot, _generation
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        cursor = conn.cursor()
+        _ensure_table(cursor)
+        now = _utcnow()
+        cursor.executemany("""
+            INSERT INTO data_versions (name, version, updated_at) VALUES (%s, 1, %s)
+            ON DUPLICATE KEY UPDATE version = version + 1, updated_at = VALUES(updated_at)
+        """, [(name, now) for name in names])
+        # Read inside the transaction, so these are exactly the versions this bump made
+        cursor.execute(
+            f"SELECT name, version FROM data_versions WHERE name IN ({', '.join(['%s'] * len(names))})",
+            tuple(names),
+        )
+        versions = {name: int(version) for name, version in cursor.fetchall()}
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+
+    with _lock:
+        _snapshot = None
+        _generation += 1
+        for name, version in versions.items():
+            produced = _local_versions.setdefault(name, set())
+            produced.add(version)
+            if len(produced) > LOCAL_VERSIONS_KEPT:
+                produced.discard(min(produced))
+    return versions
+
+
+def _read_versions():
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        cursor = conn.cursor(dictionary=True)
+        _ensure_table(cursor)
+        cursor.execute("SELECT name, version, updated_at FROM data_versions")
+        rows = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return {row["name"]: (int(row["version"]), row["updated_at"]) for row in rows}
+
+
+def get_data_versions(names):
+    """
+    Current (version, updated_at) of each named table.
+
+    Tables that have never been bumped report (0, None).
+    """
+    global _snapshot, _snapshot_at
+    with _lock:
+        snapshot = _snapshot if time.monotonic() - _snapshot_at < VERSIONS_TTL else None
+        generation = _generation
+    if snapshot is None:
+        snapshot = _read_versions()
+        with _lock:
+            # A bump since the read started may not be in it; use it, but don't keep it
+            if _generation == generation:
+                _snapshot, _snapshot_at = snapshot, time.monotonic()
+    return {name: snapshot.get(name, (0, None)) for name in names}
+
+
+def changed_externally(seen, current):
+    """
+    Whether any table moved from its version in seen by a bump this process did not make.
+
+    seen maps names to version numbers (missing means 0), current is a result of
+    get_data_versions. Bumps made here follow writes whose listeners already
+    updated this process's derived data; any other bump (an import, a setup
+    script, another worker) means that data has to be rebuilt. A seen of None
+    always counts as changed.
+    """
+    if seen is None:
+        return True
+    with _lock:
+        for name, (version, _) in current.items():
+            if version < seen.get(name, 0):
+                # The counters were reset, e.g. the table was recreated
+                return True
+            produced = _local_versions.get(name, ())
+            if any(number not in produced for number in range(seen.get(name, 0) + 1, version + 1)):
+                return True
+    return False
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if args[:1] == ["--bump"] and len(args) > 1:
+        bump_data_version(*args[1:])
+        for name, (version, updated_at) in get_data_versions(args[1:]).items():
+            print(f"{name}: version {version} at {updated_at}")
+        sys.exit(0)
+    print(__doc__)
+    sys.exit(1)
@@ -1,6 +1,8 @@
 import mysql.connector
 import os
 from dotenv import load_dotenv
+from database.mysql_data_handler import get_connection as get_pooled_connection
+from database.records import GradeIndex
 
 # Load environment variables from .env file
 load_dotenv()
@@ -8,14 +10,9 @@ load_dotenv()
 # Get database name from environment variables, with fallback
 db_name = os.getenv("DATABASE") or os.getenv("database", "reporting_system")
 
-# Helper to get DB connection using env vars
+# Helper to get DB connection from the shared pool
 def get_connection():
-    return mysql.connector.connect(
-        host=os.getenv("host"),
-        user=os.getenv("user"),
-        password=os.getenv("password"),
-        database=db_name
-    )
+    return get_pooled_connection()
 
 def check_database():
     """Check if the database exists, if not, run setup_db.py."""
@@ -70,7 +67,7 @@ def fetch_student_data():
     return students, records, summaries
 
 def fetch_students_by_reg_nos(reg_nos):
-    """Fetch student details and semester records for multiple students."""
+    """Fetch student details, a GradeIndex of their semester records and summaries for multiple students."""
     if not reg_nos:
         return [], []
 
@@ -88,13 +85,16 @@ def fetch_students_by_reg_nos(reg_nos):
     """, tuple(reg_nos))
     students = cursor.fetchall()
 
-    cursor.execute(f"""
+    # Grade rows come back as tuples and go straight into the per-student index
+    grade_cursor = conn.cursor()
+    grade_cursor.execute(f"""
         SELECT registered_no, semester_no, month_year, course_name, 
                grade, credits, grade_points, credits_obtained, result
         FROM SemesterRecords
         WHERE registered_no IN ({format_strings});
     """, tuple(reg_nos))
-    records = cursor.fetchall()
+    records = GradeIndex.from_rows(grade_cursor.fetchall())
+    grade_cursor.close()
 
     cursor.execute(f"""
         SELECT registered_no, semester_no, total_no_of_subjects, 
@@ -178,13 +178,15 @@ def fetch_filtered_student_data(selected_students=None, choose_semester=None, br
     registered_nos = [student['registered_no'] for student in students]
     
     placeholders = ', '.join(['%s'] * len(registered_nos))
-    cursor.execute(f"""
+    grade_cursor = conn.cursor()
+    grade_cursor.execute(f"""
         SELECT registered_no, semester_no, month_year, course_name, 
                grade, credits, grade_points, credits_obtained, result
         FROM SemesterRecords
         WHERE registered_no IN ({placeholders});
     """, registered_nos)
-    records = cursor.fetchall()
+    records = GradeIndex.from_rows(grade_cursor.fetchall())
+    grade_cursor.close()
 
     cursor.close()
     conn.close()
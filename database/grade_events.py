@@ -0,0 +1,38 @@
+import threading
+import traceback
+
+# Callbacks invoked after grade rows are committed. Each receives the affected
+# registration numbers and course codes.
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+def on_grades_changed(listener):
+    """Register a callback for grade changes. Usable as a decorator."""
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+    return listener
+
+
+def notify_grades_changed(reg_nos, course_codes=None):
+    """
+    Tell every registered listener that grades changed for the given students.
+
+    Called after the write is committed. A failing listener is logged and does not
+    stop the others, so one stale cache never blocks the rest from updating.
+    """
+    reg_nos = sorted(set(reg_nos))
+    course_codes = sorted(set(course_codes or []))
+    if not reg_nos:
+        return
+
+    with _listeners_lock:
+        listeners = list(_listeners)
+
+    for listener in listeners:
+        try:
+            listener(reg_nos, course_codes)
+        except Exception as e:
+            print(f"❌ Grade change listener {getattr(listener, '__name__', listener)} failed: {e}")
+            traceback.print_exc()
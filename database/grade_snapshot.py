@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+In-process columnar snapshot of grades joined to courses, for analytics.
+
+Instead of materializing one dict per grade row, the snapshot keeps a single
+pandas DataFrame with one column per field:
+
+    reg_no            categorical (registration numbers stored once, int32 codes)
+    course_code       categorical
+    semester          int16
+    credits           float32
+    grade_points      float64 (SGPA means must round exactly as in SQL/Python)
+    credits_obtained  float32
+    failed            bool (result is FAIL)
+
+It is built with one query on first use. Grade writes made through the API only
+mark the affected students; their rows are re-read in one query and swapped in
+before the next reduction, so bursts of writes cost one refresh. SGPA, CGPA,
+failure counts and pass rates are computed with vectorized group-bys and follow
+build_semester_summaries: SGPA is the mean grade points of a semester rounded to
+2 places, and CGPA the mean of a student's SGPAs.
+
+Each read also compares the grades and courses data_versions with those the
+snapshot was built from: a bump that did not come from this process's grade
+writes (an import, a setup script, another worker) rebuilds it, so writes made
+outside the application are seen within DATA_VERSIONS_TTL. Setting
+GRADE_SNAPSHOT_MAX_AGE (seconds) additionally rebuilds it periodically. Print a
+summary with:
+    python -m database.grade_snapshot
+"""
+
+import os
+import sys
+import threading
+import time
+import numpy as np
+import pandas as pd
+from database.mysql_data_handler import get_connection, REG_NO_CHUNK_SIZE
+from database.data_versions import get_data_versions, changed_externally
+from database.grade_events import on_grades_changed
+
+MAX_AGE = float(os.getenv("GRADE_SNAPSHOT_MAX_AGE", "0"))
+# Tables the snapshot is read from
+SOURCE_TABLES = ("grades", "courses")
+FETCH_SIZE = 50000
+
+_SELECT = """
+    SELECT
+        g.registration_number,
+        g.course_code,
+        c.semester,
+        c.credits,
+        g.grade_points,
+        g.credits_obtained,
+        UPPER(g.result) = 'FAIL'
+    FROM grades g
+    JOIN courses c ON g.course_code = c.code
+"""
+
+
+def _to_frame(rows):
+    """Build typed columns from row tuples without creating per-row dicts."""
+    if rows:
+        reg_nos, course_codes, semesters, credits, grade_points, credits_obtained, failed = zip(*rows)
+    else:
+        reg_nos = course_codes = semesters = credits = grade_points = credits_obtained = failed = ()
+    return pd.DataFrame({
+        "reg_no": pd.Categorical(reg_nos),
+        "course_code": pd.Categorical(course_codes),
+        "semester": np.array(semesters, dtype=np.int16),
+        "credits": np.array([value or 0 for value in credits], dtype=np.float32),
+        "grade_points": np.array([value or 0 for value in grade_points], dtype=np.float64),
+        "credits_obtained": np.array([value or 0 for value in credits_obtained], dtype=np.float32),
+        "failed": np.array(failed, dtype=bool),
+    })
+
+
+def _fetch(cursor, reg_nos=None):
+    """Read grade rows, optionally for some students, fetchmany-sized frames at a time."""
+    frames = []
+    if reg_nos is None:
+        cursor.execute(_SELECT)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            frames.append(_to_frame(rows))
+    else:
+        for offset in range(0, len(reg_nos), REG_NO_CHUNK_SIZE):
+            chunk = reg_nos[offset:offset + REG_NO_CHUNK_SIZE]
+            cursor.execute(_SELECT + f" WHERE g.registration_number IN ({', '.join(['%s'] * len(chunk))})", chunk)
+            frames.append(_to_frame(cursor.fetchall()))
+    return _concat(frames)
+
+
+def _concat(frames):
+    """Concatenate frames, unioning their categories so the columns stay categorical."""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return _to_frame([])
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    for column in ("reg_no", "course_code"):
+        categories = pd.api.types.union_categoricals([frame[column] for frame in frames]).categories
+        frames = [frame.assign(**{column: frame[column].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+class GradeSnapshot:
+    """Columnar grades with incremental per-student refresh and shared reductions."""
+
+    def __init__(self, max_age=0):
+        self.max_age = max_age
+        self._frame = None
+        self._built_at = 0.0
+        self._versions = None
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._refreshes = 0
+
+    def frame(self):
+        """The current grade frame, building it or applying pending refreshes first."""
+        # Read before the rows, so a bump during a rebuild triggers another one
+        versions = get_data_versions(SOURCE_TABLES)
+        with self._lock:
+            if (self._frame is None
+                    or changed_externally(self._versions, versions)
+                    or (self.max_age and time.monotonic() - self._built_at > self.max_age)):
+                self._rebuild()
+            elif self._dirty:
+                self._refresh()
+            # Local bumps follow writes already marked dirty and refreshed
+            self._versions = {name: version for name, (version, _) in versions.items()}
+            return self._frame
+
+    def _connect(self):
+        conn = get_connection()
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        return conn
+
+    def _rebuild(self):
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            self._dirty.clear()
+            frame = _fetch(cursor)
+            cursor.close()
+        finally:
+            conn.close()
+        self._frame = frame
+        self._built_at = time.monotonic()
+        self._builds += 1
+
+    def _refresh(self):
+        reg_nos = sorted(self._dirty)
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            fresh = _fetch(cursor, reg_nos)
+            cursor.close()
+        finally:
+            conn.close()
+        self._dirty.clear()
+        kept = self._frame[~self._frame["reg_no"].isin(reg_nos)]
+        self._frame = _concat([kept, fresh])
+        self._refreshes += 1
+
+    @property
+    def builds(self):
+        """How many times the snapshot was built from scratch; changes whenever rows may have been replaced wholesale."""
+        return self._builds
+
+    def mark_dirty(self, reg_nos):
+        """Schedule students' rows to be re-read before the next reduction."""
+        with self._lock:
+            if self._frame is not None:
+                self._dirty.update(reg_nos)
+
+    def invalidate(self):
+        """Drop the snapshot; it is rebuilt on next use."""
+        with self._lock:
+            self._frame = None
+            self._versions = None
+            self._dirty.clear()
+
+    def _rows(self, reg_nos=None):
+        frame = self.frame()
+        if reg_nos is not None:
+            frame = frame[frame["reg_no"].isin(list(reg_nos))]
+        return frame
+
+    def semester_summaries(self, reg_nos=None):
+        """
+        DataFrame indexed by (reg_no, semester) with total_subjects, failed_subjects and sgpa.
+        """
+        frame = self._rows(reg_nos)
+        grouped = frame.groupby(["reg_no", "semester"], observed=True)
+        summaries = pd.DataFrame({
+            "total_subjects": grouped.size(),
+            "failed_subjects": grouped["failed"].sum().astype(int),
+            # Python's round, as build_semester_summaries uses; numpy rounds halves differently
+            "sgpa": grouped["grade_points"].mean().map(lambda sgpa: round(sgpa, 2)),
+        })
+        return summaries
+
+    def sgpa(self, reg_nos=None):
+        """SGPA per (reg_no, semester)."""
+        return self.semester_summaries(reg_nos)["sgpa"]
+
+    def cgpa(self, reg_nos=None):
+        """CGPA per reg_no: the mean of the student's SGPAs (unrounded)."""
+        return self.sgpa(reg_nos).groupby(level="reg_no", observed=True).mean()
+
+    def failed_subjects(self, reg_nos=None):
+        """Number of failed subjects per reg_no."""
+        frame = self._rows(reg_nos)
+        return frame.groupby("reg_no", observed=True)["failed"].sum().astype(int)
+
+    def pass_rate(self, by=None, reg_nos=None):
+        """
+        Percentage of passed subjects, overall or grouped by snapshot columns
+        (e.g. by=["course_code"] or by=["semester"]).
+        """
+        frame = self._rows(reg_nos)
+        if by is None:
+            return float((~frame["failed"]).mean() * 100) if len(frame) else 0.0
+        return (~frame["failed"]).groupby([frame[column] for column in by], observed=True).mean() * 100
+
+    def stats(self):
+        with self._lock:
+            frame = self._frame
+            return {
+                "built": frame is not None,
+                "rows": 0 if frame is None else len(frame),
+                "students": 0 if frame is None else len(frame["reg_no"].cat.categories),
+                "memory_bytes": 0 if frame is None else int(frame.memory_usage(deep=True).sum()),
+                "pending_students": len(self._dirty),
+                "builds": self._builds,
+                "refreshes": self._refreshes,
+                "versions": self._versions,
+            }
+
+
+_snapshot = GradeSnapshot(max_age=MAX_AGE)
+
+
+def get_grade_snapshot():
+    """The process-wide grade snapshot."""
+    return _snapshot
+
+
+def invalidate_grade_snapshot():
+    _snapshot.invalidate()
+
+
+def get_grade_snapshot_stats():
+    return _snapshot.stats()
+
+
+@on_grades_changed
+def _mark_dirty_on_grade_change(reg_nos, course_codes):
+    _snapshot.mark_dirty(reg_nos)
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    snapshot = get_grade_snapshot()
+    cgpa = snapshot.cgpa()
+    print(f"Built in {time.perf_counter() - started:.2f}s: {snapshot.stats()}")
+    print(f"Students: {len(cgpa)}, mean CGPA {cgpa.mean():.2f}, pass rate {snapshot.pass_rate():.1f}%")
+    sys.exit(0)
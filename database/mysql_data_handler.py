@@ -1,7 +1,13 @@
 import mysql.connector
 import os
+import json
+import base64
 from dotenv import load_dotenv
 import traceback
+from database.connection_pool import ConnectionPool, PoolTimeoutError
+from database.grade_events import notify_grades_changed
+from database.schema_cache import get_schema
+from database.records import GradeIndex
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,38 +21,69 @@ print(f"Host: {os.getenv('host', 'localhost')}")
 print(f"User: {os.getenv('user', 'root')}")
 print(f"Database name from env: {db_name}")
 
+# Maximum registration numbers per IN (...) list. Keeps queries far below MySQL's
+# 65,535 placeholder limit and the default max_allowed_packet.
+REG_NO_CHUNK_SIZE = int(os.getenv("DB_IN_CLAUSE_CHUNK_SIZE", "1000"))
+
+# Tables the reports cannot work without
+REQUIRED_TABLES = ("students", "grades", "courses")
+
+# Shared connection pool, sized via env vars so deployments can tune it
+_pool = ConnectionPool(
+    {
+        "host": os.getenv("host", "localhost"),
+        "user": os.getenv("user", "root"),
+        "password": os.getenv("password", ""),
+        "database": db_name,
+    },
+    size=int(os.getenv("DB_POOL_SIZE", "10")),
+    timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+    health_check_interval=float(os.getenv("DB_POOL_HEALTH_CHECK_INTERVAL", "30")),
+)
+
 # Helper to get DB connection using env vars
 def get_connection():
+    """Borrow a connection from the pool. Calling close() on it returns it to the pool."""
     try:
-        # Explicitly use the db_name variable
-        conn = mysql.connector.connect(
-            host=os.getenv("host", "localhost"),
-            user=os.getenv("user", "root"),
-            password=os.getenv("password", ""),
-            database=db_name
-        )
-        print(f"Connected to database: {db_name}")
-        return conn
+        return _pool.acquire()
+    except PoolTimeoutError as err:
+        print(f"Error getting pooled connection: {err}")
+        return None
     except mysql.connector.Error as err:
         print(f"Error connecting to MySQL: {err}")
         traceback.print_exc()
         return None
 
+def get_pool_stats():
+    """Return usage metrics for the shared connection pool."""
+    return _pool.stats()
+
+def ping_database(timeout=None):
+    """Ping the server over a pooled connection, raising if none is available in time."""
+    conn = _pool.acquire(timeout=timeout)
+    try:
+        conn.ping(reconnect=False)
+    finally:
+        conn.close()
+
 def check_database():
-    """Check if the database exists and is accessible."""
+    """Check that the database is reachable and has the tables the reports need."""
     try:
         conn = get_connection()
         if conn and conn.is_connected():
             print("✅ Database connection successful")
             
-            # Check if tables exist using a regular cursor
-            regular_cursor = conn.cursor()
-            regular_cursor.execute("SHOW TABLES")
-            tables = [table[0] for table in regular_cursor.fetchall()]
-            print(f"Tables in database: {tables}")
-            
-            regular_cursor.close()
+            schema = get_schema(conn)
+            missing = schema.missing_tables(REQUIRED_TABLES)
+            if missing:
+                # The tables may have been created after the schema was cached
+                schema = get_schema(conn, refresh=True)
+                missing = schema.missing_tables(REQUIRED_TABLES)
             conn.close()
+            
+            if missing:
+                print(f"❌ Missing tables: {', '.join(missing)}")
+                return False
             return True
         else:
             print("❌ Failed to connect to database")
@@ -56,6 +93,80 @@ def check_database():
         traceback.print_exc()
         return False
 
+def load_schema_cache():
+    """Read the schema into the cache at startup so no request pays for it."""
+    conn = get_connection()
+    if not conn:
+        return None
+    try:
+        return get_schema(conn)
+    except Exception as e:
+        print(f"❌ Could not load database schema: {e}")
+        traceback.print_exc()
+        return None
+    finally:
+        conn.close()
+
+# Report header address fields, with the value used when the students table has no such column
+STUDENT_ADDRESS_FALLBACKS = [
+    ("door_no", "address"),
+    ("city", "address"),
+    ("mandal", "'Mandal'"),
+    ("district", "'District'"),
+    ("state", "'State'"),
+    ("country", "'India'"),
+    ("pincode", "'500000'"),
+    ("father_name", "'Parent/Guardian'"),
+]
+
+def student_select_columns(schema):
+    """SELECT list for student rows, reading address fields from real columns where they exist."""
+    columns = [
+        "id",
+        "name",
+        "registration_number AS registered_no",
+        "branch",
+        "current_semester AS curr_semester",
+        "address",
+    ]
+    for column, fallback in STUDENT_ADDRESS_FALLBACKS:
+        if schema.has_column("students", column):
+            columns.append(f"COALESCE({column}, {fallback}) AS {column}")
+        else:
+            columns.append(f"{fallback} AS {column}")
+    return ",\n                ".join(columns)
+
+def build_semester_summaries(records):
+    """
+    Compute per-student, per-semester summaries in a single pass over grade rows.
+
+    Produces the same structure the old per-semester COUNT/COUNT FAIL/AVG queries
+    did: one dict per (registered_no, semester_no) with total_no_of_subjects,
+    no_of_failed_subjects and sgpa (mean grade points, rounded to 2 places).
+    """
+    totals = {}
+    for record in records:
+        key = (record['registered_no'], record['semester_no'])
+        entry = totals.get(key)
+        if entry is None:
+            entry = totals[key] = [0, 0, 0.0]
+        entry[0] += 1
+        if str(record['result']).upper() == 'FAIL':
+            entry[1] += 1
+        entry[2] += record['grade_points'] or 0
+
+    summaries = []
+    for (reg_no, sem_no), (total_subjects, failed_subjects, grade_points) in totals.items():
+        avg = grade_points / total_subjects if total_subjects else 0
+        summaries.append({
+            'registered_no': reg_no,
+            'semester_no': sem_no,
+            'total_no_of_subjects': total_subjects,
+            'no_of_failed_subjects': failed_subjects,
+            'sgpa': round(avg, 2) if avg else 0
+        })
+    return summaries
+
 def get_student_data():
     """Get all student data with their records and summaries."""
     try:
@@ -64,14 +175,7 @@ def get_student_data():
             return [], [], []
             
         cursor = conn.cursor(dictionary=True)
-
-        # Check if tables exist using a regular cursor
-        regular_cursor = conn.cursor()
-        regular_cursor.execute("SHOW TABLES")
-        tables = [table[0] for table in regular_cursor.fetchall()]
-        regular_cursor.close()
-        
-        print(f"Tables in database: {tables}")
+        schema = get_schema(conn)
         
         # Use the correct table names based on what's in the database
         students_table = "students"
@@ -82,20 +186,7 @@ def get_student_data():
         try:
             cursor.execute(f"""
                 SELECT 
-                    id,
-                    name,
-                    registration_number AS registered_no,
-                    branch,
-                    current_semester AS curr_semester,
-                    address,
-                    address AS door_no,
-                    address AS city,
-                    'Mandal' AS mandal,
-                    'District' AS district,
-                    'State' AS state,
-                    'India' AS country,
-                    '500000' AS pincode,
-                    'Parent/Guardian' AS father_name
+                    {student_select_columns(schema)}
                 FROM {students_table}
             """)
             students = cursor.fetchall()
@@ -126,65 +217,9 @@ def get_student_data():
             print(f"Error fetching grades: {err}")
             records = []
 
-        # Generate semester summaries
-        summaries = []
-        
-        try:
-            # Get unique student-semester combinations
-            cursor.execute(f"""
-                SELECT DISTINCT 
-                    g.registration_number, 
-                    c.semester
-                FROM {grades_table} g
-                JOIN {courses_table} c ON g.course_code = c.code
-            """)
-            student_semesters = cursor.fetchall()
-            
-            # For each student-semester, calculate summary
-            for item in student_semesters:
-                reg_no = item['registration_number']
-                sem_no = item['semester']
-                
-                # Count total subjects
-                cursor.execute(f"""
-                    SELECT COUNT(*) AS total
-                    FROM {grades_table} g
-                    JOIN {courses_table} c ON g.course_code = c.code
-                    WHERE g.registration_number = %s AND c.semester = %s
-                """, (reg_no, sem_no))
-                total_subjects = cursor.fetchone()['total']
-                
-                # Count failed subjects
-                cursor.execute(f"""
-                    SELECT COUNT(*) AS failed
-                    FROM {grades_table} g
-                    JOIN {courses_table} c ON g.course_code = c.code
-                    WHERE g.registration_number = %s AND c.semester = %s AND UPPER(g.result) = 'FAIL'
-                """, (reg_no, sem_no))
-                failed_subjects = cursor.fetchone()['failed']
-                
-                # Calculate SGPA
-                cursor.execute(f"""
-                    SELECT AVG(g.grade_points) AS sgpa
-                    FROM {grades_table} g
-                    JOIN {courses_table} c ON g.course_code = c.code
-                    WHERE g.registration_number = %s AND c.semester = %s
-                """, (reg_no, sem_no))
-                sgpa_result = cursor.fetchone()
-                sgpa = round(sgpa_result['sgpa'], 2) if sgpa_result['sgpa'] else 0
-                
-                # Add to summaries
-                summaries.append({
-                    'registered_no': reg_no,
-                    'semester_no': sem_no,
-                    'total_no_of_subjects': total_subjects,
-                    'no_of_failed_subjects': failed_subjects,
-                    'sgpa': sgpa
-                })
-            
-            print(f"Generated {len(summaries)} semester summaries")
-        except mysql.connector.Error as err:
-            print(f"Error generating summaries: {err}")
+        # Generate semester summaries from the grade rows already in memory
+        summaries = build_semester_summaries(records)
+        print(f"Generated {len(summaries)} semester summaries")
 
         cursor.close()
         conn.close()
@@ -204,12 +239,7 @@ def get_filtered_student_data(selected_students=None, choose_semester=None, bran
             return [], []
             
         cursor = conn.cursor(dictionary=True)
-        
-        # Check if tables exist using a regular cursor
-        regular_cursor = conn.cursor()
-        regular_cursor.execute("SHOW TABLES")
-        tables = [table[0] for table in regular_cursor.fetchall()]
-        regular_cursor.close()
+        schema = get_schema(conn)
         
         # Use the correct table names based on what's in the database
         students_table = "students"
@@ -238,20 +268,7 @@ def get_filtered_student_data(selected_students=None, choose_semester=None, bran
         # Fetch filtered students
         query = f"""
             SELECT 
-                id,
-                name,
-                registration_number AS registered_no,
-                branch,
-                current_semester AS curr_semester,
-                address,
-                address AS door_no,
-                address AS city,
-                'Mandal' AS mandal,
-                'District' AS district,
-                'State' AS state,
-                'India' AS country,
-                '500000' AS pincode,
-                'Parent/Guardian' AS father_name
+                {student_select_columns(schema)}
             FROM {students_table}
             WHERE {where_sql}
         """
@@ -297,131 +314,327 @@ def get_filtered_student_data(selected_students=None, choose_semester=None, bran
         traceback.print_exc()
         return [], []
 
-def get_students_by_reg_nos(reg_nos):
-    """Get student details and records for specific registration numbers."""
+# Columns /api/students can return, keyed by the names the frontend already uses
+STUDENT_LIST_COLUMNS = {
+    "id": "id",
+    "name": "name",
+    "registered_no": "registration_number",
+    "branch": "branch",
+    "curr_semester": "current_semester",
+    "address": "address",
+    "email": "email",
+    "phone": "phone",
+}
+STUDENT_LIST_DEFAULT_FIELDS = ("id", "name", "registered_no", "branch", "curr_semester", "address")
+STUDENT_LIST_SORT_KEYS = ("registered_no", "name", "branch", "curr_semester")
+STUDENT_PAGE_MAX_LIMIT = int(os.getenv("STUDENT_PAGE_MAX_LIMIT", "1000"))
+
+def encode_student_cursor(sort_value, reg_no):
+    """Opaque cursor pointing just past the given row of a keyset-paginated listing."""
+    payload = json.dumps([sort_value, reg_no], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_student_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, reg_no = json.loads(base64.urlsafe_b64decode(padded))
+        return sort_value, reg_no
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+def like_prefix(text):
+    """LIKE pattern matching values that start with text, with its wildcards taken literally (ESCAPE '!')."""
+    return "".join("!" + ch if ch in "!%_" else ch for ch in text) + "%"
+
+def get_students_page(limit=None, cursor=None, sort="registered_no", order="asc",
+                      q=None, branch=None, semester=None, fields=None):
+    """
+    List students from the students table only, without grades or summaries.
+
+    Pagination is keyset-based: rows are ordered by the sort column with
+    registration_number as a tie-breaker, and the cursor carries the last row's
+    (sort value, registration number). With the (column, registration_number)
+    indexes that setup_database.py creates, also on existing databases, every
+    page is one indexed range scan no matter how deep it is. The keyset
+    predicate skips NULLs, so a sort column that allows NULL is rejected.
+    q matches registration numbers and names that start with it, so the search
+    is an index range scan too; % and _ in q are matched literally.
+    Without a limit all matching students are returned.
+
+    Returns:
+        tuple: (students, next_cursor); next_cursor is None on the last page.
+    """
+    fields = list(fields or STUDENT_LIST_DEFAULT_FIELDS)
+    unknown = [f for f in fields if f not in STUDENT_LIST_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Expected: {', '.join(STUDENT_LIST_COLUMNS)}")
+    if sort not in STUDENT_LIST_SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(STUDENT_LIST_SORT_KEYS)}")
+    order = (order or "asc").lower()
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+    if limit is not None:
+        limit = int(limit)
+        if not 1 <= limit <= STUDENT_PAGE_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {STUDENT_PAGE_MAX_LIMIT}")
+
+    sort_column = STUDENT_LIST_COLUMNS[sort]
+    where_clauses = []
+    params = []
+
+    if branch:
+        where_clauses.append("branch = %s")
+        params.append(branch)
+    if semester:
+        where_clauses.append("current_semester = %s")
+        params.append(int(semester))
+    if q:
+        # Prefix matches so both columns' indexes serve the search; a contains match
+        # on name would scan the whole table
+        pattern = like_prefix(q)
+        where_clauses.append("(registration_number LIKE %s ESCAPE '!' OR name LIKE %s ESCAPE '!')")
+        params.extend([pattern, pattern])
+    if cursor:
+        sort_value, last_reg_no = decode_student_cursor(cursor)
+        op = ">" if order == "asc" else "<"
+        if sort_column == "registration_number":
+            where_clauses.append(f"registration_number {op} %s")
+            params.append(last_reg_no)
+        else:
+            where_clauses.append(f"({sort_column} {op} %s OR ({sort_column} = %s AND registration_number {op} %s))")
+            params.extend([sort_value, sort_value, last_reg_no])
+
+    # The sort value and registration number are always selected so the cursor can be built
+    select_columns = dict.fromkeys([*fields, sort, "registered_no"])
+    select_sql = ", ".join(f"{STUDENT_LIST_COLUMNS[f]} AS {f}" for f in select_columns)
+    where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+    direction = order.upper()
+    order_sql = "registration_number " + direction if sort_column == "registration_number" \
+        else f"{sort_column} {direction}, registration_number {direction}"
+    limit_sql = ""
+    if limit is not None:
+        limit_sql = "LIMIT %s"
+        params.append(limit + 1)
+
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        if get_schema(conn).is_nullable("students", sort_column):
+            raise ValueError(f"Cannot sort by {sort}: students.{sort_column} allows NULL")
+        db_cursor = conn.cursor(dictionary=True)
+        db_cursor.execute(f"""
+            SELECT {select_sql}
+            FROM students
+            WHERE {where_sql}
+            ORDER BY {order_sql}
+            {limit_sql}
+        """, params)
+        rows = db_cursor.fetchall()
+        db_cursor.close()
+    finally:
+        conn.close()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_student_cursor(last[sort], last["registered_no"])
+
+    students = [{f: row[f] for f in fields} for row in rows]
+    return students, next_cursor
+
+def iter_students_by_reg_nos(reg_nos, chunk_size=None, with_grades=True):
+    """
+    Yield (students, records, summaries) for registration numbers, one chunk at a time.
+
+    records is a GradeIndex of compact GradeRecord rows grouped by student and
+    semester (see database.records). Each chunk costs a constant two queries (students and grades) regardless of how
+    many semesters the students have; summaries are built from the fetched grade rows.
+    Chunks keep the IN (...) lists well under MySQL's placeholder and packet limits,
+    and let callers stream very large exports without holding every row at once.
+    With with_grades=False only the students query runs and records and summaries
+    are empty, for callers that take grades from the grade snapshot.
+    """
+    # Drop duplicates and blanks while keeping the caller's order
+    reg_nos = [reg_no for reg_no in dict.fromkeys(reg_nos or []) if reg_no]
     if not reg_nos:
-        return [], [], []
-        
+        return
+
+    chunk_size = chunk_size or REG_NO_CHUNK_SIZE
+
+    conn = get_connection()
+    if not conn:
+        return
+
     try:
-        conn = get_connection()
-        if not conn:
-            return [], [], []
-            
         cursor = conn.cursor(dictionary=True)
-        
-        # Check if tables exist using a regular cursor
-        regular_cursor = conn.cursor()
-        regular_cursor.execute("SHOW TABLES")
-        tables = [table[0] for table in regular_cursor.fetchall()]
-        regular_cursor.close()
-        
+        grade_cursor = conn.cursor()
+        schema = get_schema(conn)
+
         # Use the correct table names based on what's in the database
         students_table = "students"
         grades_table = "grades"
         courses_table = "courses"
-        
-        # Fetch students
-        placeholders = ', '.join(['%s'] * len(reg_nos))
-        cursor.execute(f"""
-            SELECT 
-                id,
-                name,
-                registration_number AS registered_no,
-                branch,
-                current_semester AS curr_semester,
-                address,
-                address AS door_no,
-                address AS city,
-                'Mandal' AS mandal,
-                'District' AS district,
-                'State' AS state,
-                'India' AS country,
-                '500000' AS pincode,
-                'Parent/Guardian' AS father_name
-            FROM {students_table}
-            WHERE registration_number IN ({placeholders})
-        """, reg_nos)
-        students = cursor.fetchall()
-        
-        # Fetch grades
-        cursor.execute(f"""
-            SELECT 
-                g.registration_number AS registered_no,
-                c.semester AS semester_no,
-                g.month_year,
-                c.name AS course_name,
-                g.grade,
-                c.credits,
-                g.grade_points,
-                g.credits_obtained,
-                g.result
-            FROM {grades_table} g
-            JOIN {courses_table} c ON g.course_code = c.code
-            WHERE g.registration_number IN ({placeholders})
-        """, reg_nos)
-        records = cursor.fetchall()
-        
-        # Generate summaries
-        summaries = []
-        
-        # For each student and semester, calculate summary
-        for reg_no in reg_nos:
-            # Get semesters for this student
+
+        for offset in range(0, len(reg_nos), chunk_size):
+            chunk = reg_nos[offset:offset + chunk_size]
+            placeholders = ', '.join(['%s'] * len(chunk))
+
+            # Fetch students
             cursor.execute(f"""
-                SELECT DISTINCT c.semester
+                SELECT 
+                    {student_select_columns(schema)}
+                FROM {students_table}
+                WHERE registration_number IN ({placeholders})
+            """, chunk)
+            students = cursor.fetchall()
+
+            if not with_grades:
+                yield students, [], []
+                continue
+
+            # Fetch grades as tuples straight into the per-student index
+            grade_cursor.execute(f"""
+                SELECT 
+                    g.registration_number AS registered_no,
+                    c.semester AS semester_no,
+                    g.month_year,
+                    c.name AS course_name,
+                    g.grade,
+                    c.credits,
+                    g.grade_points,
+                    g.credits_obtained,
+                    g.result
                 FROM {grades_table} g
                 JOIN {courses_table} c ON g.course_code = c.code
-                WHERE g.registration_number = %s
-            """, (reg_no,))
-            semesters = [row['semester'] for row in cursor.fetchall()]
-            
-            for sem_no in semesters:
-                # Count total subjects
-                cursor.execute(f"""
-                    SELECT COUNT(*) AS total
-                    FROM {grades_table} g
-                    JOIN {courses_table} c ON g.course_code = c.code
-                    WHERE g.registration_number = %s AND c.semester = %s
-                """, (reg_no, sem_no))
-                total_subjects = cursor.fetchone()['total']
-                
-                # Count failed subjects
-                cursor.execute(f"""
-                    SELECT COUNT(*) AS failed
-                    FROM {grades_table} g
-                    JOIN {courses_table} c ON g.course_code = c.code
-                    WHERE g.registration_number = %s AND c.semester = %s AND UPPER(g.result) = 'FAIL'
-                """, (reg_no, sem_no))
-                failed_subjects = cursor.fetchone()['failed']
-                
-                # Calculate SGPA
-                cursor.execute(f"""
-                    SELECT AVG(g.grade_points) AS sgpa
-                    FROM {grades_table} g
-                    JOIN {courses_table} c ON g.course_code = c.code
-                    WHERE g.registration_number = %s AND c.semester = %s
-                """, (reg_no, sem_no))
-                sgpa_result = cursor.fetchone()
-                sgpa = round(sgpa_result['sgpa'], 2) if sgpa_result['sgpa'] else 0
-                
-                # Add to summaries
-                summaries.append({
-                    'registered_no': reg_no,
-                    'semester_no': sem_no,
-                    'total_no_of_subjects': total_subjects,
-                    'no_of_failed_subjects': failed_subjects,
-                    'sgpa': sgpa
-                })
-        
+                WHERE g.registration_number IN ({placeholders})
+            """, chunk)
+            records = GradeIndex.from_rows(grade_cursor.fetchall())
+
+            yield students, records, build_semester_summaries(records)
+
         cursor.close()
+        grade_cursor.close()
+    finally:
         conn.close()
+
+def get_students_by_reg_nos(reg_nos):
+    """Get student details, a GradeIndex of their records and summaries for registration numbers."""
+    if not reg_nos:
+        return [], GradeIndex(), []
+        
+    try:
+        students, records, summaries = [], GradeIndex(), []
+        for chunk_students, chunk_records, chunk_summaries in iter_students_by_reg_nos(reg_nos):
+            students.extend(chunk_students)
+            records.extend(chunk_records)
+            summaries.extend(chunk_summaries)
         
         return students, records, summaries
         
     except Exception as e:
         print(f"Error in get_students_by_reg_nos: {e}")
         traceback.print_exc()
-        return [], [], []
+        return [], GradeIndex(), []
+
+GRADE_FIELDS = ("registration_number", "course_code", "grade", "grade_points", "credits_obtained", "result", "month_year")
+
+def upsert_grades(grades):
+    """
+    Insert or update grade rows, matched on (registration_number, course_code, month_year).
+
+    All rows are written in one transaction; grade change listeners are notified
+    after it commits.
+
+    Parameters:
+        grades (list): Dicts with registration_number, course_code, grade,
+            grade_points, credits_obtained, result and month_year.
+
+    Returns:
+        dict: Counts of inserted and updated rows.
+    """
+    rows = []
+    for index, grade in enumerate(grades):
+        missing = [field for field in GRADE_FIELDS if grade.get(field) in (None, "")]
+        if missing:
+            raise ValueError(f"Grade {index} is missing: {', '.join(missing)}")
+        rows.append((
+            str(grade["registration_number"]),
+            str(grade["course_code"]),
+            str(grade["grade"]),
+            float(grade["grade_points"]),
+            float(grade["credits_obtained"]),
+            str(grade["result"]).upper(),
+            str(grade["month_year"]).upper(),
+        ))
+    if not rows:
+        return {"inserted": 0, "updated": 0}
+
+    # The last entry wins if the same grade appears twice in one request
+    rows = list({(row[0], row[1], row[6]): row for row in rows}.values())
+
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+
+    inserted = updated = 0
+    try:
+        cursor = conn.cursor()
+        reg_nos = sorted({row[0] for row in rows})
+        existing = {}
+        for start in range(0, len(reg_nos), REG_NO_CHUNK_SIZE):
+            chunk = reg_nos[start:start + REG_NO_CHUNK_SIZE]
+            cursor.execute(f"""
+                SELECT id, registration_number, course_code, month_year
+                FROM grades
+                WHERE registration_number IN ({', '.join(['%s'] * len(chunk))})
+                FOR UPDATE
+            """, tuple(chunk))
+            for grade_id, reg_no, course_code, month_year in cursor.fetchall():
+                existing[(reg_no, course_code, month_year)] = grade_id
+
+        updates, inserts = [], []
+        for row in rows:
+            grade_id = existing.get((row[0], row[1], row[6]))
+            if grade_id is None:
+                inserts.append(row)
+            else:
+                updates.append(row[2:6] + (grade_id,))
+
+        if updates:
+            cursor.executemany("""
+                UPDATE grades
+                SET grade = %s, grade_points = %s, credits_obtained = %s, result = %s
+                WHERE id = %s
+            """, updates)
+            updated = len(updates)
+        if inserts:
+            cursor.executemany(f"""
+                INSERT INTO grades ({', '.join(GRADE_FIELDS)})
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, inserts)
+            inserted = len(inserts)
+
+        conn.commit()
+        cursor.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    notify_grades_changed(reg_nos, [row[1] for row in rows])
+
+    # Bumped after the listeners have refreshed derived data, so a new version
+    # never tags responses built from stale aggregates
+    from database.data_versions import bump_data_version
+    try:
+        bump_data_version("grades")
+    except Exception as e:
+        print(f"❌ Failed to bump grades data version: {e}")
+        traceback.print_exc()
+    return {"inserted": inserted, "updated": updated}
 
 # For testing
 if __name__ == "__main__":
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+SGPA and CGPA rank and percentile of every student within their cohort.
+
+Cohorts are per branch and semester:
+
+    SGPA  students of a branch with grades in that semester
+    CGPA  students of a branch in the same current semester
+
+SGPA and CGPA are credit-weighted and rounded to 2 places, as the semester and
+cumulative performance reports show them. They are computed with group-bys over
+the grade snapshot (database.grade_snapshot), and each cohort keeps its
+students sorted, so a student's standing is a dict lookup and a leaderboard is
+a slice of the sorted list.
+
+Ranks are competition ranks (equal values share the best rank, 1 is highest).
+The percentile is the share of the cohort ranked at or below the student, so
+the top student is at 100.
+
+Grade writes through the API only mark the affected students: on the next read
+their values are recomputed and only the cohorts they left or joined are
+re-sorted. The index is rebuilt when the grade snapshot is rebuilt or a data
+version of students, courses or grades moves by a bump other than this
+process's grade writes (an import, a setup script, another worker). Print a
+summary with:
+    python -m database.rankings
+"""
+
+import sys
+import threading
+import time
+from database.mysql_data_handler import get_connection, REG_NO_CHUNK_SIZE
+from database.grade_events import on_grades_changed
+from database.data_versions import get_data_versions, changed_externally
+from database.grade_snapshot import get_grade_snapshot
+
+METRICS = ("sgpa", "cgpa")
+# Tables whose changes rebuild the index, unless they come from this process's
+# grade writes, which are applied incrementally
+REBUILD_TABLES = ("students", "courses", "grades")
+
+
+class Cohort:
+    """Students of one cohort sorted by value, highest first, with their ranks."""
+
+    __slots__ = ("values", "order", "ranks")
+
+    def __init__(self):
+        self.values = {}
+        self.order = []
+        self.ranks = {}
+
+    def rerank(self):
+        self.order = sorted(self.values.items(), key=lambda item: (-item[1], item[0]))
+        self.ranks = {}
+        rank = previous = None
+        for position, (reg_no, value) in enumerate(self.order, start=1):
+            if value != previous:
+                rank, previous = position, value
+            self.ranks[reg_no] = rank
+
+    def standing(self, reg_no):
+        rank = self.ranks.get(reg_no)
+        if rank is None:
+            return None
+        size = len(self.order)
+        return {
+            "value": self.values[reg_no],
+            "rank": rank,
+            "percentile": round(100 * (size - rank + 1) / size, 1),
+            "cohortSize": size,
+        }
+
+
+def _weighted(frame, by):
+    """Credit-weighted mean grade points per group, rounded like the reports (0 without credits)."""
+    weighted = frame.assign(
+        weighted_points=frame["grade_points"] * frame["credits"].astype("float64"),
+        credit_total=frame["credits"].astype("float64"),
+    ).groupby(by, observed=True)[["weighted_points", "credit_total"]].sum()
+    return {
+        key: round(points / credits, 2) if credits > 0 else 0
+        for key, points, credits in zip(weighted.index, weighted["weighted_points"], weighted["credit_total"])
+    }
+
+
+def _load_students(cursor, reg_nos=None):
+    """reg_no -> (name, branch, current semester)."""
+    sql = "SELECT registration_number, name, branch, current_semester FROM students"
+    students = {}
+    if reg_nos is None:
+        cursor.execute(sql)
+        students.update((row[0], row[1:]) for row in cursor.fetchall())
+        return students
+    for start in range(0, len(reg_nos), REG_NO_CHUNK_SIZE):
+        chunk = reg_nos[start:start + REG_NO_CHUNK_SIZE]
+        cursor.execute(sql + f" WHERE registration_number IN ({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+        students.update((row[0], row[1:]) for row in cursor.fetchall())
+    return students
+
+
+class RankingIndex:
+    """Cohorts keyed by (metric, branch, semester), kept current with incremental updates."""
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self._students = {}
+        self._cohorts = {}
+        self._memberships = {}
+        self._dirty = set()
+        self._versions = None
+        self._snapshot_builds = None
+        self._lock = threading.Lock()
+        self._builds = 0
+        self._updates = 0
+
+    def _connect(self):
+        conn = get_connection()
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        return conn
+
+    def _current(self):
+        """Bring the index up to date; called with the lock held."""
+        versions = get_data_versions(REBUILD_TABLES)
+        frame = self.snapshot.frame()
+        snapshot_builds = self.snapshot.builds
+        if changed_externally(self._versions, versions) or snapshot_builds != self._snapshot_builds:
+            self._rebuild(frame)
+            self._snapshot_builds = snapshot_builds
+        elif self._dirty:
+            self._update(frame)
+        self._versions = {name: version for name, (version, _) in versions.items()}
+
+    def _values(self, frame):
+        return _weighted(frame, ["reg_no", "semester"]), _weighted(frame, "reg_no")
+
+    def _join(self, reg_no, sgpas, cgpa):
+        """Add a student's values to their cohorts; returns the cohort keys."""
+        student = self._students.get(reg_no)
+        if student is None:
+            return []
+        _, branch, current_semester = student
+        keys = [("sgpa", branch, semester) for semester in sgpas]
+        if cgpa is not None:
+            keys.append(("cgpa", branch, current_semester))
+        for key in keys:
+            value = sgpas[key[2]] if key[0] == "sgpa" else cgpa
+            self._cohorts.setdefault(key, Cohort()).values[reg_no] = value
+        self._memberships[reg_no] = keys
+        return keys
+
+    def _rebuild(self, frame):
+        self._dirty.clear()
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            self._students = _load_students(cursor)
+            cursor.close()
+        finally:
+            conn.close()
+
+        semester_values, cgpas = self._values(frame)
+        sgpas = {}
+        for (reg_no, semester), value in semester_values.items():
+            sgpas.setdefault(reg_no, {})[int(semester)] = value
+
+        self._cohorts = {}
+        self._memberships = {}
+        for reg_no, cgpa in cgpas.items():
+            self._join(reg_no, sgpas.get(reg_no, {}), cgpa)
+        for cohort in self._cohorts.values():
+            cohort.rerank()
+        self._builds += 1
+
+    def _update(self, frame):
+        reg_nos = sorted(self._dirty)
+        self._dirty.clear()
+        conn = self._connect()
+        try:
+            cursor = conn.cursor()
+            students = _load_students(cursor, reg_nos)
+            cursor.close()
+        finally:
+            conn.close()
+
+        semester_values, cgpas = self._values(frame[frame["reg_no"].isin(reg_nos)])
+        sgpas = {}
+        for (reg_no, semester), value in semester_values.items():
+            sgpas.setdefault(reg_no, {})[int(semester)] = value
+
+        touched = set()
+        for reg_no in reg_nos:
+            for key in self._memberships.pop(reg_no, ()):
+                self._cohorts[key].values.pop(reg_no, None)
+                touched.add(key)
+            self._students.pop(reg_no, None)
+            if reg_no in students:
+                self._students[reg_no] = students[reg_no]
+            touched.update(self._join(reg_no, sgpas.get(reg_no, {}), cgpas.get(reg_no)))
+
+        for key in touched:
+            cohort = self._cohorts[key]
+            if cohort.values:
+                cohort.rerank()
+            else:
+                del self._cohorts[key]
+        self._updates += 1
+
+    def refresh(self):
+        """Build the index or apply pending changes now."""
+        with self._lock:
+            self._current()
+
+    def mark_dirty(self, reg_nos):
+        with self._lock:
+            if self._versions is not None:
+                self._dirty.update(reg_nos)
+
+    def invalidate(self):
+        with self._lock:
+            self._versions = None
+
+    def _standing(self, reg_no):
+        keys = self._memberships.get(reg_no)
+        if not keys:
+            return None
+        _, branch, current_semester = self._students[reg_no]
+        result = {"branch": branch, "currentSemester": current_semester, "cgpa": None, "sgpa": {}}
+        for key in keys:
+            standing = self._cohorts[key].standing(reg_no)
+            if key[0] == "cgpa":
+                result["cgpa"] = standing
+            else:
+                result["sgpa"][key[2]] = standing
+        return result
+
+    def standing(self, reg_no):
+        """
+        A student's standing: {"branch", "currentSemester", "cgpa": {...}, "sgpa": {semester: {...}}}.
+
+        Each entry has value, rank, percentile and cohortSize. None for a
+        student without grades.
+        """
+        with self._lock:
+            self._current()
+            return self._standing(reg_no)
+
+    def standings(self, reg_nos):
+        """Standings of many students, brought up to date once: reg_no -> standing or None."""
+        with self._lock:
+            self._current()
+            return {reg_no: self._standing(reg_no) for reg_no in reg_nos}
+
+    def leaderboard(self, metric, branch, semester, n):
+        """Top n and bottom n of a cohort, or None if the cohort is empty."""
+        with self._lock:
+            self._current()
+            cohort = self._cohorts.get((metric, branch, int(semester)))
+            if cohort is None:
+                return None
+
+            def entry(reg_no):
+                return {"registered_no": reg_no, "name": self._students[reg_no][0], **cohort.standing(reg_no)}
+
+            return {
+                "cohortSize": len(cohort.order),
+                "top": [entry(reg_no) for reg_no, _ in cohort.order[:n]],
+                "bottom": [entry(reg_no) for reg_no, _ in cohort.order[-n:][::-1]],
+            }
+
+    def stats(self):
+        with self._lock:
+            return {
+                "built": self._versions is not None,
+                "cohorts": len(self._cohorts),
+                "ranked_students": len(self._memberships),
+                "pending_students": len(self._dirty),
+                "builds": self._builds,
+                "updates": self._updates,
+            }
+
+
+_index = RankingIndex(get_grade_snapshot())
+
+
+def get_ranking_index():
+    """The process-wide ranking index."""
+    return _index
+
+
+def get_student_standing(reg_no):
+    return _index.standing(reg_no)
+
+
+def get_student_standings(reg_nos):
+    return _index.standings(reg_nos)
+
+
+def get_semester_standing(reg_no, semester):
+    """A student's SGPA standing in one semester's cohort, or None if they have no grades there."""
+    standing = _index.standing(reg_no)
+    try:
+        semester = int(semester)
+    except (TypeError, ValueError):
+        return None
+    if not standing or semester not in standing["sgpa"]:
+        return None
+    return {"branch": standing["branch"], "semester": semester, **standing["sgpa"][semester]}
+
+
+def get_ranking_stats():
+    return _index.stats()
+
+
+@on_grades_changed
+def _mark_dirty_on_grade_change(reg_nos, course_codes):
+    _index.mark_dirty(reg_nos)
+
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    index = get_ranking_index()
+    index.refresh()
+    print(f"Built in {time.perf_counter() - started:.2f}s: {index.stats()}")
+    sys.exit(0)
@@ -0,0 +1,128 @@
+"""
+Compact grade records and a per-student index over them.
+
+Grade rows for report rendering are built from cursor tuples as GradeRecord
+objects, which use __slots__ instead of a per-row dict, and grouped into a
+GradeIndex (reg_no -> semester_no -> records) while they are fetched. Looking up
+one student's semesters is then a dict access instead of a scan over every row
+of the batch, so building N reports is linear in the number of rows.
+
+GradeRecord supports record["field"], record.get() and dict(record), so code
+written against dict rows keeps working.
+"""
+
+GRADE_RECORD_FIELDS = (
+    "registered_no",
+    "semester_no",
+    "month_year",
+    "course_name",
+    "grade",
+    "credits",
+    "grade_points",
+    "credits_obtained",
+    "result",
+)
+
+
+class GradeRecord:
+    """One grade row joined to its course, in the column order of GRADE_RECORD_FIELDS."""
+
+    __slots__ = GRADE_RECORD_FIELDS
+
+    def __init__(self, registered_no, semester_no, month_year, course_name, grade,
+                 credits, grade_points, credits_obtained, result):
+        self.registered_no = registered_no
+        self.semester_no = semester_no
+        self.month_year = month_year
+        self.course_name = course_name
+        self.grade = grade
+        self.credits = credits
+        self.grade_points = grade_points
+        self.credits_obtained = credits_obtained
+        self.result = result
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except (AttributeError, TypeError):
+            raise KeyError(field) from None
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def keys(self):
+        return GRADE_RECORD_FIELDS
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in GRADE_RECORD_FIELDS}
+
+    def __eq__(self, other):
+        if isinstance(other, GradeRecord):
+            return all(getattr(self, field) == getattr(other, field) for field in GRADE_RECORD_FIELDS)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"GradeRecord({', '.join(f'{field}={getattr(self, field)!r}' for field in GRADE_RECORD_FIELDS)})"
+
+
+class GradeIndex:
+    """
+    Grade records grouped by registration number and semester, in fetch order.
+
+    Iterating yields every record, so it can stand in for the flat records list;
+    ``record in index`` keeps list semantics. Use has_student() to test for a
+    registration number.
+    """
+
+    __slots__ = ("_students", "_count")
+
+    def __init__(self, records=()):
+        self._students = {}
+        self._count = 0
+        self.extend(records)
+
+    def add(self, record):
+        semesters = self._students.get(record.registered_no)
+        if semesters is None:
+            semesters = self._students[record.registered_no] = {}
+        semesters.setdefault(record.semester_no, []).append(record)
+        self._count += 1
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build records from cursor tuples in GRADE_RECORD_FIELDS order."""
+        index = cls()
+        for row in rows:
+            index.add(GradeRecord(*row))
+        return index
+
+    def semesters(self, reg_no):
+        """semester_no -> records for one student (empty if the student has no grades)."""
+        return self._students.get(reg_no, {})
+
+    def student_records(self, reg_no):
+        """All of one student's records, semester by semester."""
+        return [record for records in self.semesters(reg_no).values() for record in records]
+
+    def has_student(self, reg_no):
+        """Whether the index holds any records of the student."""
+        return reg_no in self._students
+
+    def __iter__(self):
+        for semesters in self._students.values():
+            for records in semesters.values():
+                yield from records
+
+    def __len__(self):
+        return self._count
+
+
+def records_for_student(records, reg_no):
+    """One student's rows from either a GradeIndex or a flat list of row dicts."""
+    if isinstance(records, GradeIndex):
+        return records.student_records(reg_no)
+    return [record for record in records if record["registered_no"] == reg_no]
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Cached view of the database schema: which tables, columns and indexes exist.
+
+The schema is read from information_schema once (two queries) and kept for the
+life of the process, so data functions can check for optional tables and
+columns without a metadata round trip per call. When information_schema cannot
+be read, an empty schema is used, so callers fall back to the static column
+list, and the load is retried after SCHEMA_RETRY_INTERVAL seconds. Reload it
+after migrations with get_schema(conn, refresh=True), or inspect it with:
+    python -m database.schema_cache
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Seconds to wait before retrying a schema load that failed
+RETRY_INTERVAL = float(os.getenv("SCHEMA_RETRY_INTERVAL", "60"))
+
+
+class Schema:
+    """Tables of one database with their columns (in order), nullable columns and indexes."""
+
+    def __init__(self, columns, indexes, nullable=()):
+        self.columns = columns
+        self.indexes = indexes
+        self.nullable = set(nullable)
+
+    @property
+    def tables(self):
+        return sorted(self.columns)
+
+    def has_table(self, table):
+        return table in self.columns
+
+    def has_column(self, table, column):
+        return column in self.columns.get(table, ())
+
+    def is_nullable(self, table, column):
+        return (table, column) in self.nullable
+
+    def missing_tables(self, tables):
+        return [table for table in tables if table not in self.columns]
+
+    def table_indexes(self, table):
+        """Index name -> (columns, unique) for a table."""
+        return self.indexes.get(table, {})
+
+    def has_index_on(self, table, columns):
+        """Whether some index on table starts with the given columns."""
+        columns = list(columns)
+        return any(index_columns[:len(columns)] == columns for index_columns, _ in self.table_indexes(table).values())
+
+
+_lock = threading.Lock()
+_schema = None
+_failed_at = None
+
+
+def load_schema(conn):
+    """Read tables, columns and indexes of the connection's current database."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name, IS_NULLABLE AS is_nullable
+            FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME, ORDINAL_POSITION
+        """)
+        columns = {}
+        nullable = set()
+        for row in cursor.fetchall():
+            columns.setdefault(row["table_name"], []).append(row["column_name"])
+            if row["is_nullable"] == "YES":
+                nullable.add((row["table_name"], row["column_name"]))
+
+        cursor.execute("""
+            SELECT TABLE_NAME AS table_name, INDEX_NAME AS index_name,
+                   COLUMN_NAME AS column_name, NON_UNIQUE AS non_unique
+            FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE()
+            ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """)
+        indexes = {}
+        for row in cursor.fetchall():
+            table_indexes = indexes.setdefault(row["table_name"], {})
+            index_columns, _ = table_indexes.get(row["index_name"], ([], None))
+            index_columns.append(row["column_name"])
+            table_indexes[row["index_name"]] = (index_columns, not int(row["non_unique"]))
+    finally:
+        cursor.close()
+
+    return Schema(columns, indexes, nullable)
+
+
+def get_schema(conn, refresh=False):
+    """
+    The cached schema, loaded through conn on first use or when refresh is set.
+
+    The connection is only used when the schema has to be (re)loaded. If it
+    cannot be read, an empty schema is returned (and not cached), so no
+    optional table or column is assumed to exist.
+    """
+    global _schema, _failed_at
+    with _lock:
+        if _schema is not None and not refresh:
+            return _schema
+        if _failed_at is not None and not refresh and time.monotonic() - _failed_at < RETRY_INTERVAL:
+            return Schema({}, {})
+        try:
+            _schema = load_schema(conn)
+        except Exception as e:
+            _failed_at = time.monotonic()
+            print(f"⚠️ Could not read the schema from information_schema, using the static column list: {e}")
+            return Schema({}, {})
+        _failed_at = None
+        print(f"Schema loaded: {len(_schema.columns)} tables ({', '.join(_schema.tables)})")
+        return _schema
+
+
+def ensure_index(cursor, table, name, columns):
+    """
+    Create an index unless the table already has one with that name.
+
+    MySQL has no CREATE INDEX IF NOT EXISTS, so migrations of existing databases
+    (whose tables CREATE TABLE IF NOT EXISTS leaves untouched) check first.
+    Returns True if the index was created.
+    """
+    cursor.execute(f"SHOW INDEX FROM {table} WHERE Key_name = %s", (name,))
+    if cursor.fetchall():
+        return False
+    cursor.execute(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})")
+    return True
+
+
+def invalidate_schema():
+    """Forget the cached schema; the next get_schema call reloads it."""
+    global _schema, _failed_at
+    with _lock:
+        _schema = None
+        _failed_at = None
+
+
+if __name__ == "__main__":
+    from database.mysql_data_handler import get_connection
+
+    conn = get_connection()
+    if not conn:
+        sys.exit(1)
+    try:
+        schema = get_schema(conn)
+    finally:
+        conn.close()
+    for table in schema.tables:
+        print(f"{table}: {', '.join(schema.columns[table])}")
+        for name, (columns, unique) in schema.table_indexes(table).items():
+            print(f"    {'unique ' if unique else ''}index {name} ({', '.join(columns)})")
@@ -94,48 +94,44 @@ const Dashboard = () => {
       setError(null);
       try {
         // Fetch all data in parallel
-        const [statsData, performanceData, branchData, reportsData, notificationsData] = await Promise.all([
-          api.getDashboardStats().catch(err => {
-            console.error("Error fetching stats:", err);
+        const [bundle, reportsData, notificationsData] = await Promise.all([
+          api.getDashboardBundle(['stats', 'performance', 'branchDistribution']).catch(err => {
+            console.error("Error fetching dashboard bundle:", err);
             return {
-              totalStudents: 0,
-              avgCGPA: 0,
-              reportsGenerated: 0,
-              atRiskStudents: 0,
-              branchCount: 0,
-              branches: []
-            };
-          }),
-          api.getPerformanceData().catch(err => {
-            console.error("Error fetching performance data:", err);
-            return {
-              labels: [],
-              datasets: [
-                {
-                  label: "Average SGPA",
-                  data: [],
-                  borderColor: "#4568dc",
-                  backgroundColor: "rgba(69, 104, 220, 0.2)",
-                  fill: true
-                },
-                {
-                  label: "Pass Percentage",
+              stats: {
+                totalStudents: 0,
+                avgCGPA: 0,
+                reportsGenerated: 0,
+                atRiskStudents: 0,
+                branchCount: 0,
+                branches: []
+              },
+              performance: {
+                labels: [],
+                datasets: [
+                  {
+                    label: "Average SGPA",
+                    data: [],
+                    borderColor: "#4568dc",
+                    backgroundColor: "rgba(69, 104, 220, 0.2)",
+                    fill: true
+                  },
+                  {
+                    label: "Pass Percentage",
+                    data: [],
+                    borderColor: "#b06ab3",
+                    backgroundColor: "rgba(176, 106, 179, 0.2)",
+                    fill: true
+                  }
+                ]
+              },
+              branchDistribution: {
+                labels: [],
+                datasets: [{
                   data: [],
-                  borderColor: "#b06ab3",
-                  backgroundColor: "rgba(176, 106, 179, 0.2)",
-                  fill: true
-                }
-              ]
-            };
-          }),
-          api.getBranchDistribution().catch(err => {
-            console.error("Error fetching branch distribution:", err);
-            return {
-              labels: [],
-              datasets: [{
-                data: [],
-                backgroundColor: []
-              }]
+                  backgroundColor: []
+                }]
+              }
             };
           }),
           api.getRecentReports().catch(err => {
@@ -148,9 +144,9 @@ const Dashboard = () => {
           })
         ]);
         
-        setStats(statsData);
-        setPerformanceData(performanceData);
-        setBranchDistribution(branchData);
+        setStats(bundle.stats);
+        setPerformanceData(bundle.performance);
+        setBranchDistribution(bundle.branchDistribution);
         setRecentReports(reportsData);
         setNotifications(notificationsData);
       } catch (error) {
@@ -84,10 +84,15 @@ apiClient.interceptors.response.use(
 // Create API object with methods
 const api = {
     // Student data
-    fetchStudents: (branch = '', semester = '') => {
+    fetchStudents: (branch = '', semester = '', options = {}) => {
         const params = new URLSearchParams();
         if (branch) params.append('branch', branch);
         if (semester) params.append('semester', semester);
+        // options: limit, cursor, sort, order, q, fields (array or comma-separated)
+        Object.entries(options).forEach(([key, value]) => {
+            if (value === undefined || value === null || value === '') return;
+            params.append(key, Array.isArray(value) ? value.join(',') : value);
+        });
         
         return apiClient.get(`/students?${params.toString()}`)
             .then(response => response.data);
@@ -97,6 +102,15 @@ const api = {
     getDashboardStats: () => {
         return apiClient.get('/dashboard/stats')
             .then(response => response.data);
+    },
+    
+    // Stats, performance and branch distribution in one request
+    getDashboardBundle: (fields = []) => {
+        const params = new URLSearchParams();
+        if (fields.length > 0) params.append('fields', fields.join(','));
+        
+        return apiClient.get(`/dashboard/bundle?${params.toString()}`)
+            .then(response => response.data);
     }
 };
 
@@ -136,6 +136,25 @@ CREATE TABLE IF NOT EXISTS grades (
     
     return sql_statements
 
+def generate_data_version_sql():
+    """Generate SQL that bumps the data_versions counters of the loaded tables.
+
+    The application validates cached responses and in-memory snapshots against
+    these counters, so loading the file makes it rebuild them.
+    """
+    values = ", ".join(f"('{table}', 1, UTC_TIMESTAMP())" for table in ('students', 'courses', 'grades'))
+    return [
+        """
+CREATE TABLE IF NOT EXISTS data_versions (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at DATETIME NOT NULL
+) ENGINE=InnoDB;
+        """.strip(),
+        f"INSERT INTO data_versions (name, version, updated_at) VALUES {values} "
+        f"ON DUPLICATE KEY UPDATE version = version + 1, updated_at = VALUES(updated_at);",
+    ]
+
 def main():
     import argparse
     
@@ -162,6 +181,7 @@ def main():
     student_sql = generate_student_sql(students)
     course_sql = generate_course_sql(courses)
     grade_sql = generate_grade_sql(grades)
+    version_sql = generate_data_version_sql()
     
     # Save SQL to file
     with open(args.output, 'w') as f:
@@ -183,6 +203,10 @@ def main():
         f.write("\n-- Insert Grade Data\n")
         for sql in grade_sql:
             f.write(sql + "\n")
+        
+        f.write("\n-- Bump Data Versions\n")
+        for sql in version_sql:
+            f.write(sql + "\n")
     
     print(f"\nMySQL SQL statements have been saved to '{args.output}'")
     print(f"Processed {len(students)} students, {len(courses)} courses, and {len(grades)} grades.")
@@ -0,0 +1,284 @@
+"""
+Per-student academic profile shared by the student report endpoints.
+
+The semester performance, cumulative performance, subject analysis, curriculum
+tracker, backlog management and internship tracking reports all start from the
+same student row and the same grades x courses rows. An AcademicProfile loads
+them once per registration number (two queries) and keeps them in a small LRU
+cache; backlog and internship rows are loaded on first use by the reports that
+need them.
+
+Entries are validated against the data_versions counters of the tables they
+were read from, so a bump of any of them (grade writes through the API, the
+setup scripts, or loading an SQL file from the CSV converters) reloads the
+profile. Grade writes also evict the affected students at once. Handlers get
+copies of the rows, so they can annotate them without touching the cache.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from database.mysql_data_handler import get_connection
+from database.data_versions import get_data_versions
+from database.grade_events import on_grades_changed
+
+# Tables a profile is read from; a change to any of them reloads it
+PROFILE_TABLES = ("students", "grades", "courses", "backlog_tracking", "internship_projects")
+
+MAX_ENTRIES = int(os.getenv("ACADEMIC_PROFILE_CACHE_SIZE", "2000"))
+# Upper bound on staleness for writes that do not bump data_versions
+TTL = float(os.getenv("ACADEMIC_PROFILE_TTL", "300"))
+
+
+def _copy(rows, fields=None):
+    if fields is None:
+        return [dict(row) for row in rows]
+    return [{field: row[field] for field in fields} for row in rows]
+
+
+class AcademicProfile:
+    """A student's row and grades, plus lazily loaded backlogs and internships."""
+
+    def __init__(self, reg_no, student, grades, versions):
+        self.reg_no = reg_no
+        self.versions = versions
+        self.loaded_at = time.monotonic()
+        self._student = student
+        self._grades = grades
+        self._backlogs = None
+        self._internships = None
+        self._lock = threading.Lock()
+
+    @property
+    def student(self):
+        return dict(self._student)
+
+    def grades(self, *fields, semester=None, result=None):
+        """
+        Copies of the student's grade rows, ordered by semester and course code.
+
+        fields selects and orders the keys of each row (all fields by default),
+        semester keeps one semester and result one result ("PASS"/"FAIL",
+        case-insensitive as in SQL).
+        """
+        rows = self._grades
+        if semester is not None:
+            try:
+                semester = int(semester)
+            except (TypeError, ValueError):
+                return []
+            rows = [row for row in rows if row["semester"] == semester]
+        if result is not None:
+            rows = [row for row in rows if (row["result"] or "").upper() == result.upper()]
+        return _copy(rows, fields or None)
+
+    def backlogs(self):
+        """Copies of the student's backlog_tracking rows joined to their courses."""
+        with self._lock:
+            if self._backlogs is None:
+                self._backlogs = self._query("""
+                    SELECT
+                        bt.id,
+                        bt.course_code,
+                        c.name AS course_name,
+                        c.credits,
+                        c.semester AS course_semester,
+                        bt.semester_failed,
+                        bt.attempts,
+                        bt.next_attempt_date,
+                        bt.status
+                    FROM backlog_tracking bt
+                    JOIN courses c ON bt.course_code = c.code
+                    WHERE bt.registration_number = %s
+                    ORDER BY bt.next_attempt_date, bt.semester_failed
+                """)
+            return _copy(self._backlogs)
+
+    def internships(self):
+        """Copies of the student's internship_projects rows, newest first."""
+        with self._lock:
+            if self._internships is None:
+                self._internships = self._query("""
+                    SELECT
+                        id,
+                        type,
+                        title,
+                        organization,
+                        start_date,
+                        end_date,
+                        credits,
+                        grade,
+                        grade_points,
+                        status,
+                        description
+                    FROM internship_projects
+                    WHERE registration_number = %s
+                    ORDER BY start_date DESC
+                """)
+            return _copy(self._internships)
+
+    def _query(self, sql):
+        conn = get_connection()
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        try:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(sql, (self.reg_no,))
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+        return rows
+
+
+def load_academic_profile(reg_no, versions=None):
+    """Read a student's profile from the database, or None if there is no such student."""
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT
+                registration_number AS registered_no,
+                name,
+                branch,
+                current_semester AS curr_semester
+            FROM students
+            WHERE registration_number = %s
+        """, (reg_no,))
+        student = cursor.fetchone()
+        if not student:
+            cursor.close()
+            return None
+
+        cursor.execute("""
+            SELECT
+                g.course_code,
+                c.name AS course_name,
+                c.credits,
+                c.subject_type,
+                c.course_type,
+                c.semester,
+                c.department,
+                g.grade,
+                g.grade_points,
+                g.credits_obtained,
+                g.result
+            FROM grades g
+            JOIN courses c ON g.course_code = c.code
+            WHERE g.registration_number = %s
+            ORDER BY c.semester, g.course_code
+        """, (reg_no,))
+        grades = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return AcademicProfile(reg_no, student, grades, versions)
+
+
+class AcademicProfileCache:
+    """
+    LRU cache of profiles keyed by registration number.
+
+    Concurrent requests for a student who is not cached wait for a single load.
+    A profile loaded while an invalidation happened is returned but not stored.
+    """
+
+    def __init__(self, max_entries=2000, ttl=300):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._loading = {}
+        self._invalidations = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def _fresh(self, profile, versions):
+        if profile is None or profile.versions != versions:
+            return False
+        return not self.ttl or time.monotonic() - profile.loaded_at < self.ttl
+
+    def _lookup(self, reg_no, versions):
+        profile = self._entries.get(reg_no)
+        if self._fresh(profile, versions):
+            self._entries.move_to_end(reg_no)
+            self._hits += 1
+            return profile
+        return None
+
+    def get(self, reg_no):
+        """The student's profile, loading it if needed; None if the student does not exist."""
+        # Read the versions first, so a change made during the load reloads next time
+        versions = get_data_versions(PROFILE_TABLES)
+        with self._lock:
+            profile = self._lookup(reg_no, versions)
+            if profile is not None:
+                return profile
+            load_lock = self._loading.setdefault(reg_no, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                profile = self._lookup(reg_no, versions)
+                if profile is not None:
+                    return profile
+                self._misses += 1
+                invalidations = self._invalidations
+            try:
+                profile = load_academic_profile(reg_no, versions)
+            finally:
+                with self._lock:
+                    self._loading.pop(reg_no, None)
+            with self._lock:
+                if profile is not None and invalidations == self._invalidations:
+                    self._entries[reg_no] = profile
+                    self._entries.move_to_end(reg_no)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self._evictions += 1
+            return profile
+
+    def invalidate(self, reg_nos=None):
+        """Drop some students' profiles, or all of them."""
+        with self._lock:
+            self._invalidations += 1
+            if reg_nos is None:
+                self._entries.clear()
+            else:
+                for reg_no in reg_nos:
+                    self._entries.pop(reg_no, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0.0,
+                "evictions": self._evictions,
+            }
+
+
+_cache = AcademicProfileCache(max_entries=MAX_ENTRIES, ttl=TTL)
+
+
+def get_academic_profile(reg_no):
+    return _cache.get(reg_no)
+
+
+def invalidate_academic_profiles(reg_nos=None):
+    _cache.invalidate(reg_nos)
+
+
+def get_academic_profile_stats():
+    return _cache.stats()
+
+
+@on_grades_changed
+def _evict_on_grade_change(reg_nos, course_codes):
+    _cache.invalidate(reg_nos)
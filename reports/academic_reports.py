@@ -1,12 +1,216 @@
 import os
 import traceback
-from flask import jsonify, request
-from database.mysql_data_handler import get_connection
+from itertools import groupby, islice
+from flask import Response, current_app, jsonify, request, stream_with_context
+from database.mysql_data_handler import get_connection, REG_NO_CHUNK_SIZE
+from database.rankings import get_student_standing, get_student_standings, get_semester_standing
+from reports.academic_profile import get_academic_profile
+from utils.response_cache import cached_response, STUDENT_REPORT_TTL
+from utils.conditional_get import conditional_get
+
+def build_cumulative_performance(student, all_records):
+    """
+    Cumulative performance of one student from their grade rows (ordered by semester).
+
+    Shared by the per-student endpoint and the batch export so both produce the
+    same structure.
+    """
+    # Group records by semester
+    semester_records = {}
+    for record in all_records:
+        sem = record['semester']
+        if sem not in semester_records:
+            semester_records[sem] = []
+        semester_records[sem].append(record)
+    
+    # Calculate SGPA for each semester
+    sgpa_by_semester = {}
+    for sem, records in semester_records.items():
+        total_credits = sum(record['credits'] for record in records)
+        total_grade_points = sum(record['grade_points'] * record['credits'] for record in records)
+        sgpa_by_semester[sem] = round(total_grade_points / total_credits, 2) if total_credits > 0 else 0
+    
+    # Calculate CGPA
+    all_credits = sum(record['credits'] for record in all_records)
+    all_grade_points = sum(record['grade_points'] * record['credits'] for record in all_records)
+    cgpa = round(all_grade_points / all_credits, 2) if all_credits > 0 else 0
+    
+    # Calculate credit accumulation
+    credits_by_semester = {}
+    cumulative_credits = 0
+    for sem in sorted(semester_records.keys()):
+        sem_credits = sum(record['credits'] for record in semester_records[sem])
+        cumulative_credits += sem_credits
+        credits_by_semester[sem] = {
+            "semester_credits": sem_credits,
+            "cumulative_credits": cumulative_credits
+        }
+    
+    # Track backlogs
+    backlogs_by_semester = {}
+    for sem, records in semester_records.items():
+        backlogs_by_semester[sem] = [
+            {
+                "course_code": record['course_code'],
+                "course_name": record['course_name'],
+                "credits": record['credits']
+            }
+            for record in records if record['result'] == 'FAIL'
+        ]
+    
+    # Calculate total pending backlogs
+    all_backlogs = []
+    for sem, backlogs in backlogs_by_semester.items():
+        all_backlogs.extend(backlogs)
+    
+    # Estimate graduation timeline
+    current_sem = student['curr_semester']
+    normal_completion_sem = 8  # Assuming B.Tech is 8 semesters
+    backlog_delay_semesters = len(all_backlogs) // 4  # Assuming a student can clear ~4 backlogs per semester
+    projected_completion_sem = max(current_sem, normal_completion_sem) + backlog_delay_semesters
+    
+    # Prepare data for CGPA trend visualization
+    semesters = sorted(sgpa_by_semester.keys())
+    sgpa_values = [sgpa_by_semester[sem] for sem in semesters]
+    
+    # Calculate running CGPA
+    running_cgpa = []
+    total_credits_so_far = 0
+    total_grade_points_so_far = 0
+    
+    for sem in semesters:
+        for record in semester_records[sem]:
+            total_credits_so_far += record['credits']
+            total_grade_points_so_far += record['grade_points'] * record['credits']
+    
+        if total_credits_so_far > 0:
+            running_cgpa.append(round(total_grade_points_so_far / total_credits_so_far, 2))
+        else:
+            running_cgpa.append(0)
+    
+    visual_data = {
+        "labels": [f"Semester {sem}" for sem in semesters],
+        "datasets": [
+            {
+                "label": "SGPA",
+                "data": sgpa_values,
+                "borderColor": "#4568dc",
+                "backgroundColor": "rgba(69, 104, 220, 0.2)",
+                "fill": False
+            },
+            {
+                "label": "CGPA",
+                "data": running_cgpa,
+                "borderColor": "#b06ab3",
+                "backgroundColor": "rgba(176, 106, 179, 0.2)",
+                "fill": False
+            }
+        ]
+    }
+    
+    # Prepare credit accumulation data
+    credit_data = {
+        "labels": [f"Semester {sem}" for sem in sorted(credits_by_semester.keys())],
+        "datasets": [
+            {
+                "label": "Cumulative Credits",
+                "data": [credits_by_semester[sem]["cumulative_credits"] for sem in sorted(credits_by_semester.keys())],
+                "borderColor": "#4caf50",
+                "backgroundColor": "rgba(76, 175, 80, 0.2)",
+                "fill": True
+            }
+        ]
+    }
+    
+    return {
+        "student": student,
+        "cgpa": cgpa,
+        "sgpaBySemseter": sgpa_by_semester,
+        "creditAccumulation": credits_by_semester,
+        "backlogsBySemester": backlogs_by_semester,
+        "totalPendingBacklogs": len(all_backlogs),
+        "projectedGraduation": {
+            "normalCompletionSemester": normal_completion_sem,
+            "projectedCompletionSemester": projected_completion_sem,
+            "backlogDelaySemesters": backlog_delay_semesters
+        },
+        "visualData": visual_data,
+        "creditData": credit_data
+    }
+
+
+# Grade rows read per round trip when a batch report streams a whole branch or semester
+BATCH_FETCH_SIZE = 5000
+
+_BATCH_GRADE_COLUMNS = """
+    c.semester,
+    g.course_code,
+    c.name AS course_name,
+    c.credits,
+    g.grade,
+    g.grade_points,
+    g.credits_obtained,
+    g.result
+"""
+
+
+def _fetch_rows(cursor):
+    """Iterate over a result set BATCH_FETCH_SIZE rows at a time."""
+    while True:
+        rows = cursor.fetchmany(BATCH_FETCH_SIZE)
+        if not rows:
+            return
+        yield from rows
+
+
+def _students_with_grades(rows):
+    """(student, grade rows) per student from rows of students LEFT JOIN grades, ordered by student."""
+    for reg_no, student_rows in groupby(rows, key=lambda row: row['registered_no']):
+        student_rows = list(student_rows)
+        first = student_rows[0]
+        student = {
+            "registered_no": reg_no,
+            "name": first['name'],
+            "branch": first['branch'],
+            "curr_semester": first['curr_semester'],
+        }
+        records = [
+            {
+                "registration_number": reg_no,
+                "semester": row['semester'],
+                "course_code": row['course_code'],
+                "course_name": row['course_name'],
+                "credits": row['credits'],
+                "grade": row['grade'],
+                "grade_points": row['grade_points'],
+                "credits_obtained": row['credits_obtained'],
+                "result": row['result'],
+            }
+            for row in student_rows if row['course_code'] is not None
+        ]
+        yield student, records
+
+
+def _cumulative_performance_lines(students_with_grades):
+    """NDJSON report lines, looking up the standings of REG_NO_CHUNK_SIZE students at a time."""
+    students_with_grades = iter(students_with_grades)
+    while True:
+        batch = list(islice(students_with_grades, REG_NO_CHUNK_SIZE))
+        if not batch:
+            return
+        standings = get_student_standings([student['registered_no'] for student, _ in batch])
+        for student, records in batch:
+            report = build_cumulative_performance(student, records)
+            report["ranking"] = standings[student['registered_no']]
+            yield current_app.json.dumps(report) + "\n"
+
 
 def register_academic_report_routes(app):
     """Register all academic report routes with the Flask app."""
     
     @app.route('/api/reports/semester-performance/<reg_no>', methods=['GET'])
+    @conditional_get("students", "grades", "courses", "class_averages")
+    @cached_response(STUDENT_REPORT_TTL, tags=lambda reg_no: [f"student:{reg_no}", "class_averages", "rankings"])
     def get_semester_performance(reg_no):
         try:
             semester = request.args.get('semester', '')
@@ -15,45 +219,17 @@ def register_academic_report_routes(app):
             if not semester:
                 return jsonify({"error": "Semester parameter is required"}), 400
                 
-            conn = get_connection()
-            if not conn:
-                return jsonify({"error": "Database connection failed"}), 500
-                
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get student data
-            cursor.execute("""
-                SELECT 
-                    registration_number AS registered_no,
-                    name,
-                    branch,
-                    current_semester AS curr_semester
-                FROM students
-                WHERE registration_number = %s
-            """, (reg_no,))
-            
-            student = cursor.fetchone()
-            if not student:
+            profile = get_academic_profile(reg_no)
+            if not profile:
                 return jsonify({"error": "Student not found"}), 404
-                
+            student = profile.student
+            
             # Get semester records
-            cursor.execute("""
-                SELECT 
-                    g.course_code,
-                    c.name AS course_name,
-                    c.credits,
-                    c.subject_type,
-                    c.course_type,
-                    g.grade,
-                    g.grade_points,
-                    g.credits_obtained,
-                    g.result
-                FROM grades g
-                JOIN courses c ON g.course_code = c.code
-                WHERE g.registration_number = %s AND c.semester = %s
-            """, (reg_no, semester))
-            
-            semester_records = cursor.fetchall()
+            semester_records = profile.grades(
+                "course_code", "course_name", "credits", "subject_type", "course_type",
+                "grade", "grade_points", "credits_obtained", "result",
+                semester=semester
+            )
             
             # Calculate SGPA
             total_credits = sum(record['credits'] for record in semester_records) if semester_records else 0
@@ -64,6 +240,11 @@ def register_academic_report_routes(app):
             failed_subjects = [record for record in semester_records if record['result'] == 'FAIL']
             
             # Get class average for comparison
+            conn = get_connection()
+            if not conn:
+                return jsonify({"error": "Database connection failed"}), 500
+                
+            cursor = conn.cursor(dictionary=True)
             cursor.execute("""
                 SELECT 
                     ca.course_code,
@@ -74,6 +255,8 @@ def register_academic_report_routes(app):
             """, (student['branch'], semester, academic_year))
             
             class_averages = cursor.fetchall()
+            cursor.close()
+            conn.close()
             
             # Convert to dictionary for easier lookup
             class_avg_dict = {avg['course_code']: avg for avg in class_averages}
@@ -122,9 +305,6 @@ def register_academic_report_routes(app):
                 ]
             }
             
-            cursor.close()
-            conn.close()
-            
             return jsonify({
                 "student": student,
                 "semester": semester,
@@ -133,7 +313,8 @@ def register_academic_report_routes(app):
                 "sgpa": sgpa,
                 "failedSubjects": failed_subjects,
                 "recommendations": recommendations,
-                "visualData": visual_data
+                "visualData": visual_data,
+                "ranking": get_semester_standing(reg_no, semester)
             })
             
         except Exception as e:
@@ -142,222 +323,180 @@ def register_academic_report_routes(app):
             return jsonify({"error": str(e)}), 500
 
     @app.route('/api/reports/cumulative-performance/<reg_no>', methods=['GET'])
+    @conditional_get("students", "grades", "courses")
+    @cached_response(STUDENT_REPORT_TTL, tags=lambda reg_no: [f"student:{reg_no}", "rankings"])
     def get_cumulative_performance(reg_no):
         try:
-            conn = get_connection()
-            if not conn:
-                return jsonify({"error": "Database connection failed"}), 500
-                
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get student data
-            cursor.execute("""
-                SELECT 
-                    registration_number AS registered_no,
-                    name,
-                    branch,
-                    current_semester AS curr_semester
-                FROM students
-                WHERE registration_number = %s
-            """, (reg_no,))
-            
-            student = cursor.fetchone()
-            if not student:
+            profile = get_academic_profile(reg_no)
+            if not profile:
                 return jsonify({"error": "Student not found"}), 404
-                
-            # Get all semester records grouped by semester
-            cursor.execute("""
-                SELECT 
-                    c.semester,
-                    g.course_code,
-                    c.name AS course_name,
-                    c.credits,
-                    g.grade,
-                    g.grade_points,
-                    g.credits_obtained,
-                    g.result
-                FROM grades g
-                JOIN courses c ON g.course_code = c.code
-                WHERE g.registration_number = %s
-                ORDER BY c.semester
-            """, (reg_no,))
-            
-            all_records = cursor.fetchall()
-            
-            # Group records by semester
-            semester_records = {}
-            for record in all_records:
-                sem = record['semester']
-                if sem not in semester_records:
-                    semester_records[sem] = []
-                semester_records[sem].append(record)
-            
-            # Calculate SGPA for each semester
-            sgpa_by_semester = {}
-            for sem, records in semester_records.items():
-                total_credits = sum(record['credits'] for record in records)
-                total_grade_points = sum(record['grade_points'] * record['credits'] for record in records)
-                sgpa_by_semester[sem] = round(total_grade_points / total_credits, 2) if total_credits > 0 else 0
-            
-            # Calculate CGPA
-            all_credits = sum(record['credits'] for record in all_records)
-            all_grade_points = sum(record['grade_points'] * record['credits'] for record in all_records)
-            cgpa = round(all_grade_points / all_credits, 2) if all_credits > 0 else 0
-            
-            # Calculate credit accumulation
-            credits_by_semester = {}
-            cumulative_credits = 0
-            for sem in sorted(semester_records.keys()):
-                sem_credits = sum(record['credits'] for record in semester_records[sem])
-                cumulative_credits += sem_credits
-                credits_by_semester[sem] = {
-                    "semester_credits": sem_credits,
-                    "cumulative_credits": cumulative_credits
-                }
-            
-            # Track backlogs
-            backlogs_by_semester = {}
-            for sem, records in semester_records.items():
-                backlogs_by_semester[sem] = [
-                    {
-                        "course_code": record['course_code'],
-                        "course_name": record['course_name'],
-                        "credits": record['credits']
-                    }
-                    for record in records if record['result'] == 'FAIL'
-                ]
+            student = profile.student
             
-            # Calculate total pending backlogs
-            all_backlogs = []
-            for sem, backlogs in backlogs_by_semester.items():
-                all_backlogs.extend(backlogs)
-            
-            # Estimate graduation timeline
-            current_sem = student['curr_semester']
-            normal_completion_sem = 8  # Assuming B.Tech is 8 semesters
-            backlog_delay_semesters = len(all_backlogs) // 4  # Assuming a student can clear ~4 backlogs per semester
-            projected_completion_sem = max(current_sem, normal_completion_sem) + backlog_delay_semesters
-            
-            # Prepare data for CGPA trend visualization
-            semesters = sorted(sgpa_by_semester.keys())
-            sgpa_values = [sgpa_by_semester[sem] for sem in semesters]
-            
-            # Calculate running CGPA
-            running_cgpa = []
-            total_credits_so_far = 0
-            total_grade_points_so_far = 0
-            
-            for sem in semesters:
-                for record in semester_records[sem]:
-                    total_credits_so_far += record['credits']
-                    total_grade_points_so_far += record['grade_points'] * record['credits']
-                
-                if total_credits_so_far > 0:
-                    running_cgpa.append(round(total_grade_points_so_far / total_credits_so_far, 2))
-                else:
-                    running_cgpa.append(0)
+            # All semester records, ordered by semester
+            records = profile.grades(
+                "semester", "course_code", "course_name", "credits",
+                "grade", "grade_points", "credits_obtained", "result"
+            )
             
-            visual_data = {
-                "labels": [f"Semester {sem}" for sem in semesters],
-                "datasets": [
-                    {
-                        "label": "SGPA",
-                        "data": sgpa_values,
-                        "borderColor": "#4568dc",
-                        "backgroundColor": "rgba(69, 104, 220, 0.2)",
-                        "fill": False
-                    },
-                    {
-                        "label": "CGPA",
-                        "data": running_cgpa,
-                        "borderColor": "#b06ab3",
-                        "backgroundColor": "rgba(176, 106, 179, 0.2)",
-                        "fill": False
-                    }
-                ]
-            }
+            report = build_cumulative_performance(student, records)
+            report["ranking"] = get_student_standing(reg_no)
             
-            # Prepare credit accumulation data
-            credit_data = {
-                "labels": [f"Semester {sem}" for sem in sorted(credits_by_semester.keys())],
-                "datasets": [
-                    {
-                        "label": "Cumulative Credits",
-                        "data": [credits_by_semester[sem]["cumulative_credits"] for sem in sorted(credits_by_semester.keys())],
-                        "borderColor": "#4caf50",
-                        "backgroundColor": "rgba(76, 175, 80, 0.2)",
-                        "fill": True
-                    }
-                ]
-            }
-            
-            cursor.close()
-            conn.close()
-            
-            return jsonify({
-                "student": student,
-                "cgpa": cgpa,
-                "sgpaBySemseter": sgpa_by_semester,
-                "creditAccumulation": credits_by_semester,
-                "backlogsBySemester": backlogs_by_semester,
-                "totalPendingBacklogs": len(all_backlogs),
-                "projectedGraduation": {
-                    "normalCompletionSemester": normal_completion_sem,
-                    "projectedCompletionSemester": projected_completion_sem,
-                    "backlogDelaySemesters": backlog_delay_semesters
-                },
-                "visualData": visual_data,
-                "creditData": credit_data
-            })
+            return jsonify(report)
             
         except Exception as e:
             print(f"Error generating cumulative performance report: {e}")
             traceback.print_exc()
             return jsonify({"error": str(e)}), 500
 
-    @app.route('/api/reports/subject-analysis/<reg_no>', methods=['GET'])
-    def get_subject_analysis(reg_no):
+    @app.route('/api/reports/cumulative-performance', methods=['GET'])
+    @conditional_get("students", "grades", "courses")
+    def get_cumulative_performance_batch():
+        """
+        Cumulative performance for many students, streamed as NDJSON.
+
+        Students are selected by any combination of branch, semester (current
+        semester) and students (comma-separated registration numbers). Each line
+        is the same object /api/reports/cumulative-performance/<reg_no> returns;
+        requested registration numbers that do not exist get an error line.
+
+        With only branch and/or semester, the students and their grades are read
+        with one query, fetched BATCH_FETCH_SIZE rows at a time; requested
+        registration numbers are read with one grades query per
+        REG_NO_CHUNK_SIZE students. Standings are looked up once per
+        REG_NO_CHUNK_SIZE students. Each line is still assembled by
+        build_cumulative_performance, the builder of the single-student endpoint,
+        so both stay identical; it is one pass over that student's rows.
+        """
         try:
+            branch = request.args.get('branch', '')
+            semester = request.args.get('semester', '')
+            students_param = request.args.get('students', '')
+            requested = list(dict.fromkeys(s.strip() for s in students_param.split(',') if s.strip()))
+
+            if not (branch or semester or requested):
+                return jsonify({"error": "At least one of branch, semester or students is required"}), 400
+            if semester and not semester.isdigit():
+                return jsonify({"error": "semester must be a number"}), 400
+
+            where_clauses = []
+            params = []
+            if branch:
+                where_clauses.append("s.branch = %s")
+                params.append(branch)
+            if semester:
+                where_clauses.append("s.current_semester = %s")
+                params.append(int(semester))
+            where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
+
+            students = []
+            if requested:
+                conn = get_connection()
+                if not conn:
+                    return jsonify({"error": "Database connection failed"}), 500
+
+                cursor = conn.cursor(dictionary=True)
+                student_sql = f"""
+                    SELECT 
+                        s.registration_number AS registered_no,
+                        s.name,
+                        s.branch,
+                        s.current_semester AS curr_semester
+                    FROM students s
+                    WHERE {where_sql}
+                """
+                for start in range(0, len(requested), REG_NO_CHUNK_SIZE):
+                    chunk = requested[start:start + REG_NO_CHUNK_SIZE]
+                    cursor.execute(
+                        student_sql + f" AND s.registration_number IN ({', '.join(['%s'] * len(chunk))})",
+                        params + chunk
+                    )
+                    students.extend(cursor.fetchall())
+                students.sort(key=lambda student: student['registered_no'])
+                
+                cursor.close()
+                conn.close()
+        except Exception as e:
+            print(f"Error generating batch cumulative performance report: {e}")
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
+
+        def requested_with_grades(cursor):
+            for start in range(0, len(students), REG_NO_CHUNK_SIZE):
+                chunk = students[start:start + REG_NO_CHUNK_SIZE]
+                cursor.execute(f"""
+                    SELECT 
+                        g.registration_number,
+                        {_BATCH_GRADE_COLUMNS}
+                    FROM grades g
+                    JOIN courses c ON g.course_code = c.code
+                    WHERE g.registration_number IN ({', '.join(['%s'] * len(chunk))})
+                    ORDER BY g.registration_number, c.semester, g.course_code
+                """, [student['registered_no'] for student in chunk])
+                records = {
+                    reg_no: list(rows)
+                    for reg_no, rows in groupby(cursor.fetchall(), key=lambda row: row['registration_number'])
+                }
+                for student in chunk:
+                    yield student, records.get(student['registered_no'], [])
+
+        def filtered_with_grades(cursor):
+            cursor.execute(f"""
+                SELECT 
+                    s.registration_number AS registered_no,
+                    s.name,
+                    s.branch,
+                    s.current_semester AS curr_semester,
+                    {_BATCH_GRADE_COLUMNS}
+                FROM students s
+                LEFT JOIN (grades g JOIN courses c ON g.course_code = c.code)
+                    ON g.registration_number = s.registration_number
+                WHERE {where_sql}
+                ORDER BY s.registration_number, c.semester, g.course_code
+            """, params)
+            yield from _students_with_grades(_fetch_rows(cursor))
+
+        def generate():
+            # Own connection, so it is only held while the body is being sent
             conn = get_connection()
             if not conn:
-                return jsonify({"error": "Database connection failed"}), 500
-                
+                yield current_app.json.dumps({"error": "Database connection failed"}) + "\n"
+                return
             cursor = conn.cursor(dictionary=True)
-            
-            # Get student data
-            cursor.execute("""
-                SELECT 
-                    registration_number AS registered_no,
-                    name,
-                    branch,
-                    current_semester AS curr_semester
-                FROM students
-                WHERE registration_number = %s
-            """, (reg_no,))
-            
-            student = cursor.fetchone()
-            if not student:
+            try:
+                if requested:
+                    yield from _cumulative_performance_lines(requested_with_grades(cursor))
+                    found = {student['registered_no'] for student in students}
+                    for reg_no in requested:
+                        if reg_no not in found:
+                            yield current_app.json.dumps({"registered_no": reg_no, "error": "Student not found"}) + "\n"
+                else:
+                    yield from _cumulative_performance_lines(filtered_with_grades(cursor))
+            except Exception as e:
+                # Headers are already sent; report the failure as the last line
+                print(f"Error streaming batch cumulative performance report: {e}")
+                traceback.print_exc()
+                yield current_app.json.dumps({"error": str(e)}) + "\n"
+            finally:
+                cursor.close()
+                conn.close()
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    @app.route('/api/reports/subject-analysis/<reg_no>', methods=['GET'])
+    @conditional_get("students", "grades", "courses")
+    @cached_response(STUDENT_REPORT_TTL, tags=lambda reg_no: [f"student:{reg_no}"])
+    def get_subject_analysis(reg_no):
+        try:
+            profile = get_academic_profile(reg_no)
+            if not profile:
                 return jsonify({"error": "Student not found"}), 404
-                
+            student = profile.student
+            
             # Get all subject records with categorization
-            cursor.execute("""
-                SELECT 
-                    g.course_code,
-                    c.name AS course_name,
-                    c.credits,
-                    c.subject_type,
-                    c.course_type,
-                    c.semester,
-                    c.department,
-                    g.grade,
-                    g.grade_points,
-                    g.result
-                FROM grades g
-                JOIN courses c ON g.course_code = c.code
-                WHERE g.registration_number = %s
-            """, (reg_no,))
-            
-            all_subjects = cursor.fetchall()
+            all_subjects = profile.grades(
+                "course_code", "course_name", "credits", "subject_type", "course_type",
+                "semester", "department", "grade", "grade_points", "result"
+            )
             
             # Group by subject type (core vs elective)
             core_subjects = [subj for subj in all_subjects if subj['subject_type'] == 'core']
@@ -474,9 +613,6 @@ def register_academic_report_routes(app):
                 ]
             }
             
-            cursor.close()
-            conn.close()
-            
             return jsonify({
                 "student": student,
                 "subjectTypeAnalysis": {
@@ -0,0 +1,119 @@
+import os
+import traceback
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required
+from auth.decorators import role_required
+from database.mysql_data_handler import get_connection
+from database.class_averages import rebuild_class_averages, refresh_class_averages
+from database.rankings import get_ranking_index, METRICS
+from utils.response_cache import cached_response, DASHBOARD_TTL, STUDENT_REPORT_TTL
+from utils.conditional_get import conditional_get
+
+LEADERBOARD_DEFAULT_N = 10
+LEADERBOARD_MAX_N = int(os.getenv("LEADERBOARD_MAX_N", "100"))
+
+def register_analytics_routes(app):
+    """Register the class-level analytics routes with the Flask app."""
+
+    @app.route('/api/analytics/class-averages', methods=['GET'])
+    @conditional_get("class_averages")
+    @cached_response(STUDENT_REPORT_TTL, tags=["class_averages"])
+    def get_class_averages():
+        """Class averages, optionally filtered by branch, semester and academic_year."""
+        try:
+            where_clauses = []
+            params = []
+            for arg, column in (("branch", "branch"), ("semester", "semester"), ("academic_year", "academic_year")):
+                value = request.args.get(arg, '')
+                if value:
+                    where_clauses.append(f"{column} = %s")
+                    params.append(value)
+
+            conn = get_connection()
+            if not conn:
+                return jsonify({"error": "Database connection failed"}), 500
+
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(f"""
+                SELECT
+                    branch,
+                    semester,
+                    course_code,
+                    academic_year,
+                    average_grade_points,
+                    pass_percentage
+                FROM class_averages
+                WHERE {" AND ".join(where_clauses) if where_clauses else "1=1"}
+                ORDER BY branch, semester, academic_year, course_code
+            """, params)
+            averages = cursor.fetchall()
+            cursor.close()
+            conn.close()
+
+            return jsonify({"data": averages})
+
+        except Exception as e:
+            print(f"Error fetching class averages: {e}")
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/analytics/class-averages/refresh', methods=['POST'])
+    @jwt_required()
+    @role_required(['hod', 'principal'])
+    def refresh_class_averages_route():
+        """Recompute class averages for the given courses, or all of them when none are given."""
+        try:
+            data = request.get_json(silent=True) or {}
+            courses = data.get('courses', [])
+            if isinstance(courses, str):
+                courses = [c for c in courses.split(',') if c]
+            if not isinstance(courses, list):
+                return jsonify({"error": "courses must be a list of course codes"}), 400
+
+            if courses:
+                rows = refresh_class_averages(courses)
+                return jsonify({"courses": sorted(set(courses)), "rows": rows})
+            return jsonify({"courses": "all", "rows": rebuild_class_averages()})
+
+        except Exception as e:
+            print(f"Error refreshing class averages: {e}")
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/analytics/leaderboard', methods=['GET'])
+    @conditional_get("students", "grades", "courses")
+    @cached_response(DASHBOARD_TTL, tags=["rankings"])
+    def get_leaderboard():
+        """
+        Top and bottom n students of a (branch, semester) cohort by sgpa or cgpa.
+
+        For sgpa the cohort is the branch's students graded in that semester, for
+        cgpa the branch's students currently in that semester.
+        """
+        try:
+            branch = request.args.get('branch', '')
+            semester = request.args.get('semester', '')
+            metric = request.args.get('metric', 'sgpa').lower()
+            n = request.args.get('n', str(LEADERBOARD_DEFAULT_N))
+
+            if not branch or not semester:
+                return jsonify({"error": "Branch and semester parameters are required"}), 400
+            if not semester.isdigit():
+                return jsonify({"error": "semester must be a number"}), 400
+            if metric not in METRICS:
+                return jsonify({"error": f"metric must be one of: {', '.join(METRICS)}"}), 400
+            if not n.isdigit() or not 1 <= int(n) <= LEADERBOARD_MAX_N:
+                return jsonify({"error": f"n must be between 1 and {LEADERBOARD_MAX_N}"}), 400
+
+            board = get_ranking_index().leaderboard(metric, branch, int(semester), int(n))
+            return jsonify({
+                "branch": branch,
+                "semester": int(semester),
+                "metric": metric,
+                **(board or {"cohortSize": 0, "top": [], "bottom": []})
+            })
+
+        except Exception as e:
+            print(f"Error generating leaderboard: {e}")
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
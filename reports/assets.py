@@ -0,0 +1,205 @@
+import base64
+import io
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+REPO_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+
+# Photo extensions in lookup priority order
+PHOTO_EXTENSIONS = ("jpg", "jpeg", "png")
+
+
+class AssetCache:
+    """
+    In-memory cache of the images embedded in student reports.
+
+    The header image is read and base64-encoded once. The student photo directory
+    is indexed once and re-indexed whenever its mtime changes (a photo added,
+    removed or renamed), so a lookup costs a stat of the directory and one of the
+    student's file instead of probing every extension. The file stat catches a
+    photo overwritten in place, which leaves the directory mtime unchanged.
+    Photos are downscaled to the printed size, re-encoded as JPEG and kept as
+    ready-to-embed <img> tags in a bounded LRU.
+    """
+
+    def __init__(self, photo_dir, header_path, max_photo_size=(414, 532), jpeg_quality=80, max_photos=5000):
+        self.photo_dir = photo_dir
+        self.header_path = header_path
+        self.max_photo_size = tuple(max_photo_size)
+        self.jpeg_quality = int(jpeg_quality)
+        self.max_photos = max(1, int(max_photos))
+
+        self._lock = threading.Lock()
+        self._header_html = None
+        self._placeholder_html = None
+        self._photo_index = {}
+        self._photo_dir_mtime = None
+        self._photos = OrderedDict()  # reg_no -> (signature, html)
+
+        self._hits = 0
+        self._misses = 0
+        self._bytes_saved = 0
+
+    def header_image_html(self):
+        """Return the header <img> tag, or an empty string if the image is missing."""
+        with self._lock:
+            if self._header_html is not None:
+                return self._header_html
+
+        header_html = ""
+        if os.path.exists(self.header_path):
+            try:
+                with open(self.header_path, "rb") as img_file:
+                    header_image_base64 = base64.b64encode(img_file.read()).decode('utf-8')
+                header_html = f'<img src="data:image/png;base64,{header_image_base64}" alt="College Header" class="header-image">'
+                print(f"Header image loaded from {self.header_path}")
+            except Exception as e:
+                print(f"Error loading header image: {e}")
+        else:
+            print(f"Header image not found at {self.header_path}")
+
+        with self._lock:
+            self._header_html = header_html
+        return header_html
+
+    def _refresh_index(self):
+        """Re-index the photo directory if it changed since the last lookup. Caller holds the lock."""
+        try:
+            mtime = os.stat(self.photo_dir).st_mtime_ns
+        except OSError:
+            self._photo_index = {}
+            self._photo_dir_mtime = None
+            return
+        if mtime == self._photo_dir_mtime:
+            return
+
+        index = {}
+        for entry in os.scandir(self.photo_dir):
+            reg_no, _, ext = entry.name.rpartition(".")
+            ext = ext.lower()
+            if not reg_no or ext not in PHOTO_EXTENSIONS or not entry.is_file():
+                continue
+            current = index.get(reg_no)
+            if current is None or PHOTO_EXTENSIONS.index(ext) < PHOTO_EXTENSIONS.index(current[1]):
+                stat = entry.stat()
+                index[reg_no] = (entry.path, ext, (stat.st_mtime_ns, stat.st_size))
+        self._photo_index = index
+        self._photo_dir_mtime = mtime
+
+    def _lookup(self, reg_no):
+        """The student's index entry with the file's current signature. Caller holds the lock."""
+        self._refresh_index()
+        entry = self._photo_index.get(reg_no)
+        if entry is None:
+            return None
+        path, ext, signature = entry
+        try:
+            stat = os.stat(path)
+        except OSError:
+            # Removed since the directory was indexed
+            self._photo_dir_mtime = None
+            self._refresh_index()
+            return self._photo_index.get(reg_no)
+        current = (stat.st_mtime_ns, stat.st_size)
+        if current != signature:
+            entry = self._photo_index[reg_no] = (path, ext, current)
+        return entry
+
+    def photo_signature(self, reg_no):
+        """Identify the photo currently used for a student, or None if there is none."""
+        with self._lock:
+            entry = self._lookup(reg_no)
+        return None if entry is None else (os.path.basename(entry[0]), entry[2])
+
+    def student_photo_html(self, reg_no):
+        """Return the student's photo as an <img> tag, or the placeholder if there is none."""
+        with self._lock:
+            entry = self._lookup(reg_no)
+            if entry is None:
+                return self._placeholder()
+            cached = self._photos.get(reg_no)
+            if cached is not None and cached[0] == entry[2]:
+                self._photos.move_to_end(reg_no)
+                self._hits += 1
+                return cached[1]
+            self._misses += 1
+
+        path, ext, signature = entry
+        try:
+            mime, data, saved = self._encode_photo(path, ext)
+        except Exception as e:
+            print(f"Error loading student photo {path}: {e}")
+            return self._placeholder()
+
+        photo_html = f'<img src="data:{mime};base64,{data}" alt="Student Photo" style="width:100%;height:100%;object-fit:cover;">'
+        with self._lock:
+            self._photos[reg_no] = (signature, photo_html)
+            self._photos.move_to_end(reg_no)
+            self._bytes_saved += saved
+            while len(self._photos) > self.max_photos:
+                self._photos.popitem(last=False)
+        return photo_html
+
+    def _encode_photo(self, path, ext):
+        """Downscale and re-encode a photo; keeps the original if that is smaller."""
+        with open(path, "rb") as img_file:
+            original = img_file.read()
+
+        with Image.open(io.BytesIO(original)) as image:
+            image.thumbnail(self.max_photo_size)
+            if image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=self.jpeg_quality, optimize=True)
+        encoded = buffer.getvalue()
+
+        if len(encoded) < len(original):
+            return "image/jpeg", base64.b64encode(encoded).decode("utf-8"), len(original) - len(encoded)
+        mime = "image/png" if ext == "png" else "image/jpeg"
+        return mime, base64.b64encode(original).decode("utf-8"), 0
+
+    def _placeholder(self):
+        if self._placeholder_html is None:
+            # Imported lazily to avoid a circular import with the PDF generator
+            from reports.generate_pdf_with_styles import generate_photo_placeholder
+            self._placeholder_html = generate_photo_placeholder()
+        return self._placeholder_html
+
+    def stats(self):
+        with self._lock:
+            return {
+                "indexed_photos": len(self._photo_index),
+                "cached_photos": len(self._photos),
+                "hits": self._hits,
+                "misses": self._misses,
+                "photo_bytes_saved": self._bytes_saved,
+                "header_loaded": bool(self._header_html),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_asset_cache():
+    """Return the process-wide asset cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AssetCache(
+                os.getenv("STUDENT_PHOTO_DIR", os.path.join(REPO_ROOT, "templates", "images", "students")),
+                os.getenv("HEADER_IMAGE_PATH", os.path.join(REPO_ROOT, "templates", "images", "header.png")),
+                max_photo_size=(
+                    int(os.getenv("PHOTO_MAX_WIDTH", "414")),
+                    int(os.getenv("PHOTO_MAX_HEIGHT", "532")),
+                ),
+                jpeg_quality=int(os.getenv("PHOTO_JPEG_QUALITY", "80")),
+            )
+        return _cache
+
+
+def get_asset_cache_stats():
+    """Asset cache metrics, or None if no report has been built yet."""
+    return _cache.stats() if _cache is not None else None
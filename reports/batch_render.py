@@ -0,0 +1,129 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Worker processes are spawned rather than forked: the parent holds threads
+# (Flask, the browser pool, the DB pool) that must not be duplicated mid-flight.
+_mp_context = multiprocessing.get_context("spawn")
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def default_worker_count():
+    """Number of render processes in the shared pool, and the most a batch may use."""
+    return max(1, int(os.getenv("PDF_RENDER_WORKERS", str(os.cpu_count() or 1))))
+
+
+def parse_worker_count(value):
+    """
+    Validate a caller-supplied workers value (query string or JSON body).
+
+    Returns None when no value was given, otherwise an int between 1 and
+    default_worker_count(). Raises ValueError for anything else.
+    """
+    if value is None or value == "":
+        return None
+    limit = default_worker_count()
+    if isinstance(value, bool) or not str(value).strip().isdigit() or not 1 <= int(value) <= limit:
+        raise ValueError(f"workers must be an integer between 1 and {limit}")
+    return int(value)
+
+
+def _init_worker():
+    """Give each worker process its own single warm browser."""
+    os.environ["PDF_BROWSER_POOL_SIZE"] = "1"
+    from reports.browser_pool import get_browser_pool
+    get_browser_pool().start()
+
+
+def _render_task(html_path, pdf_path, postprocess=None):
+    from reports.browser_pool import render_pdf
+    render_pdf(html_path, pdf_path)
+    if postprocess is not None:
+        return postprocess(pdf_path)
+    return pdf_path
+
+
+def _get_executor():
+    """Return the shared process pool, created once with default_worker_count() processes."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=default_worker_count(), mp_context=_mp_context, initializer=_init_worker
+            )
+        return _executor
+
+
+def render_batch(jobs, workers=None, postprocess=None, progress=None):
+    """
+    Render many HTML files to PDF in parallel and return the output paths in job order.
+
+    Parameters:
+        jobs (iterable): (html_path, pdf_path) pairs. May be a generator; each job is
+            dispatched as soon as it is produced so HTML building overlaps rendering.
+        workers (int): Most renders this batch keeps in flight in the shared pool of
+            worker processes, each with its own warm browser. Clamped to
+            1..default_worker_count() (PDF_RENDER_WORKERS or the CPU count), which is
+            also the default. 1 renders in-process.
+        postprocess (callable): Optional picklable function run in the worker on each
+            rendered PDF path; its return value replaces the path in the result.
+        progress (callable): Optional callback receiving the number of jobs finished
+            so far, invoked as each render completes (possibly from another thread).
+
+    Returns:
+        list: One path per job, in the same order as ``jobs``.
+    """
+    workers = min(max(1, int(workers or default_worker_count())), default_worker_count())
+
+    completed = [0]
+    completed_lock = threading.Lock()
+
+    def _on_done(_future):
+        with completed_lock:
+            completed[0] += 1
+            done = completed[0]
+        progress(done)
+
+    if workers <= 1:
+        from reports.browser_pool import get_browser_pool
+        pool = get_browser_pool()
+        futures = []
+        for html_path, pdf_path in jobs:
+            future = pool.submit(html_path, pdf_path)
+            if progress is not None:
+                future.add_done_callback(_on_done)
+            futures.append((future, pdf_path))
+        results = []
+        for future, pdf_path in futures:
+            future.result()
+            results.append(postprocess(pdf_path) if postprocess is not None else pdf_path)
+        return results
+
+    # The pool is shared by all requests; the semaphore caps this batch's share of it
+    executor = _get_executor()
+    in_flight = threading.BoundedSemaphore(workers)
+    futures = []
+    for html_path, pdf_path in jobs:
+        in_flight.acquire()
+        try:
+            future = executor.submit(_render_task, html_path, pdf_path, postprocess)
+        except BaseException:
+            in_flight.release()
+            raise
+        future.add_done_callback(lambda _future: in_flight.release())
+        if progress is not None:
+            future.add_done_callback(_on_done)
+        futures.append(future)
+    return [future.result() for future in futures]
+
+
+def shutdown_render_workers():
+    """Stop the worker processes, e.g. on application shutdown."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
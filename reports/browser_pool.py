@@ -0,0 +1,292 @@
+import atexit
+import os
+import queue
+import threading
+import time
+import traceback
+from concurrent.futures import Future
+from playwright.sync_api import sync_playwright
+
+
+class _RenderJob:
+    __slots__ = ("html_path", "pdf_path", "future", "enqueued_at")
+
+    def __init__(self, html_path, pdf_path):
+        self.html_path = html_path
+        self.pdf_path = pdf_path
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BrowserPool:
+    """
+    Pool of long-lived headless Chromium instances for HTML to PDF rendering.
+
+    Playwright's sync API is bound to the thread that started it, so each of the
+    ``size`` workers is a dedicated thread that owns one warm browser, context and
+    page and reuses them between renders. A browser is recycled after
+    ``max_renders`` renders, or straight away if a render fails (e.g. a crash), and
+    the failed render is retried once on the fresh browser.
+
+    A worker only takes jobs while it has a live browser. If Playwright or
+    Chromium cannot be started it retries with exponential backoff (from
+    ``launch_backoff`` up to ``launch_backoff_max`` seconds), leaving the queue to
+    healthy workers; queued jobs are failed only when no worker has a browser or
+    is launching one, so callers are not left blocked.
+    """
+
+    def __init__(self, size=2, max_renders=200, launch_backoff=1.0, launch_backoff_max=60.0):
+        self.size = max(1, int(size))
+        self.max_renders = max(1, int(max_renders))
+        self.launch_backoff = max(0.1, float(launch_backoff))
+        self.launch_backoff_max = max(self.launch_backoff, float(launch_backoff_max))
+
+        self._jobs = queue.Queue()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._states = {}
+        self._started = False
+        self._lock = threading.Lock()
+
+        # Metrics
+        self._in_flight = 0
+        self._renders = 0
+        self._failures = 0
+        self._recycles = 0
+        self._launch_failures = 0
+        self._render_time = 0.0
+        self._max_render_time = 0.0
+        self._last_render_time = 0.0
+        self._queue_wait_time = 0.0
+
+    def start(self):
+        """Start the worker threads. Called automatically on the first render."""
+        with self._lock:
+            if self._started:
+                return
+            # Each generation of workers gets its own queue and stop flag, so
+            # workers of a previous shutdown never see this generation's jobs
+            self._jobs = queue.Queue()
+            self._stopping = threading.Event()
+            self._states = {}
+            for index in range(self.size):
+                self._states[index] = "launching"
+                worker = threading.Thread(
+                    target=self._worker_loop, args=(index, self._jobs, self._stopping),
+                    name=f"pdf-browser-{index}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+            self._started = True
+
+    def submit(self, html_path, pdf_path):
+        """Queue an HTML file for rendering and return a Future resolving to pdf_path."""
+        self.start()
+        job = _RenderJob(html_path, pdf_path)
+        self._jobs.put(job)
+        return job.future
+
+    def render(self, html_path, pdf_path, timeout=None):
+        """Render an HTML file to PDF, blocking until it is written."""
+        return self.submit(html_path, pdf_path).result(timeout)
+
+    def shutdown(self, wait=True):
+        """Stop all workers and close their browsers."""
+        with self._lock:
+            if not self._started:
+                return
+            self._stopping.set()
+            for _ in self._workers:
+                self._jobs.put(None)
+            workers, self._workers = self._workers, []
+            self._started = False
+        if wait:
+            for worker in workers:
+                worker.join(timeout=30)
+
+    def stats(self):
+        """Return queue depth, render latency and recycling metrics."""
+        with self._lock:
+            return {
+                "size": self.size,
+                "alive_workers": sum(1 for worker in self._workers if worker.is_alive()),
+                "ready_workers": sum(1 for state in self._states.values() if state == "ready"),
+                "queue_depth": self._jobs.qsize(),
+                "in_flight": self._in_flight,
+                "renders": self._renders,
+                "failures": self._failures,
+                "recycles": self._recycles,
+                "launch_failures": self._launch_failures,
+                "avg_render_time": round(self._render_time / self._renders, 4) if self._renders else 0,
+                "max_render_time": round(self._max_render_time, 4),
+                "last_render_time": round(self._last_render_time, 4),
+                "avg_queue_wait_time": round(self._queue_wait_time / self._renders, 4) if self._renders else 0,
+            }
+
+    def _set_state(self, index, jobs, state):
+        with self._lock:
+            # Ignore workers of a generation that has been shut down
+            if jobs is self._jobs:
+                self._states[index] = state
+
+    def _launch(self, playwright):
+        """Start Playwright if needed and launch a browser; returns (playwright, browser, page)."""
+        if playwright is None:
+            playwright = sync_playwright().start()
+        browser = playwright.chromium.launch()
+        try:
+            page = browser.new_context().new_page()
+        except Exception:
+            self._close_quietly(browser)
+            raise
+        return playwright, browser, page
+
+    def _worker_loop(self, index, jobs, stopping):
+        playwright = None
+        browser = None
+        page = None
+        renders = 0
+        launch_failures = 0
+
+        try:
+            while not stopping.is_set():
+                if browser is None or renders >= self.max_renders or not browser.is_connected():
+                    if browser is not None:
+                        with self._lock:
+                            self._recycles += 1
+                    self._close_quietly(browser)
+                    browser = None
+                    self._set_state(index, jobs, "launching")
+                    try:
+                        playwright, browser, page = self._launch(playwright)
+                    except Exception as e:
+                        launch_failures += 1
+                        delay = min(self.launch_backoff_max, self.launch_backoff * 2 ** (launch_failures - 1))
+                        with self._lock:
+                            self._launch_failures += 1
+                        print(f"❌ Browser worker {index} could not launch Chromium "
+                              f"(attempt {launch_failures}, retrying in {delay:.1f}s): {e}")
+                        if launch_failures == 1:
+                            traceback.print_exc()
+                        self._set_state(index, jobs, "backoff")
+                        self._fail_if_no_browser(jobs, e)
+                        stopping.wait(delay)
+                        continue
+                    launch_failures = 0
+                    renders = 0
+                    self._set_state(index, jobs, "ready")
+
+                job = jobs.get()
+                if job is None:
+                    break
+                if not job.future.set_running_or_notify_cancel():
+                    continue
+
+                with self._lock:
+                    self._in_flight += 1
+                    queue_wait = time.perf_counter() - job.enqueued_at
+
+                error = None
+                for attempt in range(2):
+                    try:
+                        if browser is None:
+                            playwright, browser, page = self._launch(playwright)
+                            renders = 0
+
+                        started = time.perf_counter()
+                        page.goto(f"file://{job.html_path}")
+                        page.pdf(path=job.pdf_path)
+                        elapsed = time.perf_counter() - started
+                        renders += 1
+                        error = None
+
+                        with self._lock:
+                            self._renders += 1
+                            self._render_time += elapsed
+                            self._last_render_time = elapsed
+                            self._max_render_time = max(self._max_render_time, elapsed)
+                            self._queue_wait_time += queue_wait
+                        break
+                    except Exception as e:
+                        # Treat any failure as a broken browser: recycle and retry once
+                        error = e
+                        print(f"⚠️ Browser worker {index} render failed (attempt {attempt + 1}): {e}")
+                        self._close_quietly(browser)
+                        browser = None
+                        with self._lock:
+                            self._recycles += 1
+
+                with self._lock:
+                    self._in_flight -= 1
+                    if error is not None:
+                        self._failures += 1
+
+                if error is None:
+                    job.future.set_result(job.pdf_path)
+                else:
+                    job.future.set_exception(error)
+        finally:
+            self._set_state(index, jobs, "stopped")
+            self._close_quietly(browser)
+            if playwright is not None:
+                try:
+                    playwright.stop()
+                except Exception:
+                    pass
+
+    def _fail_if_no_browser(self, jobs, error):
+        """Fail the queued jobs when no worker has a browser or is launching one, instead of leaving callers blocked."""
+        with self._lock:
+            if jobs is not self._jobs or any(state in ("ready", "launching") for state in self._states.values()):
+                return
+        while True:
+            try:
+                job = jobs.get_nowait()
+            except queue.Empty:
+                return
+            if job is None:
+                # Shutdown sentinel for another worker
+                jobs.put(None)
+                return
+            if job.future.set_running_or_notify_cancel():
+                with self._lock:
+                    self._failures += 1
+                job.future.set_exception(error)
+
+    @staticmethod
+    def _close_quietly(browser):
+        if browser is None:
+            return
+        try:
+            browser.close()
+        except Exception:
+            pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Return the process-wide browser pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool(
+                size=int(os.getenv("PDF_BROWSER_POOL_SIZE", "2")),
+                max_renders=int(os.getenv("PDF_BROWSER_MAX_RENDERS", "200")),
+                launch_backoff=float(os.getenv("PDF_BROWSER_LAUNCH_BACKOFF", "1")),
+                launch_backoff_max=float(os.getenv("PDF_BROWSER_LAUNCH_BACKOFF_MAX", "60")),
+            )
+            atexit.register(_pool.shutdown, False)
+        return _pool
+
+
+def render_pdf(html_path, pdf_path, timeout=None):
+    """Render an HTML file to a PDF using the shared warm browser pool."""
+    return get_browser_pool().render(html_path, pdf_path, timeout)
+
+
+def get_browser_pool_stats():
+    """Metrics for the shared pool, or None if no PDF has been rendered yet."""
+    return _pool.stats() if _pool is not None else None
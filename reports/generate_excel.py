@@ -1,9 +1,11 @@
 import os
 import pandas as pd
 import tempfile
-from database.mysql_data_handler import get_students_by_reg_nos
+from openpyxl.styles import Font
+from database.mysql_data_handler import iter_students_by_reg_nos
+from database.grade_snapshot import get_grade_snapshot
 
-def generate_excel_report(selected_students, selected_columns=None):
+def generate_excel_report(selected_students, selected_columns=None, output_dir=None):
     """Generates an Excel report based on selected students and columns."""
     # Validate selected columns
     allowed_columns = [
@@ -20,8 +22,10 @@ def generate_excel_report(selected_students, selected_columns=None):
             print("⚠️ No valid columns selected. Using all available columns.")
             selected_columns = allowed_columns
     
-    # Fetch data
-    students, records, summaries = get_students_by_reg_nos(selected_students)
+    # Fetch student rows only; grade figures come from the shared grade snapshot
+    students = []
+    for chunk_students, _, _ in iter_students_by_reg_nos(selected_students, with_grades=False):
+        students.extend(chunk_students)
     print(f'Students from database: {len(students)}')
     
     # Check if data was fetched successfully
@@ -29,55 +33,38 @@ def generate_excel_report(selected_students, selected_columns=None):
         print("⚠️ No student data available for the selected filters.")
         return None
     
-    # Convert data to Pandas DataFrames
     df_students = pd.DataFrame(students)
-    df_records = pd.DataFrame(records)
-    df_summaries = pd.DataFrame(summaries)
+    reg_nos = df_students["registered_no"]
+    snapshot = get_grade_snapshot()
     
-    # Ensure DataFrames are not empty before processing
-    if df_students.empty:
-        print("⚠️ No student data available for the selected filters.")
-        return None
-    
-    # Compute `no_of_failed_subjects` dynamically
+    # Count failed subjects per student
     if 'no_of_failed_subjects' in selected_columns:
-        # Group by registration number and count failed subjects
-        if not df_records.empty:
-            df_failures = df_records[df_records["result"] == "FAIL"].groupby("registered_no").size().reset_index(name="no_of_failed_subjects")
-            df_students = df_students.merge(df_failures, on="registered_no", how="left")
-            df_students["no_of_failed_subjects"] = df_students["no_of_failed_subjects"].fillna(0).astype(int)
-        else:
-            df_students["no_of_failed_subjects"] = 0
+        failures = snapshot.failed_subjects(reg_nos)
+        df_students["no_of_failed_subjects"] = reg_nos.map(failures).fillna(0).astype(int)
     
-    # Compute `cgpa` dynamically (average SGPA across semesters)
+    # CGPA is the average SGPA across semesters
     if 'cgpa' in selected_columns:
-        if not df_summaries.empty:
-            # Calculate average SGPA for each student
-            df_cgpa = df_summaries.groupby("registered_no")["sgpa"].mean().reset_index(name="cgpa")
-            df_students = df_students.merge(df_cgpa, on="registered_no", how="left")
-            df_students["cgpa"] = df_students["cgpa"].fillna(0).round(2)
-        else:
-            df_students["cgpa"] = 0
+        cgpa = snapshot.cgpa(reg_nos)
+        df_students["cgpa"] = reg_nos.map(cgpa).astype(float).fillna(0).round(2)
     
     # Select only the requested columns
     df_report = df_students[selected_columns]
     
     # Create Excel file
-    temp_dir = tempfile.gettempdir()
+    temp_dir = output_dir or tempfile.gettempdir()
     excel_path = os.path.join(temp_dir, "Student_Report.xlsx")
     
     # Write to Excel with formatting
     with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
         df_report.to_excel(writer, sheet_name='Student Report', index=False)
         
-        # Get the workbook and the worksheet
-        workbook = writer.book
+        # Get the worksheet
         worksheet = writer.sheets['Student Report']
         
         # Format headers
         for col_num, column_title in enumerate(df_report.columns, 1):
             cell = worksheet.cell(row=1, column=col_num)
-            cell.font = workbook.create_font(bold=True)
+            cell.font = Font(bold=True)
     
     print(f"✅ Excel report generated: {excel_path}")
     return excel_path
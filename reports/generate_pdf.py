@@ -5,10 +5,11 @@ import subprocess
 from PyPDF2 import PdfMerger
 from database.fetch_data import fetch_filtered_student_data,fetch_students_by_reg_nos
 from reports.generate_dashboard import generate_histogram
-from playwright.sync_api import sync_playwright
+from reports.browser_pool import render_pdf
+from reports.html_templates import render_report_template, group_semester_records, build_semester_sections
 
 def generate_html(student, records, summaries=None, includeCharts=False, template_style="classic"):
-    """Reads the HTML template and replaces placeholders with student data and semester records."""
+    """Renders the report template for a student with their details and semester records."""
 
     # Select template based on style
     template_styles = {
@@ -18,10 +19,6 @@ def generate_html(student, records, summaries=None, includeCharts=False, templat
     }
     
     template_file = template_styles.get(template_style, "pdf_classic.html")
-    template_path = os.path.join("templates", template_file)
-    
-    with open(template_path, "r", encoding="utf-8") as file:
-        html_content = file.read()
 
     # Format Address in Multi-line Format
     formatted_address = f"""
@@ -36,100 +33,9 @@ def generate_html(student, records, summaries=None, includeCharts=False, templat
         <li>{student["pincode"]}</li>
     """
 
-    # Group semester records by semester number
-    semester_groups = {}
-    for record in records:
-        if record["registered_no"] == student["registered_no"]:
-            sem_no = record["semester_no"]
-            if sem_no not in semester_groups:
-                semester_groups[sem_no] = []
-            semester_groups[sem_no].append(record)
-
-    # Generate semester tables dynamically
-    semester_html = ""
-    semester_summary_rows = ""
-    semester_summary_html = ""
-
-    for sem_no, courses in sorted(semester_groups.items()):
-        total_subjects = len(courses)
-        failed_subjects = sum(1 for course in courses if course["result"] == "Fail")
-        sgpa = round(sum(course["grade_points"] for course in courses) / total_subjects, 2) if total_subjects > 0 else 0
-        sem_table = f"""
-        <br>
-        <table class="semester-table" border="1">
-            <thead>
-                <tr class="semester-header">
-                    <td colspan="7">{sem_no} Semester</td>
-                </tr>
-            </thead>
-                <tr>
-                    <th>Course Name</th>
-                    <th>Month-Year</th>
-                    <th>Credits</th>
-                    <th>Grade</th>
-                    <th>Grade Points</th>
-                    <th>Credits Obtained</th>
-                    <th>Result</th>
-                </tr>
-            <tbody>
-        """
-
-        for course in courses:
-            sem_table += f"""
-            <tr>
-                <td id = "course_name">{course['course_name']}</td>
-                <td>{course['month_year']}</td>
-                <td>{course['credits']}</td>
-                <td>{course['grade']}</td>
-                <td>{course['grade_points']}</td>
-                <td>{course['credits_obtained']}</td>
-                <td>{course['result']}</td>
-            </tr>
-            """
-
-        sem_table += "</tbody></table>"
-        semester_html += sem_table
-
-        # Collect summary row (instead of creating multiple tables)
-        semester_summary_rows += f"""
-            <tr>
-                <td>{sem_no} Semester</td>
-                <td>{total_subjects}</td>
-                <td>{failed_subjects}</td>
-                <td>{sgpa}</td>
-            </tr>
-        """
-
-    # Generate Semester Summary Table
-    semester_summary_html = f"""
-    <br>
-    <table class="semester-summary-table" border="1">
-        <thead>
-            <tr class="semester-header">
-                <td colspan="4">Semester Wise Summary</td>
-            </tr>
-            <tr>
-                <th>Semester</th>
-                <th>Total Subjects</th>
-                <th>Failed Subjects</th>
-                <th>SGPA</th>
-            </tr>
-        </thead>
-        <tbody>
-            {semester_summary_rows}
-        </tbody>
-    </table>
-    """ if semester_summary_rows else ""
-    
-    # Generate SGPA data for chart
-    sgpa_list = []
-    
-    # Calculate SGPA from semester records
-    for sem_no, courses in sorted(semester_groups.items()):
-        total_subjects = len(courses)
-        if total_subjects > 0:
-            sem_sgpa = round(sum(course["grade_points"] for course in courses) / total_subjects, 2)
-            sgpa_list.append(sem_sgpa)
+    # Build semester tables and the summary table from the student's records
+    semester_groups = group_semester_records(student, records)
+    semester_html, semester_summary_html, sgpa_list = build_semester_sections(semester_groups, failed_result="Fail")
     
     print("SGPA List for chart:", sgpa_list)
     print("Current semester:", student["curr_semester"])
@@ -139,15 +45,18 @@ def generate_html(student, records, summaries=None, includeCharts=False, templat
     if sgpa_list and includeCharts:
         dashboard_html = generate_histogram(student["name"], sgpa_list, student["curr_semester"])
 
-    # Replace placeholders with actual data
-    html_content = html_content.replace("{{REG_NO}}", student["registered_no"])
-    html_content = html_content.replace("{{STUDENT_NAME}}", student["name"])
-    html_content = html_content.replace("{{BRANCH}}", student["branch"])
-    html_content = html_content.replace("{{SEMESTER}}", f"{student['curr_semester']} Semester")
-    html_content = html_content.replace("{{ADDRESS}}", formatted_address)
-    html_content = html_content.replace("{{SEMESTER_RECORDS}}", semester_html)
-    html_content = html_content.replace("{{SEMESTER_SUMMARY}}", semester_summary_html)
-    html_content = html_content.replace("{{Dashboards}}", dashboard_html)
+    # Render the compiled template
+    html_content = render_report_template(
+        template_file,
+        REG_NO=student["registered_no"],
+        STUDENT_NAME=student["name"],
+        BRANCH=student["branch"],
+        SEMESTER=f"{student['curr_semester']} Semester",
+        ADDRESS=formatted_address,
+        SEMESTER_RECORDS=semester_html,
+        SEMESTER_SUMMARY=semester_summary_html,
+        Dashboards=dashboard_html,
+    )
     
     # Fix image paths for PDF generation
     # Convert absolute paths to relative paths that will work with Playwright
@@ -194,12 +103,7 @@ def generate_pdf_report(selected_student, includeCharts=False, template_style="c
     with open(temp_html_path, "w", encoding="utf-8") as file:
         file.write(html_content)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        page.goto(f"file://{temp_html_path}")
-        page.pdf(path=pdf_output_path)
-        browser.close()
+    render_pdf(temp_html_path, pdf_output_path)
 
     compressed_pdf_path = os.path.join(temp_dir, f"compressed_{reg_no}.pdf")
     compress_with_ghostscript(pdf_output_path, compressed_pdf_path)
@@ -250,12 +154,7 @@ def generate_pdf_reporting(selected_students, generation_type, includeCharts=Fal
                     file.write(html_content)
 
                 # Convert HTML to PDF
-                with sync_playwright() as p:
-                    browser = p.chromium.launch()
-                    page = browser.new_page()
-                    page.goto(f"file://{temp_html_path}")
-                    page.pdf(path=pdf_output_path)
-                    browser.close()
+                render_pdf(temp_html_path, pdf_output_path)
 
                 os.remove(temp_html_path)
 
@@ -283,12 +182,7 @@ def generate_pdf_reporting(selected_students, generation_type, includeCharts=Fal
             with open(temp_html_file, "w", encoding="utf-8") as f:
                 f.write(html_content)
 
-            with sync_playwright() as p:
-                browser = p.chromium.launch()
-                page = browser.new_page()
-                page.goto(f"file://{temp_html_file}")
-                page.pdf(path=temp_pdf_file)
-                browser.close()
+            render_pdf(temp_html_file, temp_pdf_file)
 
             individual_pdfs.append(temp_pdf_file)
             os.remove(temp_html_file)
@@ -1,17 +1,20 @@
 import os
 import tempfile
 import zipfile
-import subprocess
 import base64
-from PyPDF2 import PdfMerger
+import shutil
+from functools import partial
 from database.mysql_data_handler import get_filtered_student_data, get_students_by_reg_nos
 from reports.generate_dashboard import generate_histogram
-from playwright.sync_api import sync_playwright
-
-def generate_html(student, records, summaries=None, includeCharts=False, template_style="classic"):
-    """Reads the HTML template and replaces placeholders with student data and semester records."""
-
-    # Select template based on style
+from reports.browser_pool import render_pdf
+from reports.batch_render import render_batch
+from reports.html_templates import render_report_template, group_semester_records, build_semester_sections
+from reports.assets import get_asset_cache
+from reports.pdf_postprocess import postprocess_pdf, postprocess_pdfs, record_postprocess, resolve_compression
+from reports.render_cache import get_render_cache, copy_cached_pdf
+
+def get_template_path(template_style="classic"):
+    """Returns the HTML template path for a template style."""
     template_styles = {
         "classic": "pdf_classic.html",
         "modern": "pdf_modern.html",
@@ -19,10 +22,10 @@ def generate_html(student, records, summaries=None, includeCharts=False, templat
     }
     
     template_file = template_styles.get(template_style, "pdf_classic.html")
-    template_path = os.path.join("templates", template_file)
-    
-    with open(template_path, "r", encoding="utf-8") as file:
-        html_content = file.read()
+    return os.path.join("templates", template_file)
+
+def generate_html(student, records, summaries=None, includeCharts=False, template_style="classic"):
+    """Renders the report template for a student with their details and semester records."""
 
     # Format Address in Multi-line Format
     formatted_address = f"""
@@ -36,147 +39,14 @@ def generate_html(student, records, summaries=None, includeCharts=False, templat
         <li>{student.get("pincode", "")}</li>
     """
 
-    # Get the header image path - use the exact path provided
-    header_image_path = "/home/lucky/ARS/baggi/main/templates/images/header.png"
-    
-    # Check if header image exists, if not use a placeholder
-    if os.path.exists(header_image_path):
-        try:
-            with open(header_image_path, "rb") as img_file:
-                header_image_base64 = base64.b64encode(img_file.read()).decode('utf-8')
-            header_image = f'<img src="data:image/png;base64,{header_image_base64}" alt="College Header" class="header-image">'
-            print(f"Header image loaded successfully from {header_image_path}")
-        except Exception as e:
-            print(f"Error loading header image: {e}")
-            header_image = ""
-    else:
-        print(f"Header image not found at {header_image_path}")
-        header_image = ""
-    
-    # Get student photo based on registration number
-    reg_no = student["registered_no"]
-    
-    # Check for different image formats (jpg, jpeg, png)
-    image_formats = ['jpg', 'jpeg', 'png']
-    student_photo_abs_path = None
-    
-    for img_format in image_formats:
-        student_photo_path = os.path.join("templates", "images", "students", f"{reg_no}.{img_format}")
-        base_dir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
-        temp_path = os.path.join(base_dir, student_photo_path)
-        if os.path.exists(temp_path):
-            student_photo_abs_path = temp_path
-            break
-    
-    # Check if student photo exists, if not use a placeholder
-    if student_photo_abs_path:
-        try:
-            with open(student_photo_abs_path, "rb") as img_file:
-                student_photo_base64 = base64.b64encode(img_file.read()).decode('utf-8')
-            img_format = student_photo_abs_path.split('.')[-1]
-            student_photo = f'<img src="data:image/{img_format};base64,{student_photo_base64}" alt="Student Photo" style="width:100%;height:100%;object-fit:cover;">'
-            print(f"Student photo loaded successfully from {student_photo_abs_path}")
-        except Exception as e:
-            print(f"Error loading student photo: {e}")
-            student_photo = generate_photo_placeholder()
-    else:
-        print(f"Student photo not found for {reg_no}")
-        student_photo = generate_photo_placeholder()
-
-    # Group semester records by semester number
-    semester_groups = {}
-    for record in records:
-        if record["registered_no"] == student["registered_no"]:
-            sem_no = record["semester_no"]
-            if sem_no not in semester_groups:
-                semester_groups[sem_no] = []
-            semester_groups[sem_no].append(record)
-
-    # Generate semester tables dynamically
-    semester_html = ""
-    semester_summary_rows = ""
-    semester_summary_html = ""
-
-    for sem_no, courses in sorted(semester_groups.items()):
-        total_subjects = len(courses)
-        failed_subjects = sum(1 for course in courses if course["result"] == "FAIL")
-        sgpa = round(sum(course["grade_points"] for course in courses) / total_subjects, 2) if total_subjects > 0 else 0
-        sem_table = f"""
-        <br>
-        <table class="semester-table" border="1">
-            <thead>
-                <tr class="semester-header">
-                    <td colspan="7">{sem_no} Semester</td>
-                </tr>
-            </thead>
-                <tr>
-                    <th>Course Name</th>
-                    <th>Month-Year</th>
-                    <th>Credits</th>
-                    <th>Grade</th>
-                    <th>Grade Points</th>
-                    <th>Credits Obtained</th>
-                    <th>Result</th>
-                </tr>
-            <tbody>
-        """
-
-        for course in courses:
-            sem_table += f"""
-            <tr>
-                <td id = "course_name">{course['course_name']}</td>
-                <td>{course['month_year']}</td>
-                <td>{course['credits']}</td>
-                <td>{course['grade']}</td>
-                <td>{course['grade_points']}</td>
-                <td>{course['credits_obtained']}</td>
-                <td>{course['result']}</td>
-            </tr>
-            """
-
-        sem_table += "</tbody></table>"
-        semester_html += sem_table
-
-        # Collect summary row (instead of creating multiple tables)
-        semester_summary_rows += f"""
-            <tr>
-                <td>{sem_no} Semester</td>
-                <td>{total_subjects}</td>
-                <td>{failed_subjects}</td>
-                <td>{sgpa}</td>
-            </tr>
-        """
-
-    # Generate Semester Summary Table
-    semester_summary_html = f"""
-    <br>
-    <table class="semester-summary-table" border="1">
-        <thead>
-            <tr class="semester-header">
-                <td colspan="4">Semester Wise Summary</td>
-            </tr>
-            <tr>
-                <th>Semester</th>
-                <th>Total Subjects</th>
-                <th>Failed Subjects</th>
-                <th>SGPA</th>
-            </tr>
-        </thead>
-        <tbody>
-            {semester_summary_rows}
-        </tbody>
-    </table>
-    """ if semester_summary_rows else ""
-    
-    # Generate SGPA data for chart
-    sgpa_list = []
-    
-    # Calculate SGPA from semester records
-    for sem_no, courses in sorted(semester_groups.items()):
-        total_subjects = len(courses)
-        if total_subjects > 0:
-            sem_sgpa = round(sum(course["grade_points"] for course in courses) / total_subjects, 2)
-            sgpa_list.append(sem_sgpa)
+    # Header and photo come pre-encoded from the shared asset cache
+    assets = get_asset_cache()
+    header_image = assets.header_image_html()
+    student_photo = assets.student_photo_html(student["registered_no"])
+
+    # Build semester tables and the summary table from the student's records
+    semester_groups = group_semester_records(student, records)
+    semester_html, semester_summary_html, sgpa_list = build_semester_sections(semester_groups)
     
     print("SGPA List for chart:", sgpa_list)
     print("Current semester:", student["curr_semester"])
@@ -186,19 +56,21 @@ def generate_html(student, records, summaries=None, includeCharts=False, templat
     if sgpa_list and includeCharts:
         dashboard_html = generate_histogram(student["name"], sgpa_list, student["curr_semester"])
 
-    # Replace placeholders with actual data
-    html_content = html_content.replace("{{REG_NO}}", student["registered_no"])
-    html_content = html_content.replace("{{STUDENT_NAME}}", student["name"])
-    html_content = html_content.replace("{{BRANCH}}", student["branch"])
-    html_content = html_content.replace("{{SEMESTER}}", f"{student['curr_semester']} Semester")
-    html_content = html_content.replace("{{ADDRESS}}", formatted_address)
-    html_content = html_content.replace("{{STUDENT_PHOTO}}", student_photo)
-    html_content = html_content.replace("{{HEADER_IMAGE}}", header_image)
-    html_content = html_content.replace("{{SEMESTER_RECORDS}}", semester_html)
-    html_content = html_content.replace("{{SEMESTER_SUMMARY}}", semester_summary_html)
-    html_content = html_content.replace("{{Dashboards}}", dashboard_html)
-    
-    return html_content
+    # Render the compiled template for the selected style
+    template_path = get_template_path(template_style)
+    return render_report_template(
+        os.path.basename(template_path),
+        REG_NO=student["registered_no"],
+        STUDENT_NAME=student["name"],
+        BRANCH=student["branch"],
+        SEMESTER=f"{student['curr_semester']} Semester",
+        ADDRESS=formatted_address,
+        STUDENT_PHOTO=student_photo,
+        HEADER_IMAGE=header_image,
+        SEMESTER_RECORDS=semester_html,
+        SEMESTER_SUMMARY=semester_summary_html,
+        Dashboards=dashboard_html,
+    )
 
 def generate_photo_placeholder():
     """Generate a placeholder SVG for missing student photos."""
@@ -212,27 +84,17 @@ def generate_photo_placeholder():
     """
     return f'<img src="data:image/svg+xml;base64,{base64.b64encode(student_photo_svg.encode()).decode()}" alt="Student Photo" style="width:100%;height:100%;">'
 
-def compress_with_ghostscript(input_path, output_path):
-    """Compress a PDF file using Ghostscript."""
-    command = [
-        "gs",  # Linux Ghostscript command
-        "-sDEVICE=pdfwrite",
-        "-dCompatibilityLevel=1.4",
-        "-dPDFSETTINGS=/ebook",  # Balanced quality and size
-        "-dNOPAUSE",
-        "-dQUIET",
-        "-dBATCH",
-        f"-sOutputFile={output_path}",
-        input_path,
-    ]
-    try:
-        subprocess.run(command, check=True)
-        print(f"✅ Compressed PDF saved to: {output_path}")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Ghostscript compression failed: {e}")
-        
-def generate_pdf_report(selected_student, includeCharts=False, template_style="classic"):
-    """Generates PDF reports for selected students and returns path to a PDF file."""
+def generate_pdf_report(selected_student, includeCharts=False, template_style="classic", output_dir=None, compression=None):
+    """
+    Generates a PDF report for one student and returns its path.
+
+    Rendered PDFs are kept in the render cache keyed on the student's data, grade rows,
+    template and options, so repeat requests for unchanged data skip HTML building,
+    Chromium and compression and are served straight from disk. ``compression`` picks
+    the post-processing stage (see reports.pdf_postprocess); defaults to PDF_COMPRESSION.
+    """
+    compression = resolve_compression(compression)
+
     # selected_student is already a list
     students, records, summaries = get_students_by_reg_nos(selected_student)
 
@@ -241,8 +103,22 @@ def generate_pdf_report(selected_student, includeCharts=False, template_style="c
 
     student = students[0]
     reg_no = student["registered_no"]
+
+    cache = get_render_cache()
+    cache_key = None
+    if cache.enabled:
+        variant = cache.variant(template_style, includeCharts, compression)
+        cache_key = cache.make_key(
+            student, records, get_template_path(template_style), template_style, includeCharts,
+            extra={"photo": get_asset_cache().photo_signature(reg_no), "compression": compression},
+        )
+        cached_pdf_path = cache.get(cache_key)
+        if cached_pdf_path:
+            if output_dir:
+                return copy_cached_pdf(cached_pdf_path, output_dir, f"{reg_no}_report.pdf")
+            return cached_pdf_path
     
-    temp_dir = tempfile.gettempdir()
+    temp_dir = output_dir or tempfile.gettempdir()
     html_content = generate_html(student, records, summaries, includeCharts, template_style)
 
     temp_html_path = os.path.join(temp_dir, f"temp_{reg_no}.html")
@@ -251,22 +127,44 @@ def generate_pdf_report(selected_student, includeCharts=False, template_style="c
     with open(temp_html_path, "w", encoding="utf-8") as file:
         file.write(html_content)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch()
-        page = browser.new_page()
-        page.goto(f"file://{temp_html_path}")
-        page.pdf(path=pdf_output_path)
-        browser.close()
+    render_pdf(temp_html_path, pdf_output_path)
 
     compressed_pdf_path = os.path.join(temp_dir, f"{reg_no}_report.pdf")
-    compress_with_ghostscript(pdf_output_path, compressed_pdf_path)
-
-    # Remove the original PDF and return the compressed one
-    os.remove(pdf_output_path)
+    record_postprocess(postprocess_pdf(pdf_output_path, compressed_pdf_path, compression))
     os.remove(temp_html_path)
+
+    if cache_key and os.path.exists(compressed_pdf_path):
+        if output_dir:
+            # The job directory keeps its own copy; the cache may evict its entry later
+            cache_copy_path = f"{compressed_pdf_path}.cache"
+            shutil.copyfile(compressed_pdf_path, cache_copy_path)
+            cache.put(cache_key, reg_no, variant, cache_copy_path)
+        else:
+            return cache.put(cache_key, reg_no, variant, compressed_pdf_path)
     return compressed_pdf_path
 
-def generate_pdf_reporting(selected_students, generation_type, includeCharts=False, template_style="classic"):
+def _compress_individual_pdf(compression, pdf_path):
+    """Compress a rendered student PDF to <name>_report.pdf. Runs inside render workers."""
+    compressed_pdf_path = os.path.splitext(pdf_path)[0] + "_report.pdf"
+    result = postprocess_pdf(pdf_path, compressed_pdf_path, compression)
+    return compressed_pdf_path, result
+
+def _render_jobs(students, records, includeCharts, template_style, temp_dir, html_paths):
+    """Build each student's HTML and yield (html_path, pdf_path) for the batch renderer."""
+    for student in students:
+        reg_no = student["registered_no"]
+        html_content = generate_html(student, records, None, includeCharts, template_style)
+        temp_html_path = os.path.join(temp_dir, f"temp_{reg_no}.html")
+        pdf_output_path = os.path.join(temp_dir, f"{reg_no}.pdf")
+
+        with open(temp_html_path, "w", encoding="utf-8") as file:
+            file.write(html_content)
+
+        html_paths.append(temp_html_path)
+        yield temp_html_path, pdf_output_path
+
+def generate_pdf_reporting(selected_students, generation_type, includeCharts=False, template_style="classic", workers=None,
+                           output_dir=None, progress=None, compression=None):
     """
     Generates PDF reports for selected students.
     
@@ -275,6 +173,11 @@ def generate_pdf_reporting(selected_students, generation_type, includeCharts=Fal
         generation_type (str): 'individual' for individual PDFs, 'combined' for a single merged PDF.
         includeCharts (bool): Whether to include SGPA charts in the PDFs.
         template_style (str): Style of the PDF template ('classic', 'modern', or 'minimal').
+        workers (int): Most renders kept in flight at once, 1..PDF_RENDER_WORKERS (defaults to PDF_RENDER_WORKERS or the CPU count).
+        output_dir (str): Directory for intermediate and output files (defaults to the system temp dir).
+        progress (callable): Optional callback receiving (students_rendered, total_students).
+        compression (str): Post-processing stage: 'none', 'ghostscript', 'pypdf' or 'auto'
+            (defaults to PDF_COMPRESSION).
     
     Returns:
         str: Path to the generated PDF file or combined PDF file.
@@ -283,101 +186,76 @@ def generate_pdf_reporting(selected_students, generation_type, includeCharts=Fal
         print("⚠️ Please select at least one student by registration number or name.")
         return None
 
+    compression = resolve_compression(compression)
+
     # Fetch data
     students, records, summaries = get_students_by_reg_nos(selected_students)
     if not students:
         print("⚠️ No student data available for the selected filters.")
         return None
 
-    temp_dir = tempfile.gettempdir()
+    # Keep the caller's order so merged output is deterministic
+    order = {reg_no: index for index, reg_no in enumerate(selected_students)}
+    students.sort(key=lambda student: order.get(student["registered_no"], len(order)))
+
+    temp_dir = output_dir or tempfile.gettempdir()
+    total = len(students)
+    on_rendered = (lambda done: progress(done, total)) if progress else None
 
     if generation_type == 'individual':
         # If only one student, return a single PDF instead of a ZIP
         if len(selected_students) == 1:
-            return generate_pdf_report(selected_students, includeCharts, template_style)
+            pdf_path = generate_pdf_report(selected_students, includeCharts, template_style, output_dir, compression)
+            if progress:
+                progress(total, total)
+            return pdf_path
         
-        # For multiple students, create individual PDFs and return the first one
-        pdf_paths = []
-        for student in students:
-            reg_no = student["registered_no"]
-            html_content = generate_html(student, records, None, includeCharts, template_style)
-            temp_html_path = os.path.join(temp_dir, f"temp_{reg_no}.html")
-            pdf_output_path = os.path.join(temp_dir, f"{reg_no}.pdf")
-
-            # Write HTML
-            with open(temp_html_path, "w", encoding="utf-8") as file:
-                file.write(html_content)
-
-            # Convert HTML to PDF
-            with sync_playwright() as p:
-                browser = p.chromium.launch()
-                page = browser.new_page()
-                page.goto(f"file://{temp_html_path}")
-                page.pdf(path=pdf_output_path)
-                browser.close()
-
-            os.remove(temp_html_path)
-
-            # Compress the generated PDF
-            compressed_pdf_path = os.path.join(temp_dir, f"{reg_no}_report.pdf")
-            compress_with_ghostscript(pdf_output_path, compressed_pdf_path)
-            os.remove(pdf_output_path)
-            
-            pdf_paths.append(compressed_pdf_path)
+        # For multiple students, render and compress individual PDFs in parallel and return the first one
+        html_paths = []
+        try:
+            results = render_batch(
+                _render_jobs(students, records, includeCharts, template_style, temp_dir, html_paths),
+                workers=workers,
+                postprocess=partial(_compress_individual_pdf, compression),
+                progress=on_rendered,
+            )
+        finally:
+            for html_path in html_paths:
+                try:
+                    os.remove(html_path)
+                except OSError:
+                    pass
         
+        pdf_paths = []
+        for pdf_path, result in results:
+            record_postprocess(result)
+            pdf_paths.append(pdf_path)
+
         # Return the first PDF path
         if pdf_paths:
             return pdf_paths[0]
         return None
 
     elif generation_type == 'combined':
-        individual_pdfs = []
-        for student in students:
-            html_content = generate_html(student, records, None, includeCharts, template_style)
-            reg_no = student["registered_no"]
-            temp_html_file = os.path.join(temp_dir, f"temp_{reg_no}.html")
-            temp_pdf_file = os.path.join(temp_dir, f"{reg_no}.pdf")
-
-            with open(temp_html_file, "w", encoding="utf-8") as f:
-                f.write(html_content)
-
-            with sync_playwright() as p:
-                browser = p.chromium.launch()
-                page = browser.new_page()
-                page.goto(f"file://{temp_html_file}")
-                page.pdf(path=temp_pdf_file)
-                browser.close()
-
-            individual_pdfs.append(temp_pdf_file)
-            os.remove(temp_html_file)
-
-        # Merge PDFs
-        merger = PdfMerger()
-        for pdf in individual_pdfs:
-            merger.append(pdf)
-
-        combined_path = os.path.join(temp_dir, "Combined_Student_Report_temp.pdf")
-        merger.write(combined_path)
-        merger.close()
-
-        for pdf in individual_pdfs:
-            try:
-                os.remove(pdf)
-            except:
-                pass
-
-        # Compress the combined PDF
-        compressed_combined_pdf_path = os.path.join(temp_dir, "Combined_Student_Report.pdf")
-        compress_with_ghostscript(combined_path, compressed_combined_pdf_path)
-
-        # Make sure the file exists before removing the original
-        if os.path.exists(compressed_combined_pdf_path):
-            os.remove(combined_path)
-            print(f"✅ Combined compressed PDF created: {compressed_combined_pdf_path}")
-            return compressed_combined_pdf_path
-        else:
-            print(f"❌ Failed to create compressed PDF, returning original: {combined_path}")
-            return combined_path
+        html_paths = []
+        try:
+            individual_pdfs = render_batch(
+                _render_jobs(students, records, includeCharts, template_style, temp_dir, html_paths),
+                workers=workers,
+                progress=on_rendered,
+            )
+        finally:
+            for html_path in html_paths:
+                try:
+                    os.remove(html_path)
+                except OSError:
+                    pass
+
+        # Merge and compress in a single pass
+        combined_pdf_path = os.path.join(temp_dir, "Combined_Student_Report.pdf")
+        result = record_postprocess(postprocess_pdfs(individual_pdfs, combined_pdf_path, compression))
+        print(f"✅ Combined PDF created: {combined_pdf_path} ({result['bytes_in']} -> {result['bytes_out']} bytes, {result['stage']})")
+        return combined_pdf_path
 
     else:
         print("❌ Invalid generation_type. Use 'individual' or 'combined'.")
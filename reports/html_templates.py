@@ -0,0 +1,117 @@
+import os
+from jinja2 import Environment, FileSystemLoader
+from database.records import GradeIndex
+
+TEMPLATE_DIR = os.path.join(os.path.abspath(os.path.dirname(os.path.dirname(__file__))), "templates")
+
+# The report templates use bare {{PLACEHOLDER}} markers, which are valid Jinja
+# expressions. Values are pre-built HTML fragments, so autoescaping stays off.
+# Compiled templates are cached by the environment; auto_reload only stats the
+# file so edits are still picked up without a restart.
+_env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=False,
+    auto_reload=True,
+    keep_trailing_newline=True,
+    cache_size=50,
+)
+
+
+def render_report_template(template_file, **context):
+    """Render a report template from the templates directory with the given placeholder values."""
+    return _env.get_template(template_file).render(**context)
+
+
+def group_semester_records(student, records):
+    """Group a student's grade rows by semester number."""
+    reg_no = student["registered_no"]
+    if isinstance(records, GradeIndex):
+        # Already grouped at fetch time
+        return records.semesters(reg_no)
+    semester_groups = {}
+    for record in records:
+        if record["registered_no"] == reg_no:
+            semester_groups.setdefault(record["semester_no"], []).append(record)
+    return semester_groups
+
+
+def build_semester_sections(semester_groups, failed_result="FAIL"):
+    """
+    Build the semester course tables and the semester summary table.
+
+    Returns:
+        tuple: (semester_html, semester_summary_html, sgpa_list)
+    """
+    semester_parts = []
+    summary_rows = []
+    sgpa_list = []
+
+    for sem_no, courses in sorted(semester_groups.items()):
+        total_subjects = len(courses)
+        failed_subjects = sum(1 for course in courses if course["result"] == failed_result)
+        sgpa = round(sum(course["grade_points"] for course in courses) / total_subjects, 2) if total_subjects > 0 else 0
+        if total_subjects > 0:
+            sgpa_list.append(sgpa)
+
+        semester_parts.append(f"""
+        <br>
+        <table class="semester-table" border="1">
+            <thead>
+                <tr class="semester-header">
+                    <td colspan="7">{sem_no} Semester</td>
+                </tr>
+            </thead>
+                <tr>
+                    <th>Course Name</th>
+                    <th>Month-Year</th>
+                    <th>Credits</th>
+                    <th>Grade</th>
+                    <th>Grade Points</th>
+                    <th>Credits Obtained</th>
+                    <th>Result</th>
+                </tr>
+            <tbody>
+        """)
+        semester_parts.extend(f"""
+            <tr>
+                <td id = "course_name">{course['course_name']}</td>
+                <td>{course['month_year']}</td>
+                <td>{course['credits']}</td>
+                <td>{course['grade']}</td>
+                <td>{course['grade_points']}</td>
+                <td>{course['credits_obtained']}</td>
+                <td>{course['result']}</td>
+            </tr>
+            """ for course in courses)
+        semester_parts.append("</tbody></table>")
+
+        summary_rows.append(f"""
+            <tr>
+                <td>{sem_no} Semester</td>
+                <td>{total_subjects}</td>
+                <td>{failed_subjects}</td>
+                <td>{sgpa}</td>
+            </tr>
+        """)
+
+    semester_summary_html = f"""
+    <br>
+    <table class="semester-summary-table" border="1">
+        <thead>
+            <tr class="semester-header">
+                <td colspan="4">Semester Wise Summary</td>
+            </tr>
+            <tr>
+                <th>Semester</th>
+                <th>Total Subjects</th>
+                <th>Failed Subjects</th>
+                <th>SGPA</th>
+            </tr>
+        </thead>
+        <tbody>
+            {"".join(summary_rows)}
+        </tbody>
+    </table>
+    """ if summary_rows else ""
+
+    return "".join(semester_parts), semester_summary_html, sgpa_list
@@ -0,0 +1,182 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+from PyPDF2 import PdfMerger, PdfReader, PdfWriter
+
+COMPRESSION_STAGES = ("none", "ghostscript", "pypdf", "auto")
+
+GHOSTSCRIPT_OPTIONS = [
+    "-sDEVICE=pdfwrite",
+    "-dCompatibilityLevel=1.4",
+    "-dPDFSETTINGS=/ebook",  # Balanced quality and size
+    "-dNOPAUSE",
+    "-dQUIET",
+    "-dBATCH",
+]
+
+
+def default_compression():
+    """Compression stage used when a request does not choose one."""
+    return os.getenv("PDF_COMPRESSION", "ghostscript")
+
+
+def resolve_compression(compression=None):
+    """Validate a requested stage name, falling back to the configured default."""
+    compression = (compression or default_compression()).lower()
+    if compression not in COMPRESSION_STAGES:
+        raise ValueError(f"compression must be one of: {', '.join(COMPRESSION_STAGES)}")
+    return compression
+
+
+def _auto_threshold_bytes():
+    return int(float(os.getenv("PDF_COMPRESSION_AUTO_THRESHOLD_KB", "300")) * 1024)
+
+
+def _run_ghostscript(input_paths, output_path):
+    """Compress (and, given several inputs, concatenate) PDFs with a single gs process."""
+    command = ["gs", *GHOSTSCRIPT_OPTIONS, f"-sOutputFile={output_path}", *input_paths]
+    try:
+        subprocess.run(command, check=True)
+        return True
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"❌ Ghostscript compression failed: {e}")
+        return False
+
+
+def _run_pypdf(input_paths, output_path):
+    """Merge PDFs and deflate their page content streams in-process."""
+    try:
+        writer = PdfWriter()
+        for input_path in input_paths:
+            for page in PdfReader(input_path).pages:
+                writer.add_page(page)
+        for page in writer.pages:
+            page.compress_content_streams()
+        with open(output_path, "wb") as f:
+            writer.write(f)
+        return True
+    except Exception as e:
+        print(f"❌ In-process PDF compression failed: {e}")
+        return False
+
+
+def _merge(input_paths, output_path):
+    merger = PdfMerger()
+    try:
+        for input_path in input_paths:
+            merger.append(input_path)
+        merger.write(output_path)
+    finally:
+        merger.close()
+
+
+def postprocess_pdfs(input_paths, output_path, compression=None):
+    """
+    Run the compression stage over one or more rendered PDFs, writing a single output.
+
+    Several inputs are concatenated in the same pass: Ghostscript reads them all in
+    one process, and the pypdf stage merges and compresses in one writer, so the
+    combined report is not written out and read back before compression. If a
+    stage fails or makes the file bigger, the uncompressed result is kept. The
+    inputs are removed.
+
+    Returns:
+        dict: The stage that ran and its bytes in/out and elapsed time.
+    """
+    compression = resolve_compression(compression)
+    bytes_in = sum(os.path.getsize(path) for path in input_paths)
+    started = time.perf_counter()
+
+    stage = compression
+    if stage == "auto":
+        stage = "none" if bytes_in / max(1, len(input_paths)) <= _auto_threshold_bytes() else "ghostscript"
+
+    raw_path = f"{output_path}.raw"
+    if stage == "none":
+        if len(input_paths) == 1:
+            shutil.move(input_paths[0], output_path)
+        else:
+            _merge(input_paths, output_path)
+        fallback = False
+    else:
+        run = _run_ghostscript if stage == "ghostscript" else _run_pypdf
+        ok = run(input_paths, output_path) and os.path.exists(output_path)
+        fallback = not ok or os.path.getsize(output_path) >= bytes_in
+        if fallback:
+            # Keep the uncompressed output rather than a failed or larger one
+            if len(input_paths) == 1:
+                shutil.copyfile(input_paths[0], raw_path)
+            else:
+                _merge(input_paths, raw_path)
+            os.replace(raw_path, output_path)
+
+    for input_path in input_paths:
+        if input_path != output_path:
+            try:
+                os.remove(input_path)
+            except OSError:
+                pass
+
+    return {
+        "compression": compression,
+        "stage": stage,
+        "files": len(input_paths),
+        "bytes_in": bytes_in,
+        "bytes_out": os.path.getsize(output_path),
+        "seconds": time.perf_counter() - started,
+        "fallback": fallback,
+    }
+
+
+def postprocess_pdf(input_path, output_path, compression=None):
+    """Run the compression stage on a single PDF. See postprocess_pdfs."""
+    return postprocess_pdfs([input_path], output_path, compression)
+
+
+class PostprocessStats:
+    """Running totals of bytes saved and time spent per compression stage."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, result):
+        with self._lock:
+            stage = self._stages.setdefault(result["stage"], {
+                "runs": 0, "files": 0, "bytes_in": 0, "bytes_out": 0, "seconds": 0.0, "fallbacks": 0,
+            })
+            stage["runs"] += 1
+            stage["files"] += result["files"]
+            stage["bytes_in"] += result["bytes_in"]
+            stage["bytes_out"] += result["bytes_out"]
+            stage["seconds"] += result["seconds"]
+            stage["fallbacks"] += int(result["fallback"])
+
+    def snapshot(self):
+        with self._lock:
+            stages = {}
+            for name, stage in self._stages.items():
+                saved = stage["bytes_in"] - stage["bytes_out"]
+                stages[name] = {
+                    **stage,
+                    "seconds": round(stage["seconds"], 4),
+                    "bytes_saved": saved,
+                    "avg_seconds": round(stage["seconds"] / stage["runs"], 4) if stage["runs"] else 0,
+                    "bytes_saved_per_second": round(saved / stage["seconds"]) if stage["seconds"] else 0,
+                }
+            return {"default": default_compression(), "stages": stages}
+
+
+_stats = PostprocessStats()
+
+
+def record_postprocess(result):
+    """Add a postprocess result (possibly produced in a render worker) to this process's metrics."""
+    _stats.record(result)
+    return result
+
+
+def get_postprocess_stats():
+    return _stats.snapshot()
@@ -1,128 +1,182 @@
 import os
+import threading
+import time
 import traceback
-from flask import jsonify, request
+from itertools import groupby
+from flask import Response, current_app, jsonify, request, stream_with_context
 from database.mysql_data_handler import get_connection
+from database.data_versions import get_data_versions
+from reports.academic_profile import get_academic_profile
+from utils.response_cache import cached_response, STUDENT_REPORT_TTL
+from utils.conditional_get import conditional_get
+
+# Requirement indexes are reused until curriculum_requirements or courses is
+# bumped in data_versions, or for at most this many seconds
+CURRICULUM_TABLES = ("curriculum_requirements", "courses")
+CURRICULUM_INDEX_TTL = float(os.getenv("CURRICULUM_INDEX_TTL", "300"))
+
+
+def _group_requirements(requirements, key):
+    """Group name -> (required course codes, required credits)."""
+    groups = {}
+    for req in requirements:
+        codes, credits = groups.get(req[key], ([], 0))
+        codes.append(req['course_code'])
+        groups[req[key]] = (codes, credits + req['required_credits'])
+    return groups
+
+
+def _groups_by_code(groups):
+    """Course code -> names of the groups that require it."""
+    by_code = {}
+    for name, (codes, _) in groups.items():
+        for code in dict.fromkeys(codes):
+            by_code.setdefault(code, []).append(name)
+    return by_code
+
+
+class CurriculumIndex:
+    """A branch's curriculum requirements, grouped and indexed by course code."""
+
+    def __init__(self, branch, requirements, versions=None):
+        self.branch = branch
+        self.requirements = requirements
+        self.versions = versions
+        self.loaded_at = time.monotonic()
+        self.total_required_credits = sum(req['required_credits'] for req in requirements)
+        self.mandatory_codes = [req['course_code'] for req in requirements if req['is_mandatory']]
+        self.categories = _group_requirements(requirements, 'category')
+        self.semesters = _group_requirements(requirements, 'semester')
+        self.category_by_code = _groups_by_code(self.categories)
+        self.semester_by_code = _groups_by_code(self.semesters)
+
+    def requirements_by_semester(self, completed_codes):
+        """Copies of the requirements grouped by semester, each marked completed or not."""
+        by_semester = {}
+        for req in self.requirements:
+            by_semester.setdefault(req['semester'], []).append(
+                {**req, "completed": req['course_code'] in completed_codes}
+            )
+        return by_semester
+
+
+def load_curriculum_index(branch, versions=None):
+    conn = get_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT 
+                cr.id,
+                cr.branch,
+                cr.semester,
+                cr.course_code,
+                c.name AS course_name,
+                cr.required_credits,
+                cr.is_mandatory,
+                cr.category
+            FROM curriculum_requirements cr
+            JOIN courses c ON cr.course_code = c.code
+            WHERE cr.branch = %s
+            ORDER BY cr.semester, cr.category, c.name
+        """, (branch,))
+        requirements = cursor.fetchall()
+        cursor.close()
+    finally:
+        conn.close()
+    return CurriculumIndex(branch, requirements, versions)
+
+
+_curriculum_lock = threading.Lock()
+_curriculum_indexes = {}
+
+
+def get_curriculum_index(branch):
+    """The branch's requirement index, reloaded when the curriculum tables change."""
+    versions = get_data_versions(CURRICULUM_TABLES)
+    with _curriculum_lock:
+        index = _curriculum_indexes.get(branch)
+    if index is None or index.versions != versions or time.monotonic() - index.loaded_at >= CURRICULUM_INDEX_TTL:
+        index = load_curriculum_index(branch, versions)
+        with _curriculum_lock:
+            _curriculum_indexes[branch] = index
+    return index
+
+
+def _completion_stats(groups, group_by_code, completed_codes, completed_courses):
+    completed_credits = dict.fromkeys(groups, 0)
+    for course in completed_courses:
+        for name in group_by_code.get(course['course_code'], ()):
+            completed_credits[name] += course['credits']
+    
+    stats = {}
+    for name, (codes, total_credits) in groups.items():
+        done_credits = completed_credits[name]
+        stats[name] = {
+            "total_courses": len(codes),
+            "completed_courses": sum(1 for code in codes if code in completed_codes),
+            "total_credits": total_credits,
+            "completed_credits": done_credits,
+            "completion_percentage": round((done_credits / total_credits) * 100, 1) if total_credits > 0 else 0
+        }
+    return stats
+
+
+def build_curriculum_progress(index, completed_courses):
+    """
+    Completion of a branch's curriculum given a student's passed courses.
+
+    Returns completionStats, categoryStats and semesterStats as the curriculum
+    tracker reports them. Each passed course is looked up once through the
+    index instead of being compared against every requirement list.
+    """
+    completed_codes = {course['course_code'] for course in completed_courses}
+    total_required_credits = index.total_required_credits
+    completed_credits = sum(course['credits'] for course in completed_courses)
+    mandatory_total = len(index.mandatory_codes)
+    completed_mandatory = sum(1 for code in index.mandatory_codes if code in completed_codes)
+    
+    return {
+        "completionStats": {
+            "totalRequiredCredits": total_required_credits,
+            "completedCredits": completed_credits,
+            "creditCompletionPercentage": round((completed_credits / total_required_credits) * 100, 1) if total_required_credits > 0 else 0,
+            "totalMandatoryCourses": mandatory_total,
+            "completedMandatoryCourses": completed_mandatory,
+            "mandatoryCompletionPercentage": round((completed_mandatory / mandatory_total) * 100, 1) if mandatory_total else 0
+        },
+        "categoryStats": _completion_stats(index.categories, index.category_by_code, completed_codes, completed_courses),
+        "semesterStats": _completion_stats(index.semesters, index.semester_by_code, completed_codes, completed_courses)
+    }
+
 
 def register_progress_tracking_routes(app):
     """Register all progress tracking report routes with the Flask app."""
     
     @app.route('/api/reports/curriculum-tracker/<reg_no>', methods=['GET'])
+    @conditional_get("students", "grades", "courses", "curriculum_requirements")
+    @cached_response(STUDENT_REPORT_TTL, tags=lambda reg_no: [f"student:{reg_no}"])
     def get_curriculum_tracker(reg_no):
         try:
-            conn = get_connection()
-            if not conn:
-                return jsonify({"error": "Database connection failed"}), 500
-                
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get student data
-            cursor.execute("""
-                SELECT 
-                    registration_number AS registered_no,
-                    name,
-                    branch,
-                    current_semester AS curr_semester
-                FROM students
-                WHERE registration_number = %s
-            """, (reg_no,))
-            
-            student = cursor.fetchone()
-            if not student:
+            profile = get_academic_profile(reg_no)
+            if not profile:
                 return jsonify({"error": "Student not found"}), 404
+            student = profile.student
             
             # Get curriculum requirements for the student's branch
-            cursor.execute("""
-                SELECT 
-                    cr.id,
-                    cr.branch,
-                    cr.semester,
-                    cr.course_code,
-                    c.name AS course_name,
-                    cr.required_credits,
-                    cr.is_mandatory,
-                    cr.category
-                FROM curriculum_requirements cr
-                JOIN courses c ON cr.course_code = c.code
-                WHERE cr.branch = %s
-                ORDER BY cr.semester, cr.category, c.name
-            """, (student['branch'],))
-            
-            all_requirements = cursor.fetchall()
+            index = get_curriculum_index(student['branch'])
             
             # Get completed courses for the student
-            cursor.execute("""
-                SELECT 
-                    g.course_code,
-                    c.name AS course_name,
-                    c.credits,
-                    c.semester,
-                    g.grade,
-                    g.grade_points,
-                    g.result
-                FROM grades g
-                JOIN courses c ON g.course_code = c.code
-                WHERE g.registration_number = %s AND g.result = 'PASS'
-            """, (reg_no,))
-            
-            completed_courses = cursor.fetchall()
-            completed_course_codes = [course['course_code'] for course in completed_courses]
-            
-            # Group requirements by semester
-            requirements_by_semester = {}
-            for req in all_requirements:
-                sem = req['semester']
-                if sem not in requirements_by_semester:
-                    requirements_by_semester[sem] = []
-                
-                # Check if the course is completed
-                req['completed'] = req['course_code'] in completed_course_codes
-                requirements_by_semester[sem].append(req)
-            
-            # Calculate completion statistics
-            total_required_credits = sum(req['required_credits'] for req in all_requirements)
-            completed_credits = sum(course['credits'] for course in completed_courses)
-            
-            mandatory_requirements = [req for req in all_requirements if req['is_mandatory']]
-            completed_mandatory = sum(1 for req in mandatory_requirements if req['course_code'] in completed_course_codes)
-            
-            # Calculate completion by category
-            categories = set(req['category'] for req in all_requirements)
-            category_stats = {}
-            
-            for category in categories:
-                category_requirements = [req for req in all_requirements if req['category'] == category]
-                category_completed = sum(1 for req in category_requirements if req['course_code'] in completed_course_codes)
-                category_total_credits = sum(req['required_credits'] for req in category_requirements)
-                category_completed_credits = sum(
-                    course['credits'] for course in completed_courses 
-                    if course['course_code'] in [req['course_code'] for req in category_requirements]
-                )
-                
-                category_stats[category] = {
-                    "total_courses": len(category_requirements),
-                    "completed_courses": category_completed,
-                    "total_credits": category_total_credits,
-                    "completed_credits": category_completed_credits,
-                    "completion_percentage": round((category_completed_credits / category_total_credits) * 100, 1) if category_total_credits > 0 else 0
-                }
+            completed_courses = profile.grades(
+                "course_code", "course_name", "credits", "semester", "grade", "grade_points", "result",
+                result="PASS"
+            )
+            completed_course_codes = {course['course_code'] for course in completed_courses}
             
-            # Calculate completion by semester
-            semester_stats = {}
-            for sem, requirements in requirements_by_semester.items():
-                sem_completed = sum(1 for req in requirements if req['course_code'] in completed_course_codes)
-                sem_total_credits = sum(req['required_credits'] for req in requirements)
-                sem_completed_credits = sum(
-                    course['credits'] for course in completed_courses 
-                    if course['course_code'] in [req['course_code'] for req in requirements]
-                )
-                
-                semester_stats[sem] = {
-                    "total_courses": len(requirements),
-                    "completed_courses": sem_completed,
-                    "total_credits": sem_total_credits,
-                    "completed_credits": sem_completed_credits,
-                    "completion_percentage": round((sem_completed_credits / sem_total_credits) * 100, 1) if sem_total_credits > 0 else 0
-                }
+            progress = build_curriculum_progress(index, completed_courses)
+            category_stats = progress["categoryStats"]
+            semester_stats = progress["semesterStats"]
             
             # Prepare visualization data
             semester_labels = [f"Semester {sem}" for sem in sorted(semester_stats.keys())]
@@ -167,20 +221,10 @@ def register_progress_tracking_routes(app):
                 ]
             }
             
-            cursor.close()
-            conn.close()
-            
             return jsonify({
                 "student": student,
-                "requirementsBySemester": requirements_by_semester,
-                "completionStats": {
-                    "totalRequiredCredits": total_required_credits,
-                    "completedCredits": completed_credits,
-                    "creditCompletionPercentage": round((completed_credits / total_required_credits) * 100, 1) if total_required_credits > 0 else 0,
-                    "totalMandatoryCourses": len(mandatory_requirements),
-                    "completedMandatoryCourses": completed_mandatory,
-                    "mandatoryCompletionPercentage": round((completed_mandatory / len(mandatory_requirements)) * 100, 1) if mandatory_requirements else 0
-                },
+                "requirementsBySemester": index.requirements_by_semester(completed_course_codes),
+                "completionStats": progress["completionStats"],
                 "categoryStats": category_stats,
                 "semesterStats": semester_stats,
                 "visualData": {
@@ -194,49 +238,115 @@ def register_progress_tracking_routes(app):
             traceback.print_exc()
             return jsonify({"error": str(e)}), 500
 
-    @app.route('/api/reports/backlog-management/<reg_no>', methods=['GET'])
-    def get_backlog_management(reg_no):
+    @app.route('/api/reports/curriculum-tracker', methods=['GET'])
+    @conditional_get("students", "grades", "courses", "curriculum_requirements")
+    def get_curriculum_tracker_bulk():
+        """
+        Curriculum completion for every student of a branch, streamed as NDJSON.
+
+        Takes branch (required) and optionally semester (current semester). Each
+        line has the student, completionStats, categoryStats, semesterStats and
+        the mandatory courses still pending. Passed grades of the whole branch
+        are read in one scan.
+        """
         try:
+            branch = request.args.get('branch', '')
+            semester = request.args.get('semester', '')
+            
+            if not branch:
+                return jsonify({"error": "Branch parameter is required"}), 400
+            if semester and not semester.isdigit():
+                return jsonify({"error": "semester must be a number"}), 400
+            
+            where_sql = "s.branch = %s"
+            params = [branch]
+            if semester:
+                where_sql += " AND s.current_semester = %s"
+                params.append(int(semester))
+            
+            index = get_curriculum_index(branch)
+            
             conn = get_connection()
             if not conn:
                 return jsonify({"error": "Database connection failed"}), 500
                 
             cursor = conn.cursor(dictionary=True)
-            
-            # Get student data
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT 
-                    registration_number AS registered_no,
-                    name,
-                    branch,
-                    current_semester AS curr_semester
-                FROM students
-                WHERE registration_number = %s
-            """, (reg_no,))
-            
-            student = cursor.fetchone()
-            if not student:
+                    s.registration_number AS registered_no,
+                    s.name,
+                    s.branch,
+                    s.current_semester AS curr_semester
+                FROM students s
+                WHERE {where_sql}
+                ORDER BY s.registration_number
+            """, params)
+            students = cursor.fetchall()
+            cursor.close()
+            conn.close()
+        except Exception as e:
+            print(f"Error generating bulk curriculum tracker report: {e}")
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
+
+        def generate():
+            conn = get_connection()
+            if not conn:
+                yield current_app.json.dumps({"error": "Database connection failed"}) + "\n"
+                return
+            cursor = conn.cursor(dictionary=True)
+            try:
+                # One scan of the branch's passed grades
+                cursor.execute(f"""
+                    SELECT 
+                        g.registration_number,
+                        g.course_code,
+                        c.credits
+                    FROM grades g
+                    JOIN courses c ON g.course_code = c.code
+                    JOIN students s ON s.registration_number = g.registration_number
+                    WHERE {where_sql} AND g.result = 'PASS'
+                    ORDER BY g.registration_number, c.semester, g.course_code
+                """, params)
+                completed = {
+                    reg_no: list(rows)
+                    for reg_no, rows in groupby(cursor.fetchall(), key=lambda row: row['registration_number'])
+                }
+                
+                for student in students:
+                    completed_courses = completed.get(student['registered_no'], [])
+                    completed_codes = {course['course_code'] for course in completed_courses}
+                    progress = build_curriculum_progress(index, completed_courses)
+                    yield current_app.json.dumps({
+                        "student": student,
+                        **progress,
+                        "pendingMandatoryCourses": [
+                            code for code in index.mandatory_codes if code not in completed_codes
+                        ]
+                    }) + "\n"
+            except Exception as e:
+                # Headers are already sent; report the failure as the last line
+                print(f"Error streaming bulk curriculum tracker report: {e}")
+                traceback.print_exc()
+                yield current_app.json.dumps({"error": str(e)}) + "\n"
+            finally:
+                cursor.close()
+                conn.close()
+
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    @app.route('/api/reports/backlog-management/<reg_no>', methods=['GET'])
+    @conditional_get("students", "courses", "backlog_tracking")
+    @cached_response(STUDENT_REPORT_TTL, tags=lambda reg_no: [f"student:{reg_no}"])
+    def get_backlog_management(reg_no):
+        try:
+            profile = get_academic_profile(reg_no)
+            if not profile:
                 return jsonify({"error": "Student not found"}), 404
+            student = profile.student
             
             # Get backlog data
-            cursor.execute("""
-                SELECT 
-                    bt.id,
-                    bt.course_code,
-                    c.name AS course_name,
-                    c.credits,
-                    c.semester AS course_semester,
-                    bt.semester_failed,
-                    bt.attempts,
-                    bt.next_attempt_date,
-                    bt.status
-                FROM backlog_tracking bt
-                JOIN courses c ON bt.course_code = c.code
-                WHERE bt.registration_number = %s
-                ORDER BY bt.next_attempt_date, bt.semester_failed
-            """, (reg_no,))
-            
-            backlogs = cursor.fetchall()
+            backlogs = profile.backlogs()
             
             # Group backlogs by status
             backlogs_by_status = {
@@ -330,9 +440,6 @@ def register_progress_tracking_routes(app):
                 ]
             }
             
-            cursor.close()
-            conn.close()
-            
             return jsonify({
                 "student": student,
                 "backlogsByStatus": backlogs_by_status,
@@ -358,49 +465,17 @@ def register_progress_tracking_routes(app):
             return jsonify({"error": str(e)}), 500
 
     @app.route('/api/reports/internship-tracking/<reg_no>', methods=['GET'])
+    @conditional_get("students", "internship_projects")
+    @cached_response(STUDENT_REPORT_TTL, tags=lambda reg_no: [f"student:{reg_no}"])
     def get_internship_tracking(reg_no):
         try:
-            conn = get_connection()
-            if not conn:
-                return jsonify({"error": "Database connection failed"}), 500
-                
-            cursor = conn.cursor(dictionary=True)
-            
-            # Get student data
-            cursor.execute("""
-                SELECT 
-                    registration_number AS registered_no,
-                    name,
-                    branch,
-                    current_semester AS curr_semester
-                FROM students
-                WHERE registration_number = %s
-            """, (reg_no,))
-            
-            student = cursor.fetchone()
-            if not student:
+            profile = get_academic_profile(reg_no)
+            if not profile:
                 return jsonify({"error": "Student not found"}), 404
+            student = profile.student
             
             # Get internship/project data
-            cursor.execute("""
-                SELECT 
-                    id,
-                    type,
-                    title,
-                    organization,
-                    start_date,
-                    end_date,
-                    credits,
-                    grade,
-                    grade_points,
-                    status,
-                    description
-                FROM internship_projects
-                WHERE registration_number = %s
-                ORDER BY start_date DESC
-            """, (reg_no,))
-            
-            internship_projects = cursor.fetchall()
+            internship_projects = profile.internships()
             
             # Format dates for JSON serialization
             for item in internship_projects:
@@ -489,9 +564,6 @@ def register_progress_tracking_routes(app):
                 ]
             }
             
-            cursor.close()
-            conn.close()
-            
             return jsonify({
                 "student": student,
                 "internships": internships,
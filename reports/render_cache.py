@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from database.grade_events import on_grades_changed
+from database.records import records_for_student
+
+# Bump when generate_html or the PDF pipeline changes output for the same inputs
+RENDER_CACHE_VERSION = 1
+
+_FILENAME_RE = re.compile(r"^(?P<reg_no>[^.]+)\.(?P<variant>[^.]+)\.(?P<key>[0-9a-f]{64})\.pdf$")
+
+
+def _safe(value):
+    return re.sub(r"[^A-Za-z0-9_-]", "_", str(value))
+
+
+class RenderCache:
+    """
+    Size-bounded, content-addressed disk cache of rendered student PDFs.
+
+    Entries are keyed on a SHA-256 of everything that determines the output: the
+    student row, that student's grade rows, the template file contents, the template
+    style and the charts flag. New grades therefore produce a new key automatically,
+    and storing it drops the superseded entry for the same student and variant.
+    Least recently used entries are evicted once ``max_bytes`` is exceeded.
+
+    Paths returned by get() and put() are handed to send_file or copied after the
+    lock is released, so superseded and evicted files are not deleted at once:
+    they are retired and removed ``retire_seconds`` later.
+    """
+
+    def __init__(self, cache_dir, max_bytes, retire_seconds=300):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        self.retire_seconds = max(0.0, float(retire_seconds))
+
+        self._entries = OrderedDict()  # key -> (reg_no, variant, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._template_digests = {}
+        self._retired = {}  # path -> monotonic time after which it is deleted
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _path(self, key, reg_no, variant):
+        return os.path.join(self.cache_dir, f"{_safe(reg_no)}.{variant}.{key}.pdf")
+
+    def _load_index(self):
+        """Rebuild the LRU index from files on disk, oldest access first."""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            match = _FILENAME_RE.match(name)
+            if not match:
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            found.append((stat.st_mtime, match.group("key"), match.group("reg_no"), match.group("variant"), stat.st_size))
+        # No request of this process holds these paths yet, so files a previous
+        # process retired (superseded or over the size limit) are deleted right away
+        latest = {}
+        for _, key, reg_no, variant, size in sorted(found):
+            previous = latest.get((reg_no, variant))
+            if previous is not None:
+                self._delete_file(self._drop(previous))
+            latest[(reg_no, variant)] = key
+            self._entries[key] = (reg_no, variant, size)
+            self._bytes += size
+        while self._bytes > self.max_bytes and self._entries:
+            self._delete_file(self._drop(next(iter(self._entries))))
+
+    def _template_digest(self, template_path):
+        stat = os.stat(template_path)
+        cache_key = (template_path, stat.st_mtime_ns, stat.st_size)
+        digest = self._template_digests.get(cache_key)
+        if digest is None:
+            with open(template_path, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            self._template_digests[cache_key] = digest
+        return digest
+
+    @staticmethod
+    def variant(template_style, include_charts, compression="ghostscript"):
+        return f"{_safe(template_style)}-{'charts' if include_charts else 'plain'}-{_safe(compression)}"
+
+    def make_key(self, student, records, template_path, template_style, include_charts, extra=None):
+        """Hash the inputs that determine a student's rendered PDF; ``extra`` covers other inputs such as the photo."""
+        reg_no = student["registered_no"]
+        payload = {
+            "version": RENDER_CACHE_VERSION,
+            "student": student,
+            "records": [dict(record) for record in records_for_student(records, reg_no)],
+            "template": self._template_digest(template_path),
+            "template_style": template_style,
+            "include_charts": bool(include_charts),
+            "extra": extra,
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def get(self, key):
+        """Return the cached PDF path for key, or None on a miss."""
+        with self._lock:
+            self._sweep()
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            path = self._path(key, entry[0], entry[1])
+            if not os.path.exists(path):
+                self._drop(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        try:
+            # Persist recency so the LRU order survives a restart
+            os.utime(path)
+        except OSError:
+            pass
+        return path
+
+    def put(self, key, reg_no, variant, pdf_path):
+        """Move a rendered PDF into the cache and return its cached path."""
+        path = self._path(key, reg_no, variant)
+
+        with self._lock:
+            self._sweep()
+            # Re-rendered content reuses the path of an entry that may be retired
+            self._retired.pop(path, None)
+            os.replace(pdf_path, path)
+            size = os.path.getsize(path)
+
+            # The same student and variant under an older key is stale content
+            stale = [k for k, (r, v, _) in self._entries.items() if r == _safe(reg_no) and v == variant and k != key]
+            for stale_key in stale:
+                self._remove(stale_key)
+
+            if key in self._entries:
+                self._bytes -= self._entries[key][2]
+            self._entries[key] = (_safe(reg_no), variant, size)
+            self._entries.move_to_end(key)
+            self._bytes += size
+
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+        return path
+
+    def invalidate(self, reg_no):
+        """Drop every cached PDF for a student."""
+        with self._lock:
+            for key in [k for k, (r, _, _) in self._entries.items() if r == _safe(reg_no)]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _drop(self, key):
+        reg_no, variant, size = self._entries.pop(key)
+        self._bytes -= size
+        return self._path(key, reg_no, variant)
+
+    def _remove(self, key):
+        """Take an entry out of the index; its file is deleted once retire_seconds have passed."""
+        path = self._drop(key)
+        self._retired[path] = time.monotonic() + self.retire_seconds
+
+    def _sweep(self):
+        """Delete retired files whose grace period is over. Caller holds the lock."""
+        now = time.monotonic()
+        for path in [p for p, deadline in self._retired.items() if deadline <= now]:
+            del self._retired[path]
+            self._delete_file(path)
+
+    @staticmethod
+    def _delete_file(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0,
+                "evictions": self._evictions,
+                "retired_files": len(self._retired),
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache():
+    """Return the process-wide render cache, creating it on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache(
+                os.getenv("RENDER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "ars_render_cache")),
+                max_bytes=float(os.getenv("RENDER_CACHE_MAX_MB", "512")) * 1024 * 1024,
+                retire_seconds=float(os.getenv("RENDER_CACHE_RETIRE_SECONDS", "300")),
+            )
+        return _cache
+
+
+def get_render_cache_stats():
+    """Cache metrics, or None if the cache has not been used yet."""
+    return _cache.stats() if _cache is not None else None
+
+
+def copy_cached_pdf(cached_path, output_dir, filename):
+    """Copy a cached PDF out to a caller-owned directory (e.g. a report job's)."""
+    destination = os.path.join(output_dir, filename)
+    shutil.copyfile(cached_path, destination)
+    return destination
+
+
+@on_grades_changed
+def _invalidate_on_grade_change(reg_nos, course_codes):
+    # Keys already change with the grades; this just frees the superseded files early
+    if _cache is not None:
+        for reg_no in reg_nos:
+            _cache.invalidate(reg_no)
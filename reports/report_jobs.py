@@ -0,0 +1,317 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import jsonify, request, send_file
+from reports.pdf_postprocess import COMPRESSION_STAGES
+from reports.batch_render import parse_worker_count
+
+JOB_STATES = ("queued", "running", "completed", "failed")
+
+
+class JobQueueFullError(Exception):
+    """Raised when the number of unfinished jobs has reached the configured limit."""
+
+
+class ReportJobManager:
+    """
+    Runs report generation in a local worker pool and persists job state to disk.
+
+    Each job lives in its own directory under ``jobs_dir`` holding a ``job.json``
+    state file and the generated artifact, so concurrent jobs never share temp
+    files and state survives a restart: jobs still queued are resubmitted and jobs
+    that were mid-run are marked failed.
+    """
+
+    def __init__(self, jobs_dir, workers=2, max_pending=50, retention_hours=24):
+        self.jobs_dir = jobs_dir
+        self.workers = max(1, int(workers))
+        self.max_pending = max(1, int(max_pending))
+        self.retention_seconds = float(retention_hours) * 3600
+
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report-job")
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._load_jobs()
+
+    def _job_dir(self, job_id):
+        return os.path.join(self.jobs_dir, job_id)
+
+    def _save(self, job):
+        """Atomically write the job state file."""
+        path = os.path.join(self._job_dir(job["id"]), "job.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(job, f)
+        os.replace(tmp_path, path)
+
+    def _load_jobs(self):
+        now = time.time()
+        for job_id in os.listdir(self.jobs_dir):
+            path = os.path.join(self._job_dir(job_id), "job.json")
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    job = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            if now - job.get("created_at", now) > self.retention_seconds:
+                shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+                continue
+
+            if job["status"] == "running":
+                job["status"] = "failed"
+                job["error"] = "Interrupted by a server restart"
+                job["finished_at"] = now
+                self._save(job)
+
+            self._jobs[job_id] = job
+            if job["status"] == "queued":
+                self._executor.submit(self._run, job_id)
+
+    def _purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["status"] in ("completed", "failed")
+                and now - job["created_at"] > self.retention_seconds
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        for job_id in expired:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+
+    def submit(self, kind, params):
+        """Queue a report job and return its initial state."""
+        self._purge_expired()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+            if pending >= self.max_pending:
+                raise JobQueueFullError(f"Too many pending report jobs ({pending})")
+
+            job_id = uuid.uuid4().hex
+            job = {
+                "id": job_id,
+                "kind": kind,
+                "params": params,
+                "status": "queued",
+                "progress": {"done": 0, "total": len(params.get("students", []))},
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "error": None,
+                "artifact": None,
+                "download_name": None,
+            }
+            os.makedirs(self._job_dir(job_id), exist_ok=True)
+            self._jobs[job_id] = job
+            self._save(job)
+
+        self._executor.submit(self._run, job_id)
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _update(self, job_id, **changes):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(changes)
+            self._save(job)
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["status"] != "queued":
+                return
+            kind, params = job["kind"], job["params"]
+            total = job["progress"]["total"]
+
+        self._update(job_id, status="running", started_at=time.time())
+
+        def on_progress(done, total):
+            self._update(job_id, progress={"done": done, "total": total})
+
+        try:
+            artifact, download_name = _run_report(kind, params, self._job_dir(job_id), on_progress)
+            if not artifact or not os.path.exists(artifact):
+                raise RuntimeError("Report generation produced no output")
+            self._update(
+                job_id,
+                status="completed",
+                artifact=artifact,
+                download_name=download_name,
+                finished_at=time.time(),
+            )
+        except Exception as e:
+            print(f"Error running report job {job_id}: {e}")
+            traceback.print_exc()
+            self._update(job_id, status="failed", error=str(e), finished_at=time.time())
+
+    def stats(self):
+        with self._lock:
+            counts = {state: 0 for state in JOB_STATES}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {"workers": self.workers, "max_pending": self.max_pending, **counts}
+
+
+def _run_report(kind, params, output_dir, progress):
+    """Generate the requested report into output_dir; returns (artifact_path, download_name)."""
+    # Imported lazily: the generators pull in Playwright, matplotlib and pandas
+    students = params["students"]
+
+    if kind == "pdf":
+        from reports.generate_pdf_with_styles import generate_pdf_reporting
+        generation_type = params.get("generation_type", "combined")
+        pdf_path = generate_pdf_reporting(
+            students,
+            generation_type,
+            includeCharts=params.get("include_charts", False),
+            template_style=params.get("template_style", "classic"),
+            workers=params.get("workers"),
+            output_dir=output_dir,
+            progress=progress,
+            compression=params.get("compression"),
+        )
+        if generation_type == "combined":
+            download_name = "Combined_Student_Report.pdf"
+        elif len(students) == 1:
+            download_name = f"{students[0]}_report.pdf"
+        else:
+            download_name = "Student_Reports.pdf"
+        return pdf_path, download_name
+
+    if kind == "excel":
+        from reports.generate_excel import generate_excel_report
+        excel_path = generate_excel_report(students, params.get("columns"), output_dir=output_dir)
+        progress(len(students), len(students))
+        return excel_path, "Student_Report.xlsx"
+
+    raise ValueError(f"Unknown report job type: {kind}")
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Return the process-wide job manager, creating it on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ReportJobManager(
+                os.getenv("REPORT_JOBS_DIR", os.path.join(tempfile.gettempdir(), "ars_report_jobs")),
+                workers=int(os.getenv("REPORT_JOB_WORKERS", "2")),
+                max_pending=int(os.getenv("REPORT_JOB_MAX_PENDING", "50")),
+                retention_hours=float(os.getenv("REPORT_JOB_RETENTION_HOURS", "24")),
+            )
+        return _manager
+
+
+def get_job_stats():
+    """Job counts by state, or None if no job has been submitted yet."""
+    return _manager.stats() if _manager is not None else None
+
+
+def job_status_payload(job):
+    """Public view of a job; the artifact path on disk is not exposed."""
+    payload = {
+        "jobId": job["id"],
+        "type": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "createdAt": job["created_at"],
+        "startedAt": job["started_at"],
+        "finishedAt": job["finished_at"],
+        "error": job["error"],
+        "statusUrl": f"/api/reports/jobs/{job['id']}",
+    }
+    if job["status"] == "completed":
+        payload["downloadUrl"] = f"/api/reports/jobs/{job['id']}/download"
+    return payload
+
+
+def submit_report_job(kind, params):
+    """Queue a job and build the 202 response, or a 429 if the queue is full."""
+    try:
+        job = get_job_manager().submit(kind, params)
+    except JobQueueFullError as e:
+        return jsonify({"error": str(e)}), 429
+    return jsonify(job_status_payload(job)), 202
+
+
+def register_report_job_routes(app):
+    """Register the asynchronous report job routes with the Flask app."""
+
+    @app.route('/api/reports/jobs', methods=['POST'])
+    def create_report_job():
+        try:
+            data = request.get_json() or {}
+
+            students = data.get('students', [])
+            if isinstance(students, str):
+                students = [s for s in students.split(',') if s]
+            if not students:
+                return jsonify({"error": "No students specified"}), 400
+
+            kind = data.get('type', 'pdf')
+            if kind == 'pdf':
+                generation_type = data.get('generationType', 'combined')
+                if generation_type not in ('individual', 'combined'):
+                    return jsonify({"error": "generationType must be 'individual' or 'combined'"}), 400
+                compression = data.get('compression')
+                if compression and compression.lower() not in COMPRESSION_STAGES:
+                    return jsonify({"error": f"compression must be one of: {', '.join(COMPRESSION_STAGES)}"}), 400
+                try:
+                    workers = parse_worker_count(data.get('workers'))
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+                params = {
+                    "students": students,
+                    "generation_type": generation_type,
+                    "include_charts": bool(data.get('includeCharts', False)),
+                    "template_style": data.get('templateStyle', 'classic'),
+                    "workers": workers,
+                    "compression": compression,
+                }
+            elif kind == 'excel':
+                columns = data.get('columns')
+                if isinstance(columns, str):
+                    columns = columns.split(',') if columns else None
+                params = {"students": students, "columns": columns}
+            else:
+                return jsonify({"error": "type must be 'pdf' or 'excel'"}), 400
+
+            return submit_report_job(kind, params)
+
+        except Exception as e:
+            print(f"Error creating report job: {e}")
+            traceback.print_exc()
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/api/reports/jobs/<job_id>', methods=['GET'])
+    def get_report_job(job_id):
+        job = get_job_manager().get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job_status_payload(job))
+
+    @app.route('/api/reports/jobs/<job_id>/download', methods=['GET'])
+    def download_report_job(job_id):
+        job = get_job_manager().get(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        if job["status"] != "completed":
+            return jsonify({"error": f"Job is {job['status']}", **job_status_payload(job)}), 409
+        return send_file(job["artifact"], as_attachment=True, download_name=job["download_name"])
@@ -91,20 +91,6 @@ def setup_academic_reports():
         """)
         print("✅ Updated courses with subject_type and course_type")
         
-        # Insert sample data into class_averages
-        cursor.execute("""
-            INSERT IGNORE INTO class_averages (branch, semester, course_code, academic_year, average_grade_points, pass_percentage)
-            SELECT 
-                c.department,
-                c.semester,
-                c.code,
-                '2023-24',
-                ROUND(RAND() * 3 + 5, 2),  -- Random average between 5 and 8
-                ROUND(RAND() * 20 + 80, 1)  -- Random pass percentage between 80% and 100%
-            FROM courses c
-        """)
-        print("✅ Inserted sample data into class_averages table")
-        
         # Commit changes
         conn.commit()
         
@@ -112,6 +98,16 @@ def setup_academic_reports():
         cursor.close()
         conn.close()
         
+        # Class averages are computed from the grades already loaded
+        from database.class_averages import rebuild_class_averages
+        rebuild_class_averages()
+        
+        # Course semesters feed the dashboard's SGPAs
+        from database.data_versions import bump_data_version
+        from database.dashboard_aggregates import rebuild_dashboard_aggregates
+        bump_data_version("courses")
+        rebuild_dashboard_aggregates()
+        
         print("✅ Academic reports database setup completed successfully")
         return True
         
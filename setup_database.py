@@ -2,10 +2,19 @@ import os
 import mysql.connector
 from dotenv import load_dotenv
 import traceback
+from database.schema_cache import ensure_index
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Keyset pagination of /api/students by each sortable column. Created separately
+# from the table so databases set up before they existed get them too.
+STUDENT_INDEXES = [
+    ("idx_students_name", ("name", "registration_number")),
+    ("idx_students_branch", ("branch", "registration_number")),
+    ("idx_students_semester", ("current_semester", "registration_number")),
+]
+
 def setup_database():
     """Set up the database and tables if they don't exist."""
     try:
@@ -54,6 +63,12 @@ def setup_database():
         """)
         print("✅ Table 'students' created or already exists")
         
+        for index_name, columns in STUDENT_INDEXES:
+            if ensure_index(cursor, "students", index_name, columns):
+                print(f"✅ Added index '{index_name}' to students table")
+            else:
+                print(f"✅ Index '{index_name}' already exists")
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS courses (
                 id INT AUTO_INCREMENT PRIMARY KEY,
@@ -292,6 +307,12 @@ def setup_database():
         cursor.close()
         conn.close()
         
+        # The core tables may have just been created; anything cached from them is stale
+        from database.data_versions import bump_data_version
+        from database.dashboard_aggregates import rebuild_dashboard_aggregates
+        bump_data_version("students", "courses", "grades")
+        rebuild_dashboard_aggregates()
+        
         print("✅ Database setup completed successfully")
         return True
         
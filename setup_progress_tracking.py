@@ -148,6 +148,10 @@ def setup_progress_tracking():
         cursor.close()
         conn.close()
         
+        # Cached curriculum indexes and academic profiles are validated against these
+        from database.data_versions import bump_data_version
+        bump_data_version("curriculum_requirements", "backlog_tracking", "internship_projects")
+        
         print("✅ Progress tracking database setup completed successfully")
         return True
         
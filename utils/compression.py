@@ -0,0 +1,119 @@
+import gzip
+import os
+import threading
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is offered without it
+    brotli = None
+
+# Responses smaller than this are sent as-is; compressing them costs more than it saves
+MIN_BYTES = int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("RESPONSE_COMPRESSION_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("RESPONSE_COMPRESSION_BROTLI_QUALITY", "5"))
+ENABLED = os.getenv("RESPONSE_COMPRESSION_ENABLED", "true").lower() == "true"
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "application/x-ndjson",
+    "image/svg+xml",
+}
+
+
+def _compress_gzip(data):
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def _compress_brotli(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+# Encodings in order of preference when the client accepts several
+ENCODINGS = {}
+if brotli is not None:
+    ENCODINGS["br"] = _compress_brotli
+ENCODINGS["gzip"] = _compress_gzip
+
+
+def choose_encoding(accept_encodings):
+    """Pick the first supported encoding the client accepts, or None."""
+    for encoding in ENCODINGS:
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def is_compressible(response):
+    mimetype = response.mimetype or ""
+    return mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES
+
+
+class CompressionStats:
+    """Bytes before and after compression, per encoding."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._encodings = {}
+
+    def record(self, encoding, bytes_in, bytes_out):
+        with self._lock:
+            stats = self._encodings.setdefault(encoding, {"responses": 0, "bytes_in": 0, "bytes_out": 0})
+            stats["responses"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": ENABLED,
+                "min_bytes": MIN_BYTES,
+                "encodings": {
+                    name: {**stats, "ratio": round(stats["bytes_out"] / stats["bytes_in"], 3) if stats["bytes_in"] else 0}
+                    for name, stats in self._encodings.items()
+                },
+            }
+
+
+_stats = CompressionStats()
+
+
+def register_compression(app):
+    """Compress text and JSON responses with brotli or gzip, as negotiated by Accept-Encoding."""
+    if not ENABLED:
+        return
+
+    @app.after_request
+    def compress_response(response):
+        if (response.status_code < 200 or response.status_code in (204, 304)
+                or response.direct_passthrough
+                or response.is_streamed
+                or "Content-Encoding" in response.headers
+                or not is_compressible(response)):
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < MIN_BYTES:
+            return response
+
+        compressed = ENCODINGS[encoding](data)
+        if len(compressed) >= len(data):
+            return response
+
+        response.set_data(compressed)
+        response.headers["Content-Encoding"] = encoding
+        if response.headers.get("ETag", "").startswith('"'):
+            # A strong ETag names exact bytes, so the compressed body needs its own
+            response.headers["ETag"] = f'{response.headers["ETag"][:-1]}-{encoding}"'
+        _stats.record(encoding, len(data), len(compressed))
+        return response
+
+
+def get_compression_stats():
+    return _stats.snapshot()
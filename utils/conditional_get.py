@@ -0,0 +1,81 @@
+import hashlib
+import os
+import traceback
+from datetime import timezone
+from functools import wraps
+from flask import Response, make_response, request
+from database.data_versions import get_data_versions
+
+# Extra input to every ETag, for invalidating all client copies at once
+ETAG_SALT = os.getenv("ETAG_SALT", "")
+
+
+def _not_modified(etag, last_modified):
+    response = Response(status=304)
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def conditional_get(*tables, extra=None):
+    """
+    Answer If-None-Match / If-Modified-Since for a GET view from table versions.
+
+    The weak ETag covers the path and query string, the versions of the tables the
+    view reads, the view's source file (so a deploy changes it) and, if given,
+    ``extra(**view_kwargs)`` for inputs that are not tables, such as photo files.
+    A matching request gets a 304 before the view runs; successful responses carry
+    the ETag and, when extra is not used, the tables' Last-Modified time. Place it
+    directly beneath @app.route, above any response cache.
+    """
+    def decorator(view):
+        source = view.__code__.co_filename
+        source_signature = f"{os.path.basename(source)}:{os.path.getmtime(source)}"
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            try:
+                versions = get_data_versions(tables)
+                parts = [
+                    ETAG_SALT,
+                    source_signature,
+                    request.path,
+                    sorted(request.args.items(multi=True)),
+                    [(name, version) for name, (version, _) in sorted(versions.items())],
+                    extra(**kwargs) if extra else None,
+                ]
+            except Exception as e:
+                # Without versions the response cannot be validated; just serve it
+                print(f"❌ Could not read data versions for {request.path}: {e}")
+                traceback.print_exc()
+                return view(*args, **kwargs)
+
+            etag = hashlib.sha1(repr(parts).encode()).hexdigest()
+            last_modified = None
+            if extra is None:
+                last_modified = max((updated_at for _, updated_at in versions.values() if updated_at), default=None)
+                if last_modified:
+                    last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+            if request.if_none_match:
+                if request.if_none_match.contains_weak(etag):
+                    return _not_modified(etag, last_modified)
+            elif last_modified and request.if_modified_since and last_modified <= request.if_modified_since:
+                return _not_modified(etag, last_modified)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag, weak=True)
+                if last_modified:
+                    response.last_modified = last_modified
+                else:
+                    response.headers.pop("Last-Modified", None)
+                response.headers["Cache-Control"] = "no-cache"
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,85 @@
+import os
+import threading
+import time
+from flask import jsonify
+from database.mysql_data_handler import ping_database
+from reports.browser_pool import get_browser_pool_stats
+from reports.report_jobs import get_job_stats
+
+# How long a database ping result is reused, so frequent probes cost one ping per window
+DB_CHECK_TTL = float(os.getenv("READINESS_DB_CHECK_TTL", "5"))
+# How long a probe waits for a pooled connection before reporting not ready
+DB_CHECK_TIMEOUT = float(os.getenv("READINESS_DB_TIMEOUT", "2"))
+# Render backlog above which the instance stops taking new traffic
+MAX_RENDER_QUEUE = int(os.getenv("READINESS_MAX_RENDER_QUEUE", "100"))
+
+
+class DatabaseCheck:
+    """Pooled-connection ping whose result is cached for a short window."""
+
+    def __init__(self, ttl, timeout):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._result = None
+        self._checked_at = 0.0
+
+    def result(self):
+        # The lock also makes concurrent probes wait for a single ping
+        with self._lock:
+            if self._result is None or time.monotonic() - self._checked_at >= self.ttl:
+                started = time.perf_counter()
+                try:
+                    ping_database(timeout=self.timeout)
+                    self._result = {"ok": True}
+                except Exception as e:
+                    self._result = {"ok": False, "error": str(e)}
+                self._result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+                self._checked_at = time.monotonic()
+            return {**self._result, "age_seconds": round(time.monotonic() - self._checked_at, 2)}
+
+
+_database_check = DatabaseCheck(DB_CHECK_TTL, DB_CHECK_TIMEOUT)
+
+
+def database_ready():
+    """Cached database check, shared by /readyz and the root endpoint."""
+    return _database_check.result()
+
+
+def browser_pool_ready():
+    stats = get_browser_pool_stats()
+    if stats is None:
+        # Browsers start on the first render
+        return {"ok": True, "started": False}
+    # Only workers with a launched browser can render; a worker retrying its launch is alive but not ready
+    ok = stats["ready_workers"] > 0 and stats["queue_depth"] <= MAX_RENDER_QUEUE
+    return {"ok": ok, "started": True, "ready_workers": stats["ready_workers"], "queue_depth": stats["queue_depth"]}
+
+
+def report_jobs_ready():
+    stats = get_job_stats()
+    if stats is None:
+        return {"ok": True, "started": False}
+    pending = stats["queued"] + stats["running"]
+    return {"ok": pending < stats["max_pending"], "started": True, "pending": pending, "max_pending": stats["max_pending"]}
+
+
+def register_health_routes(app):
+    """Register the liveness and readiness probe endpoints."""
+
+    @app.route('/healthz', methods=['GET'])
+    def healthz():
+        """Liveness: the process is serving requests. No I/O."""
+        return jsonify({"status": "ok"})
+
+    @app.route('/readyz', methods=['GET'])
+    def readyz():
+        """Readiness: database reachable, browser pool alive and job queue accepting work."""
+        checks = {
+            "database": database_ready(),
+            "browserPool": browser_pool_ready(),
+            "reportJobs": report_jobs_ready(),
+        }
+        ready = all(check["ok"] for check in checks.values())
+        return jsonify({"status": "ready" if ready else "unavailable", "checks": checks}), 200 if ready else 503
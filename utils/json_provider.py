@@ -0,0 +1,92 @@
+import dataclasses
+import decimal
+import json
+import os
+import uuid
+from datetime import date, time, timedelta
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib encoder is used instead
+    orjson = None
+
+
+def json_default(o):
+    """
+    Serialize the non-JSON types mysql.connector returns.
+
+    Output matches Flask's default provider, which the API was built on:
+    DECIMAL columns (CGPA, SGPA, credits) become strings and DATE/DATETIME
+    columns RFC 822 dates. TIME columns become ISO 8601 strings.
+    """
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, date):
+        return http_date(o)
+    if isinstance(o, time):
+        return o.isoformat()
+    if isinstance(o, timedelta):
+        # mysql.connector returns TIME columns as timedelta
+        return o.total_seconds()
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if isinstance(o, (set, frozenset)):
+        return list(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj, sort_keys):
+    return json.dumps(obj, default=json_default, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":"))
+
+
+def _orjson_dumps(obj, sort_keys):
+    # Dates go through json_default, orjson would write them as ISO 8601
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=json_default, option=option).decode()
+
+
+# Encoders selectable with the JSON_ENCODER env var ("auto" picks orjson when installed)
+JSON_ENCODERS = {"stdlib": _stdlib_dumps}
+if orjson is not None:
+    JSON_ENCODERS["orjson"] = _orjson_dumps
+
+
+def resolve_json_encoder(name=None):
+    name = (name or os.getenv("JSON_ENCODER", "auto")).lower()
+    if name == "auto":
+        name = "orjson" if "orjson" in JSON_ENCODERS else "stdlib"
+    if name not in JSON_ENCODERS:
+        print(f"⚠️ JSON encoder '{name}' is not available, using stdlib")
+        name = "stdlib"
+    return name
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider with a pluggable compact encoder.
+
+    jsonify output goes through the encoder chosen by JSON_ENCODER; pretty-printed
+    output (debug mode) and calls passing json.dumps options keep using the stdlib.
+    Non-ASCII text is written as UTF-8 instead of escape sequences.
+    """
+
+    default = staticmethod(json_default)
+    ensure_ascii = False
+
+    def __init__(self, app, encoder=None):
+        super().__init__(app)
+        self.encoder = resolve_json_encoder(encoder)
+        self._dumps = JSON_ENCODERS[self.encoder]
+
+    def dumps(self, obj, **kwargs):
+        if set(kwargs) <= {"separators", "sort_keys"} and kwargs.get("separators", (",", ":")) == (",", ":"):
+            return self._dumps(obj, kwargs.get("sort_keys", self.sort_keys))
+        return super().dumps(obj, **kwargs)
@@ -0,0 +1,214 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import Response, make_response, request
+from database.grade_events import on_grades_changed
+
+# Per-route lifetimes in seconds. Grade writes invalidate the affected entries
+# directly, so these only bound staleness from writes made outside the API.
+DASHBOARD_TTL = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+STUDENT_REPORT_TTL = int(os.getenv("STUDENT_REPORT_CACHE_TTL", "300"))
+
+
+class _Entry:
+    __slots__ = ("body", "status", "headers", "expires_at", "tags", "size")
+
+    def __init__(self, body, status, headers, expires_at, tags):
+        self.body = body
+        self.status = status
+        self.headers = headers
+        self.expires_at = expires_at
+        self.tags = tags
+        self.size = len(body)
+
+
+class _Flight:
+    """A computation in progress that identical concurrent requests wait on."""
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResponseCache:
+    """
+    In-memory TTL cache of serialized responses, bounded by total size with LRU eviction.
+
+    Concurrent misses for the same key are coalesced: the first request computes
+    the response while the others wait for it instead of running the same queries.
+    Entries carry tags (e.g. "dashboard", "student:<reg_no>") so writes can drop
+    exactly the responses they affect. A response computed while an invalidation
+    happened is returned but not stored, since it may already be stale.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, max_entries=5000, enabled=True):
+        self.max_bytes = int(max_bytes)
+        self.max_entries = max(1, int(max_entries))
+        self.enabled = enabled
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._bytes = 0
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    def get_or_compute(self, key, ttl, compute, tags=()):
+        """
+        Return the cached (body, status, headers) for key, computing it at most once.
+
+        compute() must return (body, status, headers, cacheable); uncacheable results
+        are still shared with requests that were waiting on the same computation.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return entry.body, entry.status, entry.headers
+                self._remove(key)
+
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = _Flight()
+                self._misses += 1
+                invalidations = self._invalidations
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            flight.event.wait()
+            if isinstance(flight.error, Exception):
+                raise flight.error
+            if flight.result is None:
+                # The leader was interrupted (e.g. its worker was shut down); compute our own
+                body, status, headers, _ = compute()
+                return body, status, headers
+            return flight.result
+
+        cacheable = False
+        try:
+            body, status, headers, cacheable = compute()
+            flight.result = (body, status, headers)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if flight.result is not None and cacheable and self._invalidations == invalidations:
+                    self._store(key, _Entry(body, status, headers, time.monotonic() + ttl, frozenset(tags)))
+            flight.event.set()
+
+        return flight.result
+
+    def _store(self, key, entry):
+        if entry.size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags."""
+        tags = set(tags)
+        with self._lock:
+            self._invalidations += 1
+            for key in [key for key, entry in self._entries.items() if entry.tags & tags]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "hit_rate": round((self._hits + self._coalesced) / lookups, 3) if lookups else 0,
+                "evictions": self._evictions,
+                "in_flight": len(self._in_flight),
+            }
+
+
+_cache = ResponseCache(
+    max_bytes=float(os.getenv("RESPONSE_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000")),
+    enabled=os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true",
+)
+
+
+def cached_response(ttl, tags=()):
+    """
+    Cache a GET view's successful responses for ttl seconds, keyed on path and query string.
+
+    Place it directly beneath @app.route. ``tags`` is a list of tags or a callable
+    receiving the view's URL arguments (e.g. ``lambda reg_no: [f"student:{reg_no}"]``).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not _cache.enabled or request.method != 'GET':
+                return view(*args, **kwargs)
+
+            key = (request.path, tuple(sorted(request.args.items(multi=True))))
+            entry_tags = tags(**kwargs) if callable(tags) else tags
+
+            def compute():
+                response = make_response(view(*args, **kwargs))
+                cacheable = response.status_code == 200 and not response.direct_passthrough
+                headers = [(k, v) for k, v in response.headers.items() if k.lower() != 'set-cookie']
+                return response.get_data(), response.status_code, headers, cacheable
+
+            body, status, headers = _cache.get_or_compute(key, ttl, compute, entry_tags)
+            return Response(body, status=status, headers=headers)
+        return wrapper
+    return decorator
+
+
+def invalidate_responses(*tags):
+    """Drop cached responses with any of the given tags."""
+    _cache.invalidate(*tags)
+
+
+def clear_response_cache():
+    _cache.clear()
+
+
+def get_response_cache_stats():
+    return _cache.stats()
+
+
+@on_grades_changed
+def _invalidate_on_grade_change(reg_nos, course_codes):
+    # Rankings compare students, so any grade change can move everyone's standing
+    invalidate_responses("dashboard", "rankings", *(f"student:{reg_no}" for reg_no in reg_nos))